@@ -0,0 +1,6 @@
+"""
+AI feedback helpers for the Cyber-ML Training Platform.
+
+The backend scores students' model choices through `ai_provider`; see
+AI_INTEGRATION_DESIGN_DOC.md for the provider modes.
+"""
@@ -0,0 +1,132 @@
+"""
+Persistent cache of AI feedback responses.
+
+Many students submit near-identical justifications ("IsolationForest works
+well for unlabeled data."), so responses are keyed on the normalized
+(provider, student model, justification, prompt template version) and kept
+in a small SQLite file. Entries expire after `ttl` seconds and the least
+recently used ones are evicted once the cache holds `max_entries`.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = os.getenv("AI_CACHE_PATH") or os.path.join(os.path.expanduser("~"), ".cache", "cyberml", "ai_responses.db")
+
+DEFAULT_MAX_ENTRIES = 50_000
+DEFAULT_TTL = 30 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_model(model):
+    # "Isolation Forest", "isolation-forest" and "IsolationForest" are one model
+    return _NON_ALNUM.sub("", str(model or "").casefold())
+
+
+def normalize_justification(text):
+    # Case, spacing and trailing punctuation do not change what the student argued
+    return _WHITESPACE.sub(" ", str(text or "").casefold()).strip().rstrip(".!? ")
+
+
+def cache_key(provider, model, justification, template_version):
+    """
+    Returns the hex digest identifying one (provider, model, justification, template) request.
+    """
+    parts = [provider, normalize_model(model), normalize_justification(justification), template_version]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed LRU/TTL cache of response dicts, safe to share between threads.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def get(self, key):
+        """
+        Returns the cached response for key, or None if absent or expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key, response):
+        """
+        Stores a response and evicts the least recently used entries over max_entries.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(response), now, now),
+                )
+                overflow = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                        (overflow,),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def purge_expired(self):
+        """
+        Deletes every expired entry and returns how many were removed.
+        """
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            return self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
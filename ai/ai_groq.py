@@ -0,0 +1,90 @@
+"""
+Groq provider.
+
+Talks to Groq's OpenAI-compatible chat completions endpoint over plain HTTP,
+so GROQ_BASE_URL can point the provider at a local stand-in (see
+ai.groq_standin) for development and load tests.
+"""
+import json
+import math
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+DEFAULT_BASE_URL = "https://api.groq.com/openai/v1"
+
+# Rate-limited and transient server errors are retried with backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 2
+
+
+def _parse_content(content: str) -> dict:
+    # Models occasionally wrap the JSON in prose or ``` fences
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("no JSON object in response")
+
+    data = json.loads(content[start:end + 1])
+    score = data.get("score")
+    return {
+        "score": None if score is None else min(max(float(score), 0.0), 1.0),
+        "feedback": str(data.get("feedback", ""))
+    }
+
+
+def _retry_delay(retry_after, attempt: int) -> float:
+    # Retry-After is either delay-seconds or an HTTP date; anything else backs off exponentially
+    if retry_after:
+        try:
+            seconds = float(retry_after)
+        except ValueError:
+            seconds = None
+        if seconds is not None:
+            return max(seconds, 0.0) if math.isfinite(seconds) else float(2 ** attempt)
+        try:
+            when = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            when = None
+        if when is not None:
+            if when.tzinfo is None:
+                when = when.replace(tzinfo=timezone.utc)
+            return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    return float(2 ** attempt)
+
+
+def ask_groq(prompt: str, model: str = None, timeout: float = 30.0) -> dict:
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        return {"score": None, "feedback": "Missing GROQ_API_KEY."}
+
+    base_url = os.getenv("GROQ_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+    body = json.dumps({
+        "model": model or os.getenv("GROQ_MODEL", DEFAULT_MODEL),
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.2,
+        "response_format": {"type": "json_object"}
+    }).encode()
+
+    request = Request(f"{base_url}/chat/completions", data=body, method="POST", headers={
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    })
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                payload = json.load(response)
+            return _parse_content(payload["choices"][0]["message"]["content"])
+
+        except HTTPError as e:
+            if e.code in RETRY_STATUSES and attempt < MAX_RETRIES:
+                time.sleep(_retry_delay(e.headers.get("Retry-After"), attempt))
+                continue
+            return {"score": None, "feedback": f"Groq error: HTTP {e.code}"}
+
+        except (URLError, OSError, KeyError, IndexError, ValueError) as e:
+            return {"score": None, "feedback": f"Groq error: {e}"}
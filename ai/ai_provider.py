@@ -0,0 +1,174 @@
+"""
+Unified AI provider interface.
+
+`ask_ai(prompt)` routes a raw prompt to the provider selected by AI_MODE.
+`evaluate_model_choice(model, justification)` builds the grading prompt and
+answers repeated (normalized) justifications from the response cache, and
+`evaluate_batch` grades a whole class concurrently:
+
+    results = asyncio.run(evaluate_batch(payloads, concurrency=8, rate=5))
+"""
+import asyncio
+import os
+import time
+
+from .ai_cache import ResponseCache, cache_key
+from .ai_groq import ask_groq
+from .ai_stub import ask_stub
+
+AI_MODE = os.getenv("AI_MODE", "groq").lower()
+
+PROVIDERS = {
+    "groq": ask_groq,
+    "stub": ask_stub,
+}
+
+# Bump whenever PROMPT_TEMPLATE changes so cached answers to the old prompt are not reused
+TEMPLATE_VERSION = "1"
+
+PROMPT_TEMPLATE = """
+You are evaluating a student's choice of anomaly detection model.
+Model chosen: {model}
+Justification: {justification}
+
+Score their justification from 0.0 to 1.0 based on correctness, clarity, and reasoning.
+
+Return ONLY valid JSON:
+{{
+  "score": <float>,
+  "feedback": "<short explanation>"
+}}
+"""
+
+UNAVAILABLE = {"score": None, "feedback": "AI helper unavailable."}
+
+_default_cache = None
+
+
+def ask_ai(prompt: str, mode: str = None) -> dict:
+    """
+    Unified AI provider interface.
+    Returns a dict with keys: score, feedback.
+    """
+    return PROVIDERS.get((mode or AI_MODE).lower(), ask_stub)(prompt)
+
+
+def build_prompt(model, justification):
+    return PROMPT_TEMPLATE.format(model=model, justification=justification)
+
+
+def default_cache():
+    """
+    Returns the process-wide response cache, opened on first use.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
+
+
+def _request_key(payload, mode):
+    return cache_key(mode, payload.get("model"), payload.get("justification"), TEMPLATE_VERSION)
+
+
+def evaluate_model_choice(model, justification, mode=None, cache=None):
+    """
+    Scores one model choice, answering repeated justifications from the cache.
+
+    Only real scores are cached; "unavailable"/error responses are retried
+    on the next call. Pass cache=False to bypass the cache.
+    """
+    mode = (mode or AI_MODE).lower()
+    cache = default_cache() if cache is None else cache
+    key = cache_key(mode, model, justification, TEMPLATE_VERSION)
+
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    result = ask_ai(build_prompt(model, justification), mode)
+    if cache and result.get("score") is not None:
+        cache.put(key, result)
+    return result
+
+
+# -----------------------------
+# Concurrent batches
+# -----------------------------
+class TokenBucket:
+    """
+    Async token bucket: allows `rate` acquisitions per second with bursts of `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def evaluate_batch(payloads, mode=None, cache=None, concurrency=8, rate=None, burst=None):
+    """
+    Scores a list of {"model", "justification"} payloads and returns results in order.
+
+    Payloads that normalize to the same cache key share one provider call,
+    cache hits skip the provider entirely, and the remaining calls run in
+    worker threads with at most `concurrency` in flight and, if `rate` is
+    set, no more than `rate` requests per second (bursts up to `burst`).
+    """
+    mode = (mode or AI_MODE).lower()
+    cache = default_cache() if cache is None else cache
+    keys = [_request_key(p, mode) for p in payloads]
+
+    answers = {}
+    pending = {}
+    for key, payload in zip(keys, payloads):
+        if key in answers or key in pending:
+            continue
+        cached = cache.get(key) if cache else None
+        if cached is not None:
+            answers[key] = cached
+        else:
+            pending[key] = payload
+
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate, burst) if rate else None
+
+    async def run(key, payload):
+        async with semaphore:
+            if bucket is not None:
+                await bucket.acquire()
+            prompt = build_prompt(payload.get("model"), payload.get("justification"))
+            try:
+                result = await asyncio.to_thread(ask_ai, prompt, mode)
+            except Exception:
+                result = dict(UNAVAILABLE)
+
+        if cache and result.get("score") is not None:
+            cache.put(key, result)
+        answers[key] = result
+
+    await asyncio.gather(*(run(key, payload) for key, payload in pending.items()))
+    # Copies, so callers annotating one result do not change its duplicates
+    return [dict(answers[key]) for key in keys]
+
+
+def evaluate_many(payloads, **options):
+    """
+    Synchronous wrapper around evaluate_batch for scripts and graders.
+    """
+    return asyncio.run(evaluate_batch(payloads, **options))
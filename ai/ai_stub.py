@@ -0,0 +1,16 @@
+import os
+import time
+
+# Simulated provider latency in seconds, for load tests of the backend
+STUB_LATENCY = float(os.getenv("AI_STUB_LATENCY", "0"))
+
+
+def ask_stub(prompt: str, latency: float = None) -> dict:
+    delay = STUB_LATENCY if latency is None else latency
+    if delay:
+        time.sleep(delay)
+
+    return {
+        "score": None,
+        "feedback": "AI helper disabled (stub mode)."
+    }
@@ -0,0 +1,103 @@
+"""
+Local stand-in for Groq's chat completions endpoint.
+
+Answers POST /openai/v1/chat/completions with a deterministic JSON score so
+the Groq provider, the response cache and the batch API can be exercised
+without an API key or network access:
+
+    python -m ai.groq_standin --port 8808 --latency 0.2
+    GROQ_API_KEY=dummy GROQ_BASE_URL=http://127.0.0.1:8808/openai/v1 AI_MODE=groq ...
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_JUSTIFICATION = re.compile(r"Justification:(.*)")
+
+
+def standin_reply(prompt):
+    """
+    Returns the {"score", "feedback"} the stand-in answers for a prompt.
+    """
+    match = _JUSTIFICATION.search(prompt)
+    words = len(match.group(1).split()) if match else 0
+    return {
+        "score": round(min(words / 40, 1.0), 2),
+        "feedback": f"Stand-in review of a {words}-word justification."
+    }
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    error_rate = 0.0
+    requests = 0
+    _count_lock = threading.Lock()
+
+    def do_POST(self):
+        with StandinHandler._count_lock:
+            StandinHandler.requests += 1
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.latency:
+            time.sleep(self.latency)
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+        elif random.random() < self.error_rate:
+            self._send(429, {"error": {"message": "rate limited"}}, {"Retry-After": "0"})
+        else:
+            prompt = body.get("messages", [{}])[-1].get("content", "")
+            self._send(200, {
+                "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": json.dumps(standin_reply(prompt))}}]
+            })
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=0, latency=0.0, error_rate=0.0):
+    """
+    Starts the stand-in on a background thread and returns the server.
+
+    The base URL for GROQ_BASE_URL is f"http://{host}:{server.server_port}/openai/v1".
+    """
+    handler = type("Handler", (StandinHandler,), {"latency": latency, "error_rate": error_rate})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Groq API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each reply.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429.")
+    args = parser.parse_args(argv)
+
+    server = serve(args.host, args.port, args.latency, args.error_rate)
+    print(f"Groq stand-in on http://{args.host}:{server.server_port}/openai/v1 (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
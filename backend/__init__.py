@@ -0,0 +1,5 @@
+"""
+Backend service for AI feedback on student submissions.
+
+Run with `uvicorn backend.main:app`; see AI_INTEGRATION_DESIGN_DOC.md.
+"""
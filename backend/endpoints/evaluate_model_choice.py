@@ -0,0 +1,53 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Request, Response
+
+router = APIRouter()
+
+# Longest a client may hold a POST or GET open waiting for its result
+MAX_WAIT = 30.0
+
+
+def _service(request: Request):
+    return request.app.state.evaluation_service
+
+
+@router.post("/evaluate-model-choice")
+async def evaluate_model_choice(payload: dict, request: Request, response: Response, wait: float = 0.0):
+    """
+    Queues a {"model", "justification"} evaluation and returns its job.
+
+    Cached and coalesced answers come back immediately with status "done";
+    otherwise the response is 202 and the result is fetched from
+    GET /evaluate-model-choice/{job_id}. Pass ?wait=<seconds> to hold the
+    request open until the result is ready (or the wait runs out).
+    """
+    service = _service(request)
+    try:
+        job = service.submit(payload)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Evaluation queue is full, retry shortly.")
+
+    if wait > 0 and job["status"] not in ("done", "failed"):
+        job = await service.wait(job["job_id"], min(wait, MAX_WAIT))
+
+    if job["status"] not in ("done", "failed"):
+        response.status_code = 202
+    return job
+
+
+@router.get("/evaluate-model-choice/{job_id}")
+async def evaluation_result(job_id: str, request: Request, wait: float = 0.0):
+    """
+    Returns a job's status and, once finished, its {"score", "feedback"} result.
+    """
+    service = _service(request)
+    job = await service.wait(job_id, min(wait, MAX_WAIT)) if wait > 0 else service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job.")
+    return job
+
+
+@router.get("/evaluate-model-choice-stats")
+async def evaluation_stats(request: Request):
+    return _service(request).stats()
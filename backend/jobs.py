@@ -0,0 +1,219 @@
+"""
+Background job queue for model-choice evaluations.
+
+Submitting a payload returns a job immediately; a pool of workers calls the
+(slow) AI provider in the background and clients poll for the result. Three
+things keep upstream traffic down when a whole class submits at once:
+
+    - answers already in the response cache complete at submit time
+    - payloads that normalize to the same cache key as a queued or running
+      job join that job instead of creating a new one (in-flight coalescing)
+    - successful results stay attached to their key for `result_ttl` seconds
+"""
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from ai.ai_provider import AI_MODE, TEMPLATE_VERSION, UNAVAILABLE, TokenBucket, ask_ai, build_prompt, default_cache
+from ai.ai_cache import cache_key
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """
+    One upstream evaluation, shared by every submission that coalesced into it.
+    """
+
+    def __init__(self, key, payload):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.payload = payload
+        self.status = QUEUED
+        self.result = None
+        self.submissions = 1
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.done = asyncio.Event()
+
+    def finish(self, result, status=DONE):
+        self.result = result
+        self.status = status
+        self.finished_at = time.time()
+        self.done.set()
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "result": self.result,
+            "submissions": self.submissions,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at
+        }
+
+
+class EvaluationService:
+    """
+    Async evaluate-model-choice service: job queue, coalescing and a worker pool.
+
+    Must be started and used from a running event loop:
+
+        service = EvaluationService(workers=16)
+        await service.start()
+        job = service.submit({"model": "IsolationForest", "justification": "..."})
+        job = await service.wait(job["job_id"], timeout=5)
+        await service.stop()
+
+    `provider` is any prompt -> {"score", "feedback"} callable; by default the
+    provider selected by `mode` / AI_MODE.
+    """
+
+    def __init__(self, workers=8, mode=None, provider=None, cache=None, rate=None, burst=None,
+                 result_ttl=3600, max_queue=0):
+        self.workers = workers
+        self.mode = (mode or AI_MODE).lower()
+        self.provider = provider or partial(ask_ai, mode=self.mode)
+        self.cache = default_cache() if cache is None else cache
+        self.rate = rate
+        self.burst = burst
+        self.result_ttl = result_ttl
+        self.max_queue = max_queue
+
+        self.jobs = {}
+        self.upstream_calls = 0
+        self._by_key = {}
+        self._finished = []
+        self._queue = None
+        self._tasks = []
+        self._executor = None
+        self._bucket = None
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    async def start(self):
+        self._queue = asyncio.Queue(self.max_queue)
+        # A dedicated pool so `workers` blocking provider calls can really run at once
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ai-worker")
+        self._bucket = TokenBucket(self.rate, self.burst) if self.rate else None
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # -----------------------------
+    # Client API
+    # -----------------------------
+    def submit(self, payload):
+        """
+        Queues a {"model", "justification"} payload and returns its job dict.
+
+        Raises asyncio.QueueFull when max_queue jobs are already waiting.
+        """
+        self._prune()
+        key = cache_key(self.mode, payload.get("model"), payload.get("justification"), TEMPLATE_VERSION)
+
+        job = self._by_key.get(key)
+        if job is not None:
+            job.submissions += 1
+            return job.to_dict()
+
+        job = Job(key, {"model": payload.get("model"), "justification": payload.get("justification")})
+        cached = self.cache.get(key) if self.cache else None
+
+        if cached is not None:
+            job.finish(cached)
+            self._finished.append(job)
+        else:
+            self._queue.put_nowait(job)
+
+        self.jobs[job.job_id] = job
+        self._by_key[key] = job
+        return job.to_dict()
+
+    def get(self, job_id):
+        """
+        Returns the job dict for job_id, or None if unknown or expired.
+        """
+        job = self.jobs.get(job_id)
+        return job.to_dict() if job is not None else None
+
+    async def wait(self, job_id, timeout=None):
+        """
+        Waits up to `timeout` seconds for a job to finish and returns its job dict.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job.to_dict()
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "jobs": len(self.jobs),
+            "upstream_calls": self.upstream_calls,
+            "workers": self.workers
+        }
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                if self._bucket is not None:
+                    await self._bucket.acquire()
+
+                job.status = RUNNING
+                self.upstream_calls += 1
+                prompt = build_prompt(job.payload["model"], job.payload["justification"])
+
+                try:
+                    result = await loop.run_in_executor(self._executor, self.provider, prompt)
+                    status = DONE
+                except Exception:
+                    result, status = dict(UNAVAILABLE), FAILED
+
+                if result.get("score") is not None:
+                    if self.cache:
+                        self.cache.put(job.key, result)
+                elif self._by_key.get(job.key) is job:
+                    # Do not hand a failed/unavailable answer to later submissions
+                    del self._by_key[job.key]
+
+                job.finish(result, status)
+                self._finished.append(job)
+            finally:
+                self._queue.task_done()
+
+    def _prune(self):
+        # Finished jobs are appended in completion order, so expired ones are at the front
+        cutoff = time.time() - self.result_ttl
+        expired = 0
+        for job in self._finished:
+            if job.finished_at >= cutoff:
+                break
+            expired += 1
+            self.jobs.pop(job.job_id, None)
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+        if expired:
+            del self._finished[:expired]
@@ -0,0 +1,143 @@
+"""
+Load test for the evaluate-model-choice backend.
+
+Simulates a lab deadline: `--requests` submissions drawn from `--unique`
+distinct justifications arrive over `--ramp` seconds. By default the service
+runs in-process with the stub provider sleeping `--latency` seconds per call.
+With --url the same traffic is sent to a running backend over HTTP:
+
+    python -m backend.loadtest --requests 2000 --unique 300 --workers 16 --latency 0.5
+    python -m backend.loadtest --url http://127.0.0.1:8000 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from functools import partial
+from urllib.request import Request, urlopen
+
+from ai.ai_stub import ask_stub
+from backend.jobs import EvaluationService
+
+MODELS = ["IsolationForest", "LocalOutlierFactor", "OneClassSVM", "Autoencoder"]
+
+
+def scored_stub(prompt, latency=0.0):
+    # The stub answers score=None, which the service never reuses; give it a
+    # score so repeats are served like real provider answers
+    return {**ask_stub(prompt, latency=latency), "score": 0.5}
+
+
+def make_payloads(n_requests, n_unique, seed=0):
+    rng = random.Random(seed)
+    distinct = [
+        {"model": rng.choice(MODELS),
+         "justification": f"I chose this model because reason {i} suits unlabeled login data."}
+        for i in range(n_unique)
+    ]
+    return [rng.choice(distinct) for _ in range(n_requests)]
+
+
+def _percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]  # noqa: E731
+    return {"p50_ms": pick(0.50) * 1000, "p95_ms": pick(0.95) * 1000, "p99_ms": pick(0.99) * 1000}
+
+
+async def _arrivals(payloads, ramp, submit):
+    # Spread arrivals evenly over the ramp; each submit is timed on its own
+    gap = ramp / max(len(payloads), 1)
+    start = time.perf_counter()
+    tasks = []
+    for i, payload in enumerate(payloads):
+        delay = start + i * gap - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(submit(payload)))
+    return await asyncio.gather(*tasks)
+
+
+async def run_inprocess(payloads, workers, latency, ramp, rate=None):
+    service = EvaluationService(workers=workers, provider=partial(scored_stub, latency=latency),
+                                cache=False, rate=rate)
+    await service.start()
+
+    async def submit(payload):
+        t = time.perf_counter()
+        job = service.submit(payload)
+        submit_s = time.perf_counter() - t
+        await service.wait(job["job_id"])
+        return submit_s, time.perf_counter() - t
+
+    start = time.perf_counter()
+    timings = await _arrivals(payloads, ramp, submit)
+    elapsed = time.perf_counter() - start
+    stats = service.stats()
+    await service.stop()
+    return timings, elapsed, stats["upstream_calls"]
+
+
+def _http(method, url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    request = Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urlopen(request, timeout=60) as response:
+        return json.load(response)
+
+
+async def run_http(payloads, url, ramp, poll_interval=0.05):
+    base = url.rstrip("/")
+
+    async def submit(payload):
+        t = time.perf_counter()
+        job = await asyncio.to_thread(_http, "POST", f"{base}/evaluate-model-choice", payload)
+        submit_s = time.perf_counter() - t
+        while job["status"] not in ("done", "failed"):
+            await asyncio.sleep(poll_interval)
+            job = await asyncio.to_thread(_http, "GET", f"{base}/evaluate-model-choice/{job['job_id']}")
+        return submit_s, time.perf_counter() - t
+
+    start = time.perf_counter()
+    timings = await _arrivals(payloads, ramp, submit)
+    elapsed = time.perf_counter() - start
+    stats = await asyncio.to_thread(_http, "GET", f"{base}/evaluate-model-choice-stats")
+    return timings, elapsed, stats["upstream_calls"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the evaluate-model-choice backend.")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--unique", type=int, default=200, help="Distinct justifications among the requests.")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.5, help="Injected stub provider latency (seconds).")
+    parser.add_argument("--rate", type=float, default=None, help="Upstream requests per second limit.")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which requests arrive.")
+    parser.add_argument("--url", default=None, help="Test a running backend instead of an in-process one.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    payloads = make_payloads(args.requests, args.unique, args.seed)
+
+    if args.url:
+        timings, elapsed, upstream = asyncio.run(run_http(payloads, args.url, args.ramp))
+    else:
+        timings, elapsed, upstream = asyncio.run(
+            run_inprocess(payloads, args.workers, args.latency, args.ramp, args.rate)
+        )
+
+    report = {
+        "requests": len(payloads),
+        "unique_payloads": len({json.dumps(p, sort_keys=True) for p in payloads}),
+        "upstream_calls": upstream,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(payloads) / elapsed, 1),
+        "submit_latency": {k: round(v, 3) for k, v in _percentiles([s for s, _ in timings]).items()},
+        "result_latency": {k: round(v, 1) for k, v in _percentiles([r for _, r in timings]).items()}
+    }
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+FastAPI application for the AI feedback backend.
+
+    uvicorn backend.main:app --port 8000
+
+AI_WORKERS sets the number of concurrent provider calls and AI_RATE_LIMIT
+(requests per second, optional) throttles them.
+"""
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+from backend.endpoints.evaluate_model_choice import router
+from backend.jobs import EvaluationService
+
+
+def create_app(service=None):
+    service = service or EvaluationService(
+        workers=int(os.getenv("AI_WORKERS", "8")),
+        rate=float(os.getenv("AI_RATE_LIMIT", "0")) or None
+    )
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await service.start()
+        yield
+        await service.stop()
+
+    app = FastAPI(title="Cyber-ML AI feedback", lifespan=lifespan)
+    app.state.evaluation_service = service
+    app.include_router(router)
+    return app
+
+
+app = create_app()
@@ -0,0 +1,6 @@
+"""
+Shared tooling for the Cyber-ML Training Platform.
+
+Scenario generators, notebooks and graders import helpers from here so that
+data handling stays consistent across scenarios.
+"""
@@ -0,0 +1,226 @@
+"""
+Batch grading for a whole class.
+
+Walks student_submissions/<student>/<scenario_XX>/ for soc_output.json and
+ml_output.json, grades every submission with that scenario's SOC, ML and
+combined evaluators, writes one result file per submission under
+evaluation_results/ and upserts the scores into the leaderboard database
+(re-exporting leaderboard.json) in a single run.
+
+Evaluator modules and answer keys are loaded once per worker process, so
+grading hundreds of students costs a few interpreter start-ups instead of
+three per submission:
+
+    python -m cyberml.batch_grade --workers 8
+
+Students who were given their own dataset by cyberml.cohort are graded
+against cohorts/<student>/<scenario>/evaluation/answer_key.json and logs.
+Reference models (cyberml.models) are trained or refreshed before grading
+starts, so evaluators only ever load them.
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from cyberml.cohort import COHORTS_DIR, cohort_key_path
+from cyberml.leaderboard import LEADERBOARD_DB, LEADERBOARD_PATH, Leaderboard
+from cyberml.registry import REPO_ROOT, SCENARIOS_DIR, ScenarioGrader, discover_scenarios
+
+SUBMISSIONS_DIR = os.path.join(REPO_ROOT, "student_submissions")
+RESULTS_DIR = os.path.join(REPO_ROOT, "evaluation_results")
+
+
+# -----------------------------
+# Submission discovery
+# -----------------------------
+def _find_file(root, filename):
+    for dirpath, _, filenames in os.walk(root):
+        if filename in filenames:
+            return os.path.join(dirpath, filename)
+    return None
+
+
+def find_submissions(submissions_dir=SUBMISSIONS_DIR, scenarios=None):
+    """
+    Yields (student, scenario, soc_path, ml_path) for every submission folder.
+    """
+    for student in sorted(os.listdir(submissions_dir)):
+        student_dir = os.path.join(submissions_dir, student)
+        if not os.path.isdir(student_dir):
+            continue
+
+        for scenario in sorted(os.listdir(student_dir)):
+            scenario_dir = os.path.join(student_dir, scenario)
+            if not scenario.startswith("scenario_") or not os.path.isdir(scenario_dir):
+                continue
+            if scenarios is not None and scenario not in scenarios:
+                continue
+
+            yield (
+                student,
+                scenario,
+                _find_file(scenario_dir, "soc_output.json"),
+                _find_file(scenario_dir, "ml_output.json"),
+            )
+
+
+# -----------------------------
+# Grading
+# -----------------------------
+_GRADERS = {}
+
+
+def _init_worker(scenario_dirs):
+    # Runs once per worker process: import evaluators and parse answer keys
+    _GRADERS.clear()
+    for name, scenario_dir in scenario_dirs.items():
+        _GRADERS[name] = ScenarioGrader.from_dir(scenario_dir)
+
+
+def _read_output(path):
+    if not path:
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _student_grader(grader, key_path):
+    # A generated dataset's key, plus where its logs are for evaluators that read them
+    with open(key_path) as f:
+        key = json.load(f)
+    key["log_dir"] = os.path.join(os.path.dirname(os.path.dirname(key_path)), "logs")
+    return grader.with_key(key)
+
+
+def _failed_result(student, scenario_name, error):
+    # Scored zero, in the usual result layout, so one bad submission never stops the class
+    return {
+        "student": student,
+        "scenario": scenario_name,
+        "soc": {"soc_score": 0, "soc_feedback": []},
+        "ml": {"ml_score": 0, "ml_feedback": []},
+        "combined": {"combined_score": 0, "combined_feedback": []},
+        "total_score": 0,
+        "error": f"{type(error).__name__}: {error}"
+    }
+
+
+def grade_submission(task):
+    """
+    Grades one (student, scenario, soc_path, ml_path, key_path) task in the current process.
+
+    key_path is the student's own answer key, or None for the scenario's. A
+    submission that makes an evaluator fail scores zero and carries the
+    failure in an "error" field.
+    """
+    student, scenario_name, soc_path, ml_path, key_path = task
+    try:
+        grader = _GRADERS[scenario_name]
+        if key_path:
+            grader = _student_grader(grader, key_path)
+        result = grader.grade(_read_output(soc_path), _read_output(ml_path))
+    except Exception as e:
+        return _failed_result(student, scenario_name, e)
+    return {"student": student, **result}
+
+
+def prepare_reference_models(scenario_names, scenarios_dir=SCENARIOS_DIR):
+    """
+    Trains (or refreshes) the reference models of the given scenarios, skipping any that cannot be built.
+    """
+    try:
+        from cyberml.models import BASELINES, reference_model
+    except ImportError:
+        return []
+
+    prepared = []
+    for name in sorted(set(scenario_names) & set(BASELINES)):
+        try:
+            reference_model(name, scenarios_dir)
+        except (ImportError, OSError, ValueError):
+            # No scikit-learn or no training log: evaluators report no reference score
+            continue
+        prepared.append(name)
+    return prepared
+
+
+def grade_all(submissions_dir=SUBMISSIONS_DIR, scenarios_dir=SCENARIOS_DIR, workers=None, chunksize=32,
+              cohorts_dir=COHORTS_DIR):
+    """
+    Grades every submission and returns the results in submission order.
+    """
+    scenario_dirs = discover_scenarios(scenarios_dir)
+    tasks = [
+        (*submission, cohort_key_path(cohorts_dir, submission[0], submission[1]))
+        for submission in find_submissions(submissions_dir, scenario_dirs)
+    ]
+    prepare_reference_models({task[1] for task in tasks}, scenarios_dir)
+
+    if workers == 1 or len(tasks) <= chunksize:
+        _init_worker(scenario_dirs)
+        return [grade_submission(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(scenario_dirs,)) as pool:
+        return list(pool.map(grade_submission, tasks, chunksize=chunksize))
+
+
+# -----------------------------
+# Outputs
+# -----------------------------
+def _write_json(path, data):
+    # Write to a temp file first so readers never see a half-written file
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp, path)
+
+
+def write_results(results, results_dir=RESULTS_DIR):
+    """
+    Writes evaluation_results/<student>/<scenario>.json for every result.
+    """
+    for result in results:
+        student_dir = os.path.join(results_dir, result["student"])
+        os.makedirs(student_dir, exist_ok=True)
+        _write_json(os.path.join(student_dir, f"{result['scenario']}.json"), result)
+
+
+def update_leaderboard(results, path=LEADERBOARD_PATH, db_path=LEADERBOARD_DB):
+    """
+    Upserts results into the leaderboard database and re-exports leaderboard.json.
+    """
+    with Leaderboard(db_path, seed_json=path) as board:
+        board.record(results)
+        return board.export_json(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade every student submission in one run.")
+    parser.add_argument("--submissions", default=SUBMISSIONS_DIR)
+    parser.add_argument("--scenarios", default=SCENARIOS_DIR)
+    parser.add_argument("--results", default=RESULTS_DIR)
+    parser.add_argument("--leaderboard", default=LEADERBOARD_PATH)
+    parser.add_argument("--db", default=LEADERBOARD_DB)
+    parser.add_argument("--cohorts", default=COHORTS_DIR,
+                        help="Per-student datasets from cyberml.cohort; students without one use the scenario key.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: one per CPU; 1 grades in-process).")
+    args = parser.parse_args(argv)
+
+    results = grade_all(args.submissions, args.scenarios, workers=args.workers, cohorts_dir=args.cohorts)
+    write_results(results, args.results)
+    update_leaderboard(results, args.leaderboard, args.db)
+
+    print(f"Graded {len(results)} submissions from {len({r['student'] for r in results})} students.")
+    for result in results:
+        if "error" in result:
+            print(f"  {result['student']}/{result['scenario']} scored 0: {result['error']}")
+
+
+if __name__ == "__main__":
+    main()
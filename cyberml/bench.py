@@ -0,0 +1,455 @@
+"""
+Benchmark suite for log generation, feature engineering and grading.
+
+Every case runs in a fresh process. Its setup (input frames, synthetic
+submissions, a scratch directory, evaluator warm-up) is not measured; the
+measured call is then repeated --repeat times and recorded as
+
+    wall_s       best wall time over the repeats
+    peak_mb      peak resident memory above the pre-call level
+    rows_per_s   rows handled per second (log rows, submissions or leaderboard rows)
+
+Each run is appended to benchmarks/history.json with the git commit and
+compared with benchmarks/baseline.json. A case that is slower, or peaks
+higher, than its baseline by more than the tolerance is flagged:
+
+    python -m cyberml.bench                        # quick profile, a few minutes
+    python -m cyberml.bench --profile full         # 1M+ row generators, 10M-row feature table
+    python -m cyberml.bench --only feature_table --repeat 5
+    python -m cyberml.bench --save-baseline        # accept this run as the baseline
+    python -m cyberml.bench --fail-on-regression   # exit 1 on a regression (for CI)
+
+Peak memory uses the Linux per-process high-water mark, which a process can
+reset before each call; elsewhere it falls back to the lifetime peak.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from cyberml.registry import COMPONENTS, REPO_ROOT, SCENARIOS_DIR, ScenarioGrader, _load_module, discover_scenarios
+from cyberml.tracing import peak_rss_kb, reset_peak_rss, rss_kb
+
+BENCH_DIR = os.path.join(REPO_ROOT, "benchmarks")
+HISTORY_PATH = os.path.join(BENCH_DIR, "history.json")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+PROFILES = ["quick", "full"]
+
+# Relative slack before a case counts as a regression, plus absolute floors
+# so millisecond cases and allocator noise are not flagged
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.25
+MIN_TIME_DELTA_S = 0.05
+MIN_MEMORY_DELTA_MB = 16.0
+
+MODELS = ["IsolationForest", "LocalOutlierFactor", "OneClassSVM", "Autoencoder"]
+FEATURES = ["hour", "source_ip", "region", "api_count_total", "unique_resources", "region_entropy"]
+
+
+# -----------------------------
+# Synthetic inputs
+# -----------------------------
+def synthetic_submissions(key, n, seed=0):
+    """
+    Returns n (soc_output, ml_output) pairs for an answer key; about half find the attacker.
+    """
+    rng = random.Random(seed)
+    attacker_ip = key.get("attacker_ip") or key.get("malicious_ip", "")
+    user = key.get("compromised_user", "")
+    mitre = list(key.get("expected_mitre", []))
+
+    pairs = []
+    for i in range(n):
+        found = rng.random() < 0.5
+        ip = attacker_ip if found else f"185.199.110.{rng.randint(1, 254)}"
+        iocs = [ip, user]
+        if found and "malicious_process" in key:
+            iocs.append(key["malicious_process"])
+
+        # Every student writes a slightly different rule, as in a real class
+        rule = f'source_ip == "{ip}" and user == "{user}"'
+        soc = {
+            "ioc_list": iocs,
+            "mitre_mapping": rng.sample(mitre, rng.randint(0, len(mitre))),
+            "triage_summary": f"Submission {i}: {user} was used from {ip}, followed by discovery and exfiltration.",
+            "detection_rule": rule,
+            "detection_rules": rule
+        }
+        ml = {
+            "anomaly_score": round(rng.uniform(-0.5, 0.2), 4),
+            "model_used": rng.choice(MODELS),
+            "features": FEATURES[:rng.randint(1, len(FEATURES))],
+            "explanation": f"The model isolates {user}'s activity from {ip} because it deviates from the baseline."
+        }
+        pairs.append((soc, ml))
+    return pairs
+
+
+def synthetic_results(n, seed=0):
+    """
+    Returns n batch_grade-style results for leaderboard benchmarks.
+    """
+    rng = random.Random(seed)
+    results = []
+    for i in range(n):
+        scores = {c: rng.randint(0, 100) for c in COMPONENTS}
+        results.append({
+            "student": f"student_{i:06d}",
+            "scenario": f"scenario_0{rng.randint(1, 3)}",
+            "soc": {"soc_score": scores["soc"]},
+            "ml": {"ml_score": scores["ml"]},
+            "combined": {"combined_score": scores["combined"]},
+            "total_score": sum(scores.values())
+        })
+    return results
+
+
+# -----------------------------
+# Cases
+# -----------------------------
+# A case builder does the unmeasured setup and returns (rows, run).
+def _generator(scenario):
+    return _load_module(os.path.join(SCENARIOS_DIR, scenario, "generator", "generate_data.py"))
+
+
+def _quiet(fn, *args):
+    # Generators print every file they write
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args)
+
+
+def generate_case(scratch, scenario, args):
+    """
+    A generator's main() writing one seeded dataset into the scratch directory.
+    """
+    module = _generator(scenario)
+    argv = [*args, "--seed", "0", "--out-dir", scratch]
+    parsed = module.parse_args(argv)
+
+    if scenario == "scenario_02":
+        rows = (50 + 100 + 80) * parsed.scale
+    else:
+        rows = parsed.rows + parsed.rows * 40 // 60 + parsed.rows * 50 // 60
+    return rows, lambda: _quiet(module.main, argv)
+
+
+def feature_table_case(scratch, n_rows, n_users=500):
+    """
+    scenario_03's generate_api_feature_table over an n_rows API log.
+    """
+    module = _generator("scenario_03")
+    chunks = module.stream_api_logs(
+        "cloud_eng_1", "185.199.110.7", "eu-central-1", datetime(2025, 1, 1),
+        n_rows=n_rows, users=module.build_user_pool(n_users), interval_s=1,
+        rng=np.random.default_rng(0), chunk_size=1_000_000
+    )
+    # Built chunk by chunk with compact string columns; the object-dtype
+    # frame generate_api_logs returns does not fit in memory at 10M rows
+    api_df = pd.concat(
+        [chunk.astype({c: "str" for c in chunk.columns if chunk[c].dtype == object}) for chunk in chunks],
+        ignore_index=True
+    )
+    return len(api_df), lambda: module.generate_api_feature_table(api_df)
+
+
+def evaluate_case(scratch, scenario, component, n_submissions):
+    """
+    One scenario's score_<component> over a batch of synthetic submissions.
+    """
+    grader = ScenarioGrader.from_dir(discover_scenarios()[scenario])
+    pairs = synthetic_submissions(grader.key, n_submissions)
+
+    if component == "soc":
+        def run():
+            return [grader.score_soc(soc) for soc, _ in pairs]
+    elif component == "ml":
+        def run():
+            return [grader.score_ml(ml) for _, ml in pairs]
+    else:
+        def run():
+            return [grader.score_combined(soc, ml) for soc, ml in pairs]
+
+    # Logs, models and indexes load on the first call, once per grading worker
+    grader.grade(*pairs[0])
+    return len(pairs), run
+
+
+def leaderboard_case(scratch, operation, n_results):
+    """
+    Leaderboard writes: one batch transaction, one transaction per result, or the JSON export.
+    """
+    from cyberml.leaderboard import Leaderboard
+
+    results = synthetic_results(n_results)
+    board = Leaderboard(os.path.join(scratch, "leaderboard.db"))
+
+    if operation == "record":
+        def run():
+            return board.record(results)
+    elif operation == "record_score":
+        def run():
+            for r in results:
+                board.record_score(r["student"], r["scenario"], r["soc"]["soc_score"],
+                                   r["ml"]["ml_score"], r["combined"]["combined_score"])
+    else:
+        board.record(results)
+
+        def run():
+            return board.export_json(os.path.join(scratch, "leaderboard.json"))
+    return len(results), run
+
+
+def cases(profile="quick", scenarios_dir=SCENARIOS_DIR):
+    """
+    Returns [(name, builder, params)] for a profile.
+    """
+    full = profile == "full"
+    found = []
+
+    for scale in [1, 100, 10_000] if full else [1, 100]:
+        found.append((f"generate.scenario_02.scale_{scale}", generate_case,
+                      {"scenario": "scenario_02", "args": ["--scale", str(scale)]}))
+    for rows in [60, 10_000, 1_000_000] if full else [60, 10_000]:
+        found.append((f"generate.scenario_03.rows_{rows}", generate_case,
+                      {"scenario": "scenario_03", "args": ["--rows", str(rows)]}))
+    if full:
+        found.append(("generate.scenario_03.rows_1000000.stream", generate_case,
+                      {"scenario": "scenario_03", "args": ["--rows", "1000000", "--stream"]}))
+
+    for n_rows in [1_000, 100_000, 10_000_000] if full else [1_000, 100_000]:
+        found.append((f"feature_table.rows_{n_rows}", feature_table_case, {"n_rows": n_rows}))
+
+    n_submissions = 2_000 if full else 200
+    for scenario in discover_scenarios(scenarios_dir):
+        for component in COMPONENTS:
+            found.append((f"evaluate.{scenario}.{component}", evaluate_case,
+                          {"scenario": scenario, "component": component, "n_submissions": n_submissions}))
+
+    n_results = 10_000 if full else 1_000
+    for operation in ["record", "record_score", "export"]:
+        found.append((f"leaderboard.{operation}", leaderboard_case,
+                      {"operation": operation, "n_results": n_results}))
+    return found
+
+
+# -----------------------------
+# Running
+# -----------------------------
+def measure(builder, params, repeat=3):
+    """
+    Runs one case in the current process and returns its measurements.
+    """
+    with tempfile.TemporaryDirectory(prefix="cyberml-bench-") as scratch:
+        rows, run = builder(scratch, **params)
+
+        walls, peaks = [], []
+        for _ in range(repeat):
+            gc.collect()
+            reset_peak_rss()
+            before = rss_kb()
+            start = time.perf_counter()
+            run()
+            walls.append(time.perf_counter() - start)
+            peaks.append(max(peak_rss_kb() - before, 0) / 1024)
+
+    wall = min(walls)
+    return {
+        "rows": rows,
+        "wall_s": wall,
+        "wall_s_all": walls,
+        "peak_mb": max(peaks),
+        "rows_per_s": rows / wall if wall > 0 else None
+    }
+
+
+def _measure_task(task):
+    name, builder, params, repeat = task
+    return {"name": name, "params": params, **measure(builder, params, repeat)}
+
+
+def run_cases(selected, repeat=3, in_process=False):
+    """
+    Measures each case, in a fresh process unless in_process is set.
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for name, builder, params in selected:
+        task = (name, builder, params, repeat)
+        if in_process:
+            result = _measure_task(task)
+        else:
+            # A new interpreter per case: no warm caches or retained heap from earlier cases
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(_measure_task, task).result()
+        print(_format_result(result), flush=True)
+        results.append(result)
+    return results
+
+
+# -----------------------------
+# History and baseline
+# -----------------------------
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    # Write to a temp file first so readers never see a half-written file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp, path)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__
+    }
+
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """
+    Annotates each result with its baseline and a list of regressions ("time", "memory").
+    """
+    known = baseline.get("cases", {})
+    for result in results:
+        base = known.get(result["name"])
+        result["baseline"] = base
+        result["regressions"] = []
+        if not base:
+            continue
+
+        if (result["wall_s"] > base["wall_s"] * (1 + time_tolerance)
+                and result["wall_s"] - base["wall_s"] > MIN_TIME_DELTA_S):
+            result["regressions"].append("time")
+        if (result["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance)
+                and result["peak_mb"] - base["peak_mb"] > MIN_MEMORY_DELTA_MB):
+            result["regressions"].append("memory")
+    return results
+
+
+def record_run(results, profile, history_path=HISTORY_PATH):
+    """
+    Appends a run to the JSON history and returns it.
+    """
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "profile": profile,
+        "environment": environment(),
+        "results": results
+    }
+    history = _read_json(history_path, [])
+    history.append(run)
+    _write_json(history_path, history)
+    return run
+
+
+def save_baseline(run, baseline_path=BASELINE_PATH):
+    """
+    Stores the run's cases as the baseline, keeping baseline cases it did not measure.
+    """
+    baseline = _read_json(baseline_path, {"cases": {}})
+    for result in run["results"]:
+        baseline["cases"][result["name"]] = {
+            "wall_s": result["wall_s"],
+            "peak_mb": result["peak_mb"],
+            "rows_per_s": result["rows_per_s"],
+            "commit": run["commit"],
+            "timestamp": run["timestamp"]
+        }
+    _write_json(baseline_path, baseline)
+    return baseline
+
+
+def _format_result(result):
+    rate = f"{result['rows_per_s']:>14,.0f}" if result["rows_per_s"] else f"{'-':>14}"
+    return (f"{result['name']:<45} {result['rows']:>12,} rows {result['wall_s']:>9.3f} s "
+            f"{rate} rows/s {result['peak_mb']:>9.1f} MB")
+
+
+def _format_change(result):
+    base = result.get("baseline")
+    if not base:
+        return "no baseline"
+    time_change = (result["wall_s"] / base["wall_s"] - 1) * 100 if base["wall_s"] else 0.0
+    flags = f"  REGRESSION ({', '.join(result['regressions'])})" if result["regressions"] else ""
+    return f"time {time_change:+.0f}%, peak {result['peak_mb'] - base['peak_mb']:+.1f} MB{flags}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark generation, feature engineering and grading.")
+    parser.add_argument("--profile", choices=PROFILES, default="quick")
+    parser.add_argument("--only", action="append", default=None,
+                        help="Run cases whose name contains this text (repeatable).")
+    parser.add_argument("--list", action="store_true", help="List the profile's cases and exit.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run cases in this process (for profilers; memory figures are less reliable).")
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline.")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    selected = cases(args.profile)
+    if args.only:
+        selected = [case for case in selected if any(text in case[0] for text in args.only)]
+    if args.list:
+        for name, _, _ in selected:
+            print(name)
+        return
+
+    results = run_cases(selected, repeat=args.repeat, in_process=args.in_process)
+    compare(results, _read_json(args.baseline, {}), args.time_tolerance, args.memory_tolerance)
+    run = record_run(results, args.profile, args.history)
+
+    print()
+    for result in results:
+        print(f"{result['name']:<45} {_format_change(result)}")
+    if args.save_baseline:
+        save_baseline(run, args.baseline)
+        print(f"\nBaseline updated: {args.baseline}")
+
+    regressions = [r["name"] for r in results if r["regressions"]]
+    print(f"\n{len(results)} cases, {len(regressions)} regressions. History: {args.history}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Cross-log correlation for scenario_02's auth, process and network logs.
+
+Every process and outbound flow is linked to the login that most plausibly
+started it: the latest earlier login, within `window`, by the same user onto
+the same host (processes) or from the same source IP (flows). Each link is an
+as-of lookup against a time-sorted per-key index, so correlating n events
+costs O(n log n) instead of one filter per login:
+
+    from cyberml.correlate import correlate, load_scenario_02
+    auth, process, network = load_scenario_02("scenarios/scenario_02/logs")
+    timeline = correlate(auth, process, network, window="30min")
+    summarize_logins(timeline).sort_values("bytes_sent", ascending=False).head()
+
+or from the command line:
+
+    python -m cyberml.correlate scenarios/scenario_02/logs --window 30min --out timeline.parquet
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from cyberml.logio import FORMATS, TIMESTAMP_COLUMN, load_log, log_timestamps, write_log
+from cyberml.timestamps import frame_epoch_ns, parse_epoch_ns
+
+DEFAULT_WINDOW = "30min"
+
+TIMELINE_COLUMNS = [
+    "timestamp",
+    "source",
+    "login_id",
+    "username",
+    "host",
+    "src_ip",
+    "dst_ip",
+    "process",
+    "bytes_sent",
+    "result",
+]
+
+
+def _category_codes(values, categories=None):
+    # Codes against `categories` (default: the column's own), -1 for unseen or missing.
+    # Only the small category sets are compared, never the full string column.
+    values = values.astype("category")
+    if categories is None:
+        return values.cat.codes.to_numpy(dtype=np.int64), values.cat.categories
+    mapping = np.append(categories.get_indexer(values.cat.categories), -1)
+    return mapping[values.cat.codes.to_numpy(dtype=np.int64)], categories
+
+
+def _combine_codes(per_column, sizes):
+    # Mixed-radix packing of one code per column into a single int64 key
+    codes = np.zeros(len(per_column[0]), dtype=np.int64)
+    missing = np.zeros(len(codes), dtype=bool)
+    for column_codes, size in zip(per_column, sizes):
+        codes = codes * size + np.maximum(column_codes, 0)
+        missing |= column_codes < 0
+    return np.where(missing, -1, codes)
+
+
+class EventIndex:
+    """
+    Time-sorted index of one log keyed by one or more columns (e.g. user + host).
+
+    Rows are sorted by (key, timestamp) once; lookups are binary searches on
+    that order, vectorized over any number of query events.
+    """
+
+    def __init__(self, df, key, time_col=TIMESTAMP_COLUMN):
+        self.key = [key] if isinstance(key, str) else list(key)
+
+        per_column, self.categories = [], []
+        for column in self.key:
+            codes, categories = _category_codes(df[column])
+            per_column.append(codes)
+            self.categories.append(categories)
+        codes = _combine_codes(per_column, [len(c) for c in self.categories])
+        times = frame_epoch_ns(df, time_col)
+
+        self.order = np.lexsort((times, codes))
+        self.codes = codes[self.order]
+        self.times = times[self.order]
+
+    def __len__(self):
+        return len(self.order)
+
+    def encode(self, df, columns=None):
+        """
+        Returns the key code of every row of df (-1 for keys not in the index).
+        """
+        columns = columns or self.key
+        per_column = [_category_codes(df[c], categories)[0] for c, categories in zip(columns, self.categories)]
+        return _combine_codes(per_column, [len(c) for c in self.categories])
+
+    def asof(self, codes, times, tolerance=None, direction="backward"):
+        """
+        For each (code, time) query, returns the original row position of the
+        latest indexed event with the same key at or before `time` ("backward")
+        or the earliest at or after it ("forward"), or -1 if there is none
+        within `tolerance` nanoseconds.
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        times = np.asarray(times, dtype=np.int64)
+        if len(self) == 0 or len(codes) == 0:
+            return np.full(len(codes), -1, dtype=np.int64)
+
+        # Rank all timestamps together so (key, time) packs into one int64 sort key
+        ranks = np.unique(np.concatenate([self.times, times]), return_inverse=True)[1]
+        stride = np.int64(ranks.max() + 1)
+        indexed = self.codes * stride + ranks[:len(self)]
+        queried = np.where(codes >= 0, codes, 0) * stride + ranks[len(self):]
+
+        if direction == "backward":
+            pos = np.searchsorted(indexed, queried, side="right") - 1
+        elif direction == "forward":
+            pos = np.searchsorted(indexed, queried, side="left")
+        else:
+            raise ValueError(f"Unknown direction: {direction}")
+
+        inside = (pos >= 0) & (pos < len(self))
+        pos = np.clip(pos, 0, len(self) - 1)
+        found = inside & (codes >= 0) & (self.codes[pos] == codes)
+
+        if tolerance is not None:
+            found &= np.abs(times - self.times[pos]) <= tolerance
+
+        return np.where(found, self.order[pos], -1)
+
+    def between(self, key, start, end):
+        """
+        Returns original row positions for one key with start <= time < end.
+        """
+        key = pd.DataFrame([key if len(self.key) > 1 else (key,)], columns=self.key, dtype=str)
+        code = self.encode(key)[0]
+        if code < 0:
+            return np.empty(0, dtype=np.int64)
+
+        lo, hi = np.searchsorted(self.codes, [code, code + 1])
+        t0, t1 = parse_epoch_ns([start, end])
+        a, b = lo + np.searchsorted(self.times[lo:hi], [t0, t1])
+        return self.order[a:b]
+
+
+# -----------------------------
+# Correlation
+# -----------------------------
+def link_events(logins, events, login_key, event_key, window=DEFAULT_WINDOW):
+    """
+    Returns, for every row of events, the row position in logins of the
+    latest earlier login with a matching key within `window` (-1 if none).
+    """
+    index = EventIndex(logins, login_key)
+    tolerance = pd.Timedelta(window).value
+    codes = index.encode(events, [event_key] if isinstance(event_key, str) else list(event_key))
+    return index.asof(codes, frame_epoch_ns(events), tolerance, "backward")
+
+
+def _categorical(values, n=None):
+    if values is None:
+        return pd.Categorical.from_codes(np.full(n, -1, dtype=np.int64), categories=pd.Index([], dtype=str))
+    if not isinstance(values, pd.Categorical):
+        values = values.astype("category").array
+    if values.categories.dtype != str:
+        # union_categoricals needs every part's categories to share one dtype
+        values = values.rename_categories(values.categories.astype(str))
+    return values
+
+
+def _take_linked(values, link):
+    # values[link] where link >= 0, missing elsewhere, without leaving categorical codes
+    values = _categorical(values)
+    codes = np.where(link >= 0, values.codes[np.clip(link, 0, None)], -1)
+    return pd.Categorical.from_codes(codes, dtype=values.dtype)
+
+
+def _typed(df):
+    # Parse timestamps once up front; later lookups reuse the typed column
+    df = df.reset_index(drop=True)
+    return df.assign(**{TIMESTAMP_COLUMN: log_timestamps(df)})
+
+
+def correlate(auth, process, network, window=DEFAULT_WINDOW):
+    """
+    Returns a unified, time-ordered timeline of auth, process and network events.
+
+    Each row carries `login_id` (the auth row position of the login it
+    belongs to; logins carry their own position, unlinked events -1) and the
+    user, host and source IP of that login, so a login's full activity is a
+    single `timeline[timeline.login_id == i]`. String columns are categorical.
+    """
+    auth, process, network = _typed(auth), _typed(process), _typed(network)
+    n_auth, n_proc, n_net = len(auth), len(process), len(network)
+
+    # Failed logins do not start a session
+    logins = auth[auth["result"].astype(str) == "success"] if "result" in auth.columns else auth
+    login_rows = logins.index.to_numpy()
+
+    proc_link = link_events(logins, process, ["username", "destination_host"], ["username", "host"], window)
+    flow_link = link_events(logins, network, "source_ip", "src_ip", window)
+    proc_login = np.where(proc_link >= 0, login_rows[np.clip(proc_link, 0, None)], -1)
+    flow_login = np.where(flow_link >= 0, login_rows[np.clip(flow_link, 0, None)], -1)
+
+    # (auth, process, network) parts of every string column; None where a log has no such field
+    strings = {
+        "username": (auth["username"], process["username"], _take_linked(auth["username"], flow_login)),
+        "host": (auth["destination_host"], process["host"], _take_linked(auth["destination_host"], flow_login)),
+        "src_ip": (auth["source_ip"], _take_linked(auth["source_ip"], proc_login), network["src_ip"]),
+        "dst_ip": (None, None, network["dst_ip"]),
+        "process": (None, process["process"], None),
+        "result": (auth["result"] if "result" in auth.columns else None, None, None),
+    }
+    sizes = (n_auth, n_proc, n_net)
+
+    stamps = pd.concat([auth[TIMESTAMP_COLUMN], process[TIMESTAMP_COLUMN], network[TIMESTAMP_COLUMN]],
+                       ignore_index=True)
+    order = np.argsort(parse_epoch_ns(stamps), kind="stable")
+
+    columns = {
+        "timestamp": stamps.take(order).reset_index(drop=True),
+        "source": pd.Categorical.from_codes(
+            np.repeat(np.arange(3, dtype=np.int8), sizes)[order], categories=["auth", "process", "network"]
+        ),
+        "login_id": np.concatenate([np.arange(n_auth, dtype=np.int64), proc_login, flow_login])[order],
+        "bytes_sent": np.concatenate([
+            np.full(n_auth + n_proc, np.nan), network["bytes_sent"].to_numpy(dtype=float)
+        ])[order],
+    }
+    for name, parts in strings.items():
+        combined = union_categoricals([_categorical(part, n) for part, n in zip(parts, sizes)])
+        columns[name] = combined.take(order)
+
+    return pd.DataFrame(columns)[TIMELINE_COLUMNS]
+
+
+def summarize_logins(timeline):
+    """
+    Returns one row per login with the activity linked to it.
+    """
+    logins = timeline[timeline["source"] == "auth"].set_index("login_id")
+    linked = timeline[(timeline["source"] != "auth") & (timeline["login_id"] >= 0)]
+    procs = linked[linked["source"] == "process"]
+    flows = linked[linked["source"] == "network"].groupby("login_id")
+
+    summary = logins[["timestamp", "username", "host", "src_ip", "result"]].copy()
+    summary["process_count"] = procs.groupby("login_id").size()
+    summary["flow_count"] = flows.size()
+    summary["bytes_sent"] = flows["bytes_sent"].sum()
+    summary["last_activity"] = linked.groupby("login_id")["timestamp"].max()
+
+    summary[["process_count", "flow_count"]] = summary[["process_count", "flow_count"]].fillna(0).astype(np.int64)
+    summary["bytes_sent"] = summary["bytes_sent"].fillna(0)
+
+    # Distinct process names per login: sort the (login, process) pairs once and split
+    pairs = pd.DataFrame({
+        "login_id": procs["login_id"].to_numpy(),
+        "process": procs["process"].astype(str).to_numpy(dtype=object)
+    }).drop_duplicates().sort_values(["login_id", "process"])
+    ids, starts = np.unique(pairs["login_id"].to_numpy(), return_index=True)
+    names = dict(zip(ids, (list(p) for p in np.split(pairs["process"].to_numpy(), starts[1:]))))
+    summary["processes"] = [names.get(i, []) for i in summary.index]
+
+    return summary
+
+
+def load_scenario_02(log_dir, formats=FORMATS):
+    """
+    Loads scenario_02's auth, process and network logs from a logs folder or URL prefix.
+    """
+    return tuple(load_log(log_dir, name, formats) for name in ("auth", "process", "network"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Correlate scenario_02 auth, process and network logs.")
+    parser.add_argument("log_dir", help="Folder (or URL prefix) holding auth/process/network logs.")
+    parser.add_argument("--window", default=DEFAULT_WINDOW,
+                        help="How long after a login its processes and flows are attributed to it.")
+    parser.add_argument("--out", default=None, help="Write the unified timeline (csv/parquet/feather).")
+    parser.add_argument("--top", type=int, default=5, help="Logins to print, by bytes sent.")
+    args = parser.parse_args(argv)
+
+    timeline = correlate(*load_scenario_02(args.log_dir), window=args.window)
+    if args.out:
+        write_log(timeline, args.out)
+
+    summary = summarize_logins(timeline)
+    linked = int((timeline["login_id"][timeline["source"] != "auth"] >= 0).sum())
+    print(f"{len(timeline)} events, {linked} linked to {int((summary['process_count'] + summary['flow_count'] > 0).sum())} logins")
+    top = summary.sort_values(["bytes_sent", "process_count"], ascending=False).head(args.top)
+    print(top[["timestamp", "username", "host", "src_ip", "process_count", "flow_count", "bytes_sent"]].to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+IP enrichment: network zone and ASN-style labels for every log row.
+
+Addresses are parsed to uint32 once (per distinct value) and looked up in a
+RangeTable, a sorted array of non-overlapping address intervals built from
+CIDR blocks, with one vectorized searchsorted per column. No ipaddress
+objects are created per row, so millions of addresses classify in well
+under a second:
+
+    from cyberml.enrich import enrich
+    net = enrich(load_log(log_dir, "network"))
+    net[net["dst_ip_zone"] == "external"]
+
+LAB_RANGES describes the address plan the scenario generators use: corp
+workstations and servers in 10.0.0.0/8, and the attacker infrastructure
+in 185.199.110.0/24. A custom table can be loaded with
+RangeTable.from_csv() (columns cidr, zone, network, asn). From the command
+line:
+
+    python -m cyberml.enrich scenarios/scenario_02/logs/network.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from cyberml.ipaddr import ipv4_column, parse_cidr
+from cyberml.logio import read_log, write_log
+
+LABELS = ("zone", "network", "asn")
+
+# (cidr, zone, network, asn); where blocks overlap the most specific one wins
+LAB_RANGES = [
+    ("10.0.0.0/8", "internal", "corp", "AS64512"),
+    ("10.0.1.0/24", "internal", "corp-workstations", "AS64512"),
+    ("10.0.2.0/24", "internal", "corp-servers", "AS64512"),
+    ("172.16.0.0/12", "internal", "private", "-"),
+    ("192.168.0.0/16", "internal", "private", "-"),
+    ("127.0.0.0/8", "loopback", "loopback", "-"),
+    ("185.199.110.0/24", "external", "lab-attacker", "AS64513"),
+]
+
+# Labels for valid addresses outside every block, and for unparseable values
+DEFAULT_LABELS = ("external", "internet", "unknown")
+INVALID_LABELS = ("invalid", "invalid", "invalid")
+
+# Columns enrich() classifies when present
+IP_COLUMNS = ("source_ip", "src_ip", "dst_ip")
+
+
+class RangeTable:
+    """
+    Sorted, non-overlapping address intervals with a label tuple each.
+    """
+
+    def __init__(self, ranges=LAB_RANGES, default=DEFAULT_LABELS, invalid=INVALID_LABELS):
+        ranges = [(parse_cidr(cidr), tuple(labels)) for cidr, *labels in ranges]
+        for _, labels in ranges:
+            if len(labels) != len(LABELS):
+                raise ValueError(f"Each range needs {len(LABELS)} labels ({', '.join(LABELS)}): {labels}")
+
+        # Distinct label tuples; the default and invalid ones take the last two slots
+        self.labels = list(dict.fromkeys(labels for _, labels in ranges))
+        self.labels += [tuple(default), tuple(invalid)]
+        self.default_code = len(self.labels) - 2
+        self.invalid_code = len(self.labels) - 1
+        label_code = {labels: i for i, labels in enumerate(self.labels)}
+
+        # Cut the address space at every block boundary, then paint the pieces
+        # from the widest block to the narrowest so the most specific one wins
+        bounds = sorted({b for (first, last), _ in ranges for b in (first, last + 1)})
+        self.starts = np.asarray(bounds, dtype=np.int64)
+        codes = np.full(max(len(bounds) - 1, 0), self.default_code, dtype=np.int64)
+        for (first, last), labels in sorted(ranges, key=lambda r: r[0][0] - r[0][1]):
+            lo, hi = np.searchsorted(self.starts, [first, last + 1])
+            codes[lo:hi] = label_code[labels]
+        self.codes = codes
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        table = pd.read_csv(path, dtype=str)
+        return cls(table[["cidr", *LABELS]].itertuples(index=False, name=None), **kwargs)
+
+    def lookup(self, ints, valid=None):
+        """
+        Returns the label code of each uint32 address (see .labels).
+        """
+        ints = np.asarray(ints, dtype=np.int64)
+        position = np.searchsorted(self.starts, ints, side="right") - 1
+        inside = (position >= 0) & (position < len(self.codes))
+
+        codes = np.full(len(ints), self.default_code, dtype=np.int64)
+        codes[inside] = self.codes[position[inside]]
+        if valid is not None:
+            codes[~np.asarray(valid, dtype=bool)] = self.invalid_code
+        return codes
+
+    def classify(self, values):
+        """
+        Returns a DataFrame of categorical zone / network / asn labels for IP strings.
+        """
+        values = pd.Series(values)
+        codes = self.lookup(*ipv4_column(values))
+
+        columns = {}
+        for i, label in enumerate(LABELS):
+            names = [labels[i] for labels in self.labels]
+            categories = list(dict.fromkeys(names))
+            remap = np.asarray([categories.index(n) for n in names], dtype=np.int64)
+            columns[label] = pd.Categorical.from_codes(remap[codes], categories)
+        return pd.DataFrame(columns, index=values.index)
+
+
+_lab_table = None
+
+
+def lab_table():
+    global _lab_table
+    if _lab_table is None:
+        _lab_table = RangeTable()
+    return _lab_table
+
+
+def enrich(df, columns=None, table=None):
+    """
+    Returns df with <column>_zone, <column>_network and <column>_asn added for each IP column.
+    """
+    table = table or lab_table()
+    columns = [c for c in (columns or IP_COLUMNS) if c in df.columns]
+
+    added = {}
+    for column in columns:
+        labels = table.classify(df[column])
+        for label in LABELS:
+            added[f"{column}_{label}"] = labels[label]
+    return df.assign(**added)
+
+
+def is_internal(values, table=None):
+    """
+    Boolean mask of the addresses in the table's internal zone.
+    """
+    return (table or lab_table()).classify(values)["zone"].to_numpy() == "internal"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Label the IP columns of a log with zone / network / ASN.")
+    parser.add_argument("log", help="Log file (csv/parquet/feather).")
+    parser.add_argument("--ranges", default=None, help="CSV range table (cidr,zone,network,asn).")
+    parser.add_argument("--out", default=None, help="Write the enriched log here.")
+    args = parser.parse_args(argv)
+
+    table = RangeTable.from_csv(args.ranges) if args.ranges else None
+    df = enrich(read_log(args.log), table=table)
+
+    if args.out:
+        write_log(df, args.out)
+        print(f"{len(df)} rows written to {args.out}")
+        return
+
+    for column in IP_COLUMNS:
+        if column in df.columns:
+            counts = df.groupby([f"{column}_zone", f"{column}_network"], observed=True).size()
+            print(f"{column}:\n{counts.to_string()}\n")
+
+
+if __name__ == "__main__":
+    main()
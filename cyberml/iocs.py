@@ -0,0 +1,173 @@
+"""
+IOC matching for the evaluators.
+
+Graders check answer-key indicators two ways: exact membership in a
+student's `ioc_list`, and substring occurrence in free text such as
+`triage_summary` or `detection_rule`. IOCIndex does both without a loop
+over the key per check: exact lookups go through a set, and free text is
+scanned once with an Aho-Corasick automaton that reports every indicator
+occurring anywhere in it:
+
+    index = ioc_index(["185.199.110.141", "sensitive-data", "external-exfil-bucket"])
+    index.exact(student["ioc_list"])           # {"185.199.110.141", ...}
+    index.scan(student["detection_rule"])      # indicators found in the text
+
+Both return the indicators as written in the answer key, so evaluators keep
+testing `key["attacker_ip"] in hits`. Matching is case-sensitive substring
+matching, like the `in` checks it replaces; casefold=True relaxes case.
+"""
+from collections import deque
+from functools import lru_cache
+
+
+def _normalize(value, casefold):
+    value = str(value).strip()
+    return value.casefold() if casefold else value
+
+
+class Automaton:
+    """
+    Aho-Corasick automaton over a fixed set of non-empty patterns.
+
+    scan(text) walks the text once, so its cost is linear in the text plus
+    the number of matches, however many patterns there are.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(dict.fromkeys(p for p in patterns if p))
+
+        # Trie: per-state transition dicts, plus pattern ids ending at each state
+        self._goto = [{}]
+        self._out = [[]]
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(pattern_id)
+
+        # Failure links in BFS order; each state inherits the outputs of its fallback
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def finditer(self, text):
+        """
+        Yields (end_offset, pattern) for every occurrence of every pattern in text.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for offset, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in out[state]:
+                yield offset + 1, self.patterns[pattern_id]
+
+    def scan(self, text):
+        """
+        Returns the set of patterns occurring in text, stopping once all have been seen.
+        """
+        found = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+                if len(found) == len(self.patterns):
+                    break
+        return {self.patterns[i] for i in found}
+
+
+class IOCIndex:
+    """
+    Exact-lookup set plus free-text automaton for one list of indicators.
+    """
+
+    def __init__(self, indicators, casefold=False):
+        self.casefold = casefold
+        self.indicators = {}
+        for indicator in indicators:
+            if indicator is None:
+                continue
+            normalized = _normalize(indicator, casefold)
+            if normalized:
+                self.indicators.setdefault(normalized, set()).add(indicator)
+        self.automaton = Automaton(self.indicators)
+
+    def _originals(self, normalized):
+        return {original for n in normalized for original in self.indicators[n]}
+
+    def exact(self, values):
+        """
+        Returns the indicators that appear as whole entries of values (e.g. an ioc_list).
+        """
+        if isinstance(values, str):
+            values = [values]
+        candidates = {_normalize(v, self.casefold) for v in values or [] if v is not None}
+        return self._originals(candidates & self.indicators.keys())
+
+    def scan(self, text):
+        """
+        Returns the indicators occurring anywhere in text, in a single pass.
+        """
+        if not text:
+            return set()
+        if not isinstance(text, str):
+            text = " ".join(map(str, text))
+        return self._originals(self.automaton.scan(text.casefold() if self.casefold else text))
+
+    def report(self, ioc_list=None, **texts):
+        """
+        Returns {"ioc_list": hits, <text name>: hits, ..., "missing": never-seen indicators}.
+        """
+        hits = {"ioc_list": self.exact(ioc_list)}
+        for name, text in texts.items():
+            hits[name] = self.scan(text)
+
+        seen = set().union(*hits.values())
+        everything = self._originals(self.indicators)
+        hits["missing"] = everything - seen
+        return hits
+
+
+@lru_cache(maxsize=128)
+def _cached_index(indicators, casefold):
+    return IOCIndex(indicators, casefold)
+
+
+def ioc_index(indicators, casefold=False):
+    """
+    Returns an IOCIndex for the indicators, reusing one already built for the same key.
+    """
+    return _cached_index(tuple(i for i in indicators if i is not None), casefold)
+
+
+def answer_key_indicators(key, fields=None):
+    """
+    Collects the string indicators of an answer key (skipping MITRE technique ids).
+    """
+    indicators = []
+    for field, value in key.items():
+        if (fields is not None and field not in fields) or field == "expected_mitre":
+            continue
+        values = value if isinstance(value, list) else [value]
+        indicators.extend(v for v in values if isinstance(v, str))
+    return indicators
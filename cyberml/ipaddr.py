@@ -0,0 +1,113 @@
+"""
+Vectorized IPv4 helpers.
+
+Log IP columns are strings with few distinct values compared to their
+length, so conversions work on the distinct values and broadcast back
+through factorize codes:
+
+    ints, valid = ipv4_column(df["source_ip"])
+    mask = in_cidrs(ints, valid, ["10.0.0.0/8", "185.199.110.0/24"])
+"""
+import numpy as np
+import pandas as pd
+
+# Longest dotted quad, "255.255.255.255"
+_MAX_LENGTH = 15
+
+
+def ipv4_to_uint32(values):
+    """
+    Parses dotted-quad strings to uint32. Returns (ints, valid); invalid entries are 0.
+
+    Strings are laid out as a fixed-width character matrix and parsed one
+    character column at a time, so the work is 15 array passes regardless
+    of how many addresses there are.
+    """
+    values = pd.Series(values, dtype="str").str.strip()
+    fits = values.str.len().le(_MAX_LENGTH).to_numpy(dtype=bool)
+    chars = np.asarray(values.where(fits, "").fillna("").to_numpy(dtype=object), dtype=f"U{_MAX_LENGTH}")
+    columns = np.ascontiguousarray(chars.view(np.uint32).reshape(len(values), _MAX_LENGTH).T)
+
+    n = len(values)
+    # uint32 throughout: only malformed values can wrap, and those are invalid anyway
+    ints = np.zeros(n, dtype=np.uint32)
+    current = np.zeros(n, dtype=np.uint32)
+    digits = np.zeros(n, dtype=np.int8)
+    dots = np.zeros(n, dtype=np.int8)
+    valid = fits.copy()
+
+    for column in columns:
+        if not column.any():
+            break
+        digit = column - 48
+        is_digit = digit <= 9  # unsigned: anything below "0" wraps around
+        is_dot = column == 46
+        valid &= is_digit | is_dot | (column == 0)
+
+        np.copyto(current, current * 10 + digit, where=is_digit)
+        digits += is_digit
+
+        # A dot closes the current octet
+        valid &= ~is_dot | ((digits >= 1) & (digits <= 3) & (current <= 255))
+        np.copyto(ints, (ints << 8) | current, where=is_dot)
+        dots += is_dot
+        current[is_dot] = 0
+        digits[is_dot] = 0
+
+    valid &= (dots == 3) & (digits >= 1) & (digits <= 3) & (current <= 255)
+    ints = (ints << 8) | current
+    ints[~valid] = 0
+    return ints, valid
+
+
+def uint32_to_ipv4(ints):
+    """
+    Formats uint32 addresses as dotted-quad strings (object array), the inverse of ipv4_to_uint32.
+    """
+    ints = np.asarray(ints, dtype=np.uint32)
+    text = (ints >> 24).astype(str)
+    for shift in (16, 8, 0):
+        text = np.char.add(np.char.add(text, "."), ((ints >> shift) & 0xFF).astype(str))
+    return text.astype(object)
+
+
+def ipv4_column(values):
+    """
+    Like ipv4_to_uint32, but parses each distinct value of a column only once.
+    """
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+
+    ints, valid = ipv4_to_uint32(uniques)
+    # Code -1 (missing) lands on the appended invalid slot
+    ints, valid = np.append(ints, np.uint32(0)), np.append(valid, False)
+    return ints[codes], valid[codes]
+
+
+def parse_cidr(text):
+    """
+    Returns the inclusive (first, last) uint32 addresses of "a.b.c.d/n" (or a bare address).
+    """
+    address, _, prefix = str(text).strip().partition("/")
+    ints, valid = ipv4_to_uint32([address])
+    prefix = int(prefix) if prefix else 32
+    if not valid[0] or not 0 <= prefix <= 32:
+        raise ValueError(f"Invalid IPv4 CIDR: {text!r}")
+
+    size = 1 << (32 - prefix)
+    first = int(ints[0]) & ~(size - 1) & 0xFFFFFFFF
+    return first, first + size - 1
+
+
+def in_cidrs(ints, valid, cidrs):
+    """
+    Returns a mask of the valid addresses that fall in any of the CIDR blocks.
+    """
+    mask = np.zeros(len(ints), dtype=bool)
+    for cidr in [cidrs] if isinstance(cidrs, str) else cidrs:
+        first, last = parse_cidr(cidr)
+        mask |= (ints >= first) & (ints <= last)
+    return mask & valid
@@ -0,0 +1,318 @@
+"""
+SQLite-backed leaderboard store.
+
+leaderboard.json used to be rewritten in full for every graded submission,
+so concurrent graders could overwrite each other's entries. The store keeps
+one row per (student, scenario) with the SOC / ML / combined component
+scores, plus a per-student totals table that is refreshed in the same
+transaction. Both tables are indexed for ranking queries, every write is an
+atomic upsert, and leaderboard.json is exported from the database for
+anything that still reads the old file:
+
+    python -m cyberml.leaderboard record evaluation_results/evaluation_output.json --student alice
+    python -m cyberml.leaderboard top -n 10 --scenario scenario_03
+    python -m cyberml.leaderboard export
+"""
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+from cyberml.registry import COMPONENTS, REPO_ROOT
+from cyberml.tracing import span
+
+LEADERBOARD_PATH = os.path.join(REPO_ROOT, "leaderboard.json")
+LEADERBOARD_DB = os.path.join(REPO_ROOT, "leaderboard.db")
+
+# Entries imported from a leaderboard.json that only has per-student totals
+LEGACY_SCENARIO = "legacy"
+UNKNOWN_SCENARIO = "unknown_scenario"
+
+SCORE_COLUMNS = [f"{c}_score" for c in COMPONENTS] + ["total_score"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenario_scores (
+    student TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    soc_score INTEGER NOT NULL DEFAULT 0,
+    ml_score INTEGER NOT NULL DEFAULT 0,
+    combined_score INTEGER NOT NULL DEFAULT 0,
+    total_score INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (student, scenario)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS scenario_scores_rank
+    ON scenario_scores (scenario, total_score DESC, student);
+
+CREATE TABLE IF NOT EXISTS student_scores (
+    student TEXT PRIMARY KEY,
+    soc_score INTEGER NOT NULL DEFAULT 0,
+    ml_score INTEGER NOT NULL DEFAULT 0,
+    combined_score INTEGER NOT NULL DEFAULT 0,
+    total_score INTEGER NOT NULL DEFAULT 0,
+    scenarios INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS student_scores_rank
+    ON student_scores (total_score DESC, student);
+"""
+
+_UPSERT_SCENARIO = """
+INSERT INTO scenario_scores (student, scenario, soc_score, ml_score, combined_score, total_score, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (student, scenario) DO UPDATE SET
+    soc_score = excluded.soc_score,
+    ml_score = excluded.ml_score,
+    combined_score = excluded.combined_score,
+    total_score = excluded.total_score,
+    updated_at = excluded.updated_at
+"""
+
+_REFRESH_STUDENT = """
+INSERT INTO student_scores (student, soc_score, ml_score, combined_score, total_score, scenarios, updated_at)
+SELECT student, SUM(soc_score), SUM(ml_score), SUM(combined_score), SUM(total_score), COUNT(*), MAX(updated_at)
+FROM scenario_scores WHERE student = ? GROUP BY student
+ON CONFLICT (student) DO UPDATE SET
+    soc_score = excluded.soc_score,
+    ml_score = excluded.ml_score,
+    combined_score = excluded.combined_score,
+    total_score = excluded.total_score,
+    scenarios = excluded.scenarios,
+    updated_at = excluded.updated_at
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _scenario_name(result):
+    # The CI workflow records the submission folder path, e.g. student_submissions/x/scenario_01
+    scenario = result.get("scenario") or UNKNOWN_SCENARIO
+    return os.path.basename(os.path.normpath(scenario))
+
+
+def _write_json(path, data):
+    # Write to a temp file first so readers never see a half-written file
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp, path)
+
+
+class Leaderboard:
+    """
+    Leaderboard backed by an SQLite database file.
+
+    Safe to open from several processes at once: the database runs in WAL
+    mode so readers never block the writer, and writers wait up to `timeout`
+    seconds for each other instead of failing.
+    """
+
+    def __init__(self, path=LEADERBOARD_DB, seed_json=None, timeout=30.0):
+        self.path = path
+        is_new = path == ":memory:" or not os.path.exists(path)
+
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        if is_new and seed_json and os.path.exists(seed_json):
+            self.import_json(seed_json)
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    def _write(self, rows):
+        # One IMMEDIATE transaction per batch: takes the write lock up front so
+        # concurrent graders queue instead of interleaving partial updates
+        rows = list(rows)
+        if not rows:
+            return 0
+
+        students = sorted({row[0] for row in rows})
+        graded = sorted({row[0] for row in rows if row[1] != LEGACY_SCENARIO})
+
+        with span("leaderboard.write", category="leaderboard", rows=len(rows)):
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(_UPSERT_SCENARIO, rows)
+                # Graded scenarios replace any totals carried over from leaderboard.json
+                self.conn.executemany(
+                    "DELETE FROM scenario_scores WHERE student = ? AND scenario = ?",
+                    [(s, LEGACY_SCENARIO) for s in graded],
+                )
+                self.conn.executemany(_REFRESH_STUDENT, [(s,) for s in students])
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        return len(rows)
+
+    def record_score(self, student, scenario, soc_score=0, ml_score=0, combined_score=0, total_score=None):
+        """
+        Upserts one student's component scores for one scenario.
+        """
+        if total_score is None:
+            total_score = soc_score + ml_score + combined_score
+        return self._write([(student, scenario, soc_score, ml_score, combined_score, total_score, _now())])
+
+    def record(self, results):
+        """
+        Upserts evaluation results ({"student", "scenario", "soc", "ml",
+        "combined", "total_score"}, as batch_grade produces) in one transaction.
+        """
+        now = _now()
+        return self._write(
+            (
+                result["student"],
+                _scenario_name(result),
+                result["soc"]["soc_score"],
+                result["ml"]["ml_score"],
+                result["combined"]["combined_score"],
+                result["total_score"],
+                now,
+            )
+            for result in results
+        )
+
+    def import_json(self, path=LEADERBOARD_PATH):
+        """
+        Loads a leaderboard.json that predates the database.
+
+        The old file only kept per-student totals, so each entry is stored as
+        a single "legacy" scenario row until the student is graded again.
+        """
+        with open(path) as f:
+            legacy = json.load(f)
+
+        now = _now()
+        return self._write(
+            (student, LEGACY_SCENARIO, *(int(entry.get(col, 0)) for col in SCORE_COLUMNS), now)
+            for student, entry in legacy.items()
+        )
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def top(self, n=10, scenario=None):
+        """
+        Returns the n best students overall, or for one scenario.
+        """
+        if scenario is None:
+            rows = self.conn.execute(
+                "SELECT * FROM student_scores ORDER BY total_score DESC, student LIMIT ?", (n,)
+            )
+        else:
+            rows = self.conn.execute(
+                "SELECT * FROM scenario_scores WHERE scenario = ? ORDER BY total_score DESC, student LIMIT ?",
+                (scenario, n),
+            )
+        return [dict(row) for row in rows]
+
+    def student(self, name):
+        """
+        Returns a student's totals and per-scenario rows, or None if unknown.
+        """
+        totals = self.conn.execute("SELECT * FROM student_scores WHERE student = ?", (name,)).fetchone()
+        if totals is None:
+            return None
+
+        rows = self.conn.execute(
+            "SELECT * FROM scenario_scores WHERE student = ? ORDER BY scenario", (name,)
+        )
+        return {**dict(totals), "scenarios": {row["scenario"]: dict(row) for row in rows}}
+
+    def rank(self, name):
+        """
+        Returns a student's 1-based overall rank, or None if unknown.
+        """
+        row = self.conn.execute(
+            "SELECT 1 + (SELECT COUNT(*) FROM student_scores WHERE total_score > s.total_score) "
+            "FROM student_scores AS s WHERE student = ?",
+            (name,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def to_dict(self):
+        """
+        Returns the leaderboard.json layout, best students first.
+        """
+        breakdown = {}
+        for row in self.conn.execute("SELECT student, scenario, total_score FROM scenario_scores ORDER BY scenario"):
+            breakdown.setdefault(row["student"], {})[row["scenario"]] = row["total_score"]
+
+        leaderboard = {}
+        for row in self.conn.execute("SELECT * FROM student_scores ORDER BY total_score DESC, student"):
+            leaderboard[row["student"]] = {
+                **{col: row[col] for col in SCORE_COLUMNS},
+                "scenarios": breakdown.get(row["student"], {})
+            }
+        return leaderboard
+
+    def export_json(self, path=LEADERBOARD_PATH):
+        """
+        Writes leaderboard.json from the database and returns its contents.
+        """
+        with span("leaderboard.export_json", category="leaderboard") as export:
+            leaderboard = self.to_dict()
+            _write_json(path, leaderboard)
+            export.rows = len(leaderboard)
+        return leaderboard
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and query leaderboard scores.")
+    parser.add_argument("--db", default=LEADERBOARD_DB)
+    parser.add_argument("--json", default=LEADERBOARD_PATH,
+                        help="leaderboard.json to seed a new database from and to export to.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="Upsert one evaluation_output.json and re-export the JSON.")
+    record.add_argument("result")
+    record.add_argument("--student", default=None,
+                        help="Student name (default: the result's 'student' field).")
+
+    top = commands.add_parser("top", help="Print the best students.")
+    top.add_argument("-n", type=int, default=10)
+    top.add_argument("--scenario", default=None)
+
+    commands.add_parser("export", help="Rewrite leaderboard.json from the database.")
+
+    args = parser.parse_args(argv)
+
+    with Leaderboard(args.db, seed_json=args.json) as board:
+        if args.command == "record":
+            with open(args.result) as f:
+                result = json.load(f)
+            result["student"] = args.student or result.get("student", "unknown_student")
+            board.record([result])
+            board.export_json(args.json)
+            print(f"Recorded {result['student']} / {_scenario_name(result)}: {result['total_score']}")
+
+        elif args.command == "top":
+            for i, row in enumerate(board.top(args.n, args.scenario), 1):
+                print(f"{i:>3}. {row['student']:<30} {row['total_score']}")
+
+        else:
+            board.export_json(args.json)
+            print(f"Exported {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Content-addressed cache for scenario logs.
+
+Notebooks used to read every log straight from raw.githubusercontent.com, so a
+class starting a lab at once downloaded the same files once per student per
+run. `load_scenario_log` resolves a log in this order:
+
+    1. the local repo checkout (scenarios/<scenario>/logs/<file>)
+    2. the on-disk cache, keyed by the file's SHA-256 digest
+    3. the remote repo, verified against the digest before it is cached
+
+Each scenario's logs folder carries a manifest.json of digests, written by the
+generators. Once a file has been cached it loads from disk with no network
+access, and CYBERML_OFFLINE=1 turns the remote fallback off entirely.
+Instructors can warm a cache for a classroom ahead of time, or publish
+memory-mapped copies that every kernel on the host shares (see
+cyberml.shared); `load` prefers a published copy whose digest still matches:
+
+    python -m cyberml.logcache prefetch scenario_02 scenario_03
+    python -m cyberml.logcache publish scenario_02 scenario_03
+    python -m cyberml.logcache manifest scenarios/scenario_03/logs
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from urllib.request import urlopen
+
+from cyberml.logio import FORMATS, _local_candidates, read_log
+from cyberml.registry import REPO_ROOT
+from cyberml.shared import (SHARED_DIR, read_published, read_shared_log, shared_path, write_published,
+                            write_shared_log)
+
+DEFAULT_REMOTE = "https://raw.githubusercontent.com/Binkerton13/cyber-ml-training/main"
+MANIFEST_NAME = "manifest.json"
+
+CACHE_DIR = os.environ.get("CYBERML_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "cyberml")
+
+# How long a downloaded manifest is trusted before the remote is asked again
+MANIFEST_TTL = 3600
+
+_BLOCK_SIZE = 1 << 20
+
+
+def _offline_default():
+    return os.environ.get("CYBERML_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def file_digest(path):
+    """
+    Returns the hex SHA-256 digest of a file, read in 1 MiB blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_manifest(log_dir):
+    """
+    Returns {"files": {name: {"sha256", "size"}}} for every log in log_dir.
+
+    Hidden files (e.g. incremental feature state) and the manifest itself
+    are skipped.
+    """
+    files = {}
+    for name in sorted(os.listdir(log_dir)):
+        path = os.path.join(log_dir, name)
+        if name.startswith(".") or name == MANIFEST_NAME or name.endswith(".tmp") or not os.path.isfile(path):
+            continue
+        files[name] = {"sha256": file_digest(path), "size": os.path.getsize(path)}
+    return {"files": files}
+
+
+def write_manifest(log_dir):
+    """
+    Writes log_dir/manifest.json and returns its contents.
+    """
+    manifest = build_manifest(log_dir)
+    path = os.path.join(log_dir, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp, path)
+    return manifest
+
+
+class LogCache:
+    """
+    Resolves scenario log files to local paths, downloading them at most once.
+    """
+
+    def __init__(self, cache_dir=None, remote_root=DEFAULT_REMOTE, repo_root=REPO_ROOT,
+                 offline=None, manifest_ttl=MANIFEST_TTL, timeout=30, shared_dir=SHARED_DIR):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.remote_root = remote_root.rstrip("/") if remote_root else None
+        self.repo_root = repo_root
+        self.offline = _offline_default() if offline is None else offline
+        self.manifest_ttl = manifest_ttl
+        self.timeout = timeout
+        self.shared_dir = shared_dir
+        self._manifests = {}
+
+    # -----------------------------
+    # Paths
+    # -----------------------------
+    def _local_dir(self, scenario):
+        if not self.repo_root:
+            return None
+        return os.path.join(self.repo_root, "scenarios", scenario, "logs")
+
+    def _remote_url(self, scenario, filename):
+        return f"{self.remote_root}/scenarios/{scenario}/logs/{filename}"
+
+    def _object_path(self, digest, filename):
+        # Keep the extension so read_log can tell the format from the path
+        ext = os.path.splitext(filename)[1]
+        return os.path.join(self.cache_dir, "objects", digest[:2], digest + ext)
+
+    def _manifest_cache_path(self, scenario):
+        # Forks publish different data under the same scenario names
+        remote_key = hashlib.sha256((self.remote_root or "").encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, "manifests", remote_key, f"{scenario}.json")
+
+    # -----------------------------
+    # Manifests
+    # -----------------------------
+    def _fetch(self, url, dest):
+        # Stream to a temp file beside dest and hash on the way through
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        digest = hashlib.sha256()
+        try:
+            with urlopen(url, timeout=self.timeout) as response, open(tmp, "wb") as f:
+                for block in iter(lambda: response.read(_BLOCK_SIZE), b""):
+                    digest.update(block)
+                    f.write(block)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return tmp, digest.hexdigest()
+
+    def _remote_manifest(self, scenario):
+        cached = self._manifest_cache_path(scenario)
+        fresh = os.path.exists(cached) and time.time() - os.path.getmtime(cached) < self.manifest_ttl
+
+        if not fresh and not self.offline and self.remote_root:
+            try:
+                tmp, _ = self._fetch(self._remote_url(scenario, MANIFEST_NAME), cached)
+                os.replace(tmp, cached)
+            except (OSError, ValueError):
+                # Network down or no manifest published: fall back to the stale copy, if any
+                pass
+
+        if not os.path.exists(cached):
+            return {}
+        with open(cached) as f:
+            return json.load(f).get("files", {})
+
+    def manifest(self, scenario):
+        """
+        Returns {filename: {"sha256", "size"}} for a scenario, or {} if unknown.
+
+        A local checkout's manifest wins; otherwise the remote manifest is
+        used, re-downloaded at most once per `manifest_ttl` seconds.
+        """
+        if scenario not in self._manifests:
+            local_dir = self._local_dir(scenario)
+            local = os.path.join(local_dir, MANIFEST_NAME) if local_dir else None
+
+            if local and os.path.exists(local):
+                with open(local) as f:
+                    self._manifests[scenario] = json.load(f).get("files", {})
+            else:
+                self._manifests[scenario] = self._remote_manifest(scenario)
+
+        return self._manifests[scenario]
+
+    # -----------------------------
+    # Resolution
+    # -----------------------------
+    def resolve(self, scenario, filename):
+        """
+        Returns a local path (or, with no manifest at all, a URL) for a log file.
+
+        Raises FileNotFoundError if the file is not available locally, not in
+        the cache and cannot be downloaded.
+        """
+        local_dir = self._local_dir(scenario)
+        if local_dir and os.path.exists(os.path.join(local_dir, filename)):
+            return os.path.join(local_dir, filename)
+
+        manifest = self.manifest(scenario)
+        entry = manifest.get(filename)
+
+        if entry is None:
+            # Without any manifest we cannot cache safely; read straight from the remote
+            if not manifest and not self.offline and self.remote_root:
+                return self._remote_url(scenario, filename)
+            reason = "is not in the manifest" if manifest else "has no cached manifest"
+            raise FileNotFoundError(f"{scenario}/logs/{filename} {reason}")
+
+        path = self._object_path(entry["sha256"], filename)
+        if os.path.exists(path):
+            return path
+
+        if self.offline or not self.remote_root:
+            raise FileNotFoundError(f"{scenario}/logs/{filename} is not cached and offline mode is on")
+
+        tmp, digest = self._fetch(self._remote_url(scenario, filename), path)
+        if digest != entry["sha256"]:
+            os.remove(tmp)
+            raise ValueError(
+                f"Digest mismatch for {scenario}/logs/{filename}: expected {entry['sha256']}, got {digest}"
+            )
+        os.replace(tmp, path)
+        return path
+
+    def _published(self, scenario, stem):
+        # A published copy counts only while its source still matches the manifest
+        if not self.shared_dir:
+            return None
+        entry = read_published(self.shared_dir, scenario).get(stem)
+        if entry is None or self.manifest(scenario).get(entry["source"], {}).get("sha256") != entry["sha256"]:
+            return None
+        path = shared_path(self.shared_dir, scenario, stem)
+        return path if os.path.exists(path) else None
+
+    def load(self, scenario, name, formats=FORMATS, columns=None):
+        """
+        Loads a scenario log by name.
+
+        A published shared copy wins while its digest matches; then the
+        newest copy in the local checkout (see logio.load_log), then cached
+        or downloaded copies in `formats` order. Only a missing copy or
+        missing pyarrow falls through to the next one; a file that fails to
+        parse raises.
+        """
+        stem = os.path.splitext(name)[0]
+        last_error = None
+
+        published = self._published(scenario, stem)
+        if published:
+            try:
+                return read_shared_log(published, columns=columns)
+            except (OSError, ImportError, ValueError) as e:
+                last_error = e
+
+        local_dir = self._local_dir(scenario)
+        local = _local_candidates(local_dir, stem, formats) if local_dir else []
+        for path in local:
+            try:
+                return read_log(path, columns=columns)
+            except ImportError as e:
+                last_error = e
+
+        for fmt in formats:
+            filename = f"{stem}.{fmt}"
+            if local_dir and os.path.join(local_dir, filename) in local:
+                continue
+            try:
+                path = self.resolve(scenario, filename)
+            except (OSError, ValueError) as e:
+                # Not cached and not downloadable (or a corrupt download): try the next format
+                last_error = e
+                continue
+            try:
+                return read_log(path, columns=columns)
+            except ImportError as e:
+                last_error = e
+
+        raise FileNotFoundError(f"No {'/'.join(formats)} copy of {scenario}/{stem} could be loaded") from last_error
+
+    def prefetch(self, scenario):
+        """
+        Downloads every file in a scenario's manifest into the cache.
+        """
+        return [self.resolve(scenario, filename) for filename in self.manifest(scenario)]
+
+    def publish(self, scenario, force=False):
+        """
+        Writes a scenario's logs to the shared directory as memory-mappable Arrow files.
+
+        Each log is read from its preferred format (see FORMATS). Logs whose
+        source digest is unchanged since the last publish are skipped unless
+        `force` is set. Returns the names of the logs written.
+        """
+        if not self.shared_dir:
+            raise ValueError("No shared directory configured (set CYBERML_SHARED_DIR)")
+
+        sources = {}
+        for filename in self.manifest(scenario):
+            stem, ext = os.path.splitext(filename)
+            fmt = ext.lstrip(".")
+            if fmt in FORMATS and (stem not in sources or FORMATS.index(fmt) < FORMATS.index(sources[stem][1])):
+                sources[stem] = (filename, fmt)
+
+        published = read_published(self.shared_dir, scenario)
+        written = []
+        for stem, (filename, _) in sorted(sources.items()):
+            digest = self.manifest(scenario)[filename]["sha256"]
+            current = published.get(stem)
+            if not force and current and current["sha256"] == digest and self._published(scenario, stem):
+                continue
+
+            df = read_log(self.resolve(scenario, filename))
+            write_shared_log(df, shared_path(self.shared_dir, scenario, stem))
+            published[stem] = {"source": filename, "sha256": digest, "rows": len(df)}
+            written.append(stem)
+
+        write_published(self.shared_dir, scenario, published)
+        return written
+
+    def verify(self, scenario):
+        """
+        Returns the local checkout files whose digest no longer matches the manifest.
+        """
+        local_dir = self._local_dir(scenario)
+        stale = []
+        for filename, entry in self.manifest(scenario).items():
+            path = os.path.join(local_dir, filename) if local_dir else None
+            if path and os.path.exists(path) and file_digest(path) != entry["sha256"]:
+                stale.append(filename)
+        return stale
+
+
+def load_scenario_log(scenario, name, formats=FORMATS, columns=None, **cache_options):
+    """
+    Loads scenarios/<scenario>/logs/<name> through a LogCache, e.g.
+    load_scenario_log("scenario_02", "auth").
+    """
+    return LogCache(**cache_options).load(scenario, name, formats=formats, columns=columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local scenario log cache.")
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--remote", default=DEFAULT_REMOTE)
+    parser.add_argument("--shared-dir", default=SHARED_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    manifest = commands.add_parser("manifest", help="Write manifest.json for a logs folder.")
+    manifest.add_argument("log_dirs", nargs="+")
+
+    prefetch = commands.add_parser("prefetch", help="Download scenario logs into the cache.")
+    prefetch.add_argument("scenarios", nargs="+")
+
+    publish = commands.add_parser("publish", help="Write memory-mapped shared copies of scenario logs.")
+    publish.add_argument("scenarios", nargs="+")
+    publish.add_argument("--force", action="store_true", help="Rewrite logs that are already up to date.")
+
+    verify = commands.add_parser("verify", help="List local logs that no longer match their manifest.")
+    verify.add_argument("scenarios", nargs="+")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "manifest":
+        for log_dir in args.log_dirs:
+            files = write_manifest(log_dir)["files"]
+            print(f"{os.path.join(log_dir, MANIFEST_NAME)}: {len(files)} files")
+        return
+
+    # Prefetching only makes sense against the remote, not this checkout
+    cache = LogCache(args.cache_dir, args.remote, repo_root=None if args.command == "prefetch" else REPO_ROOT,
+                     shared_dir=args.shared_dir)
+
+    for scenario in args.scenarios:
+        if args.command == "prefetch":
+            paths = cache.prefetch(scenario)
+            print(f"{scenario}: {len(paths)} files cached in {cache.cache_dir}")
+        elif args.command == "publish":
+            written = cache.publish(scenario, force=args.force)
+            print(f"{scenario}: {len(written)} logs published to {os.path.join(cache.shared_dir, scenario)}")
+        else:
+            stale = cache.verify(scenario)
+            print(f"{scenario}: " + (", ".join(stale) + " changed since the manifest" if stale else "ok"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Columnar log storage and a shared loader for scenario logs.
+
+Logs can be written as CSV (the student-facing default), Parquet or Feather.
+The columnar formats keep the timestamp column typed and the low-cardinality
+string columns categorical, so loading a large cohort skips both CSV parsing
+and timestamp re-parsing. `load_log` returns the same typed DataFrame no
+matter which format it finds. Logs with a timestamp_ns column (every
+generated log has one) are typed from those integers without parsing a
+single string.
+"""
+import os
+
+import pandas as pd
+
+from cyberml.timestamps import (EPOCH_NS_COLUMN, TIMESTAMP_COLUMN, epoch_ns_column, frame_epoch_ns,
+                                parse_epoch_ns, to_datetimes)
+from cyberml.tracing import span
+
+FORMATS = ("parquet", "feather", "csv")
+
+# Low-cardinality string columns that are stored as pandas categoricals
+CATEGORICAL_COLUMNS = [
+    "user",
+    "username",
+    "region",
+    "event_name",
+    "host",
+    "destination_host",
+    "process",
+    "bucket",
+    "result",
+    "auth_result",
+    "status",
+    "event_type",
+    "geo_location",
+    "device_id",
+]
+
+
+def _require_pyarrow(fmt):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            f"Writing or reading {fmt} logs requires pyarrow (pip install pyarrow)."
+        ) from e
+
+
+def parse_timestamps(values):
+    """
+    Parses generator-style ISO timestamps ("...Z" or "...+00:00Z") to UTC.
+
+    Raises ValueError on a missing or malformed value (see cyberml.timestamps).
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.tz_localize("UTC") if values.dt.tz is None else values.dt.tz_convert("UTC")
+    return to_datetimes(parse_epoch_ns(values), index=values.index)
+
+
+def log_timestamps(df):
+    """
+    Returns a log's typed UTC timestamps, built from timestamp_ns when the log has it.
+    """
+    if pd.api.types.is_datetime64_any_dtype(df[TIMESTAMP_COLUMN]):
+        return parse_timestamps(df[TIMESTAMP_COLUMN])
+    return to_datetimes(frame_epoch_ns(df), index=df.index)
+
+
+def apply_log_types(df):
+    """
+    Returns df with a typed UTC timestamp column and categorical string columns.
+    """
+    df = df.copy()
+
+    if EPOCH_NS_COLUMN in df.columns:
+        df[EPOCH_NS_COLUMN] = epoch_ns_column(df[EPOCH_NS_COLUMN])
+    if TIMESTAMP_COLUMN in df.columns:
+        df[TIMESTAMP_COLUMN] = log_timestamps(df)
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+
+    return df
+
+
+def log_path(log_dir, name, fmt="csv"):
+    """
+    Builds the path of a log file, e.g. log_path("logs", "auth", "parquet").
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown log format: {fmt}")
+    stem = os.path.splitext(name)[0]
+    return os.path.join(log_dir, f"{stem}.{fmt}")
+
+
+def write_log(df, path, fmt=None):
+    """
+    Writes a log DataFrame in the format given by fmt or the file extension.
+    """
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".")
+
+    with span(f"write_log:{os.path.basename(path)}", category="write", rows=len(df)):
+        if fmt == "csv":
+            df.to_csv(path, index=False)
+            return path
+
+        _require_pyarrow(fmt)
+        typed = apply_log_types(df).reset_index(drop=True)
+
+        if fmt == "parquet":
+            typed.to_parquet(path, index=False)
+        elif fmt == "feather":
+            typed.to_feather(path)
+        else:
+            raise ValueError(f"Unknown log format: {fmt}")
+
+    return path
+
+
+def read_log(path, columns=None):
+    """
+    Reads a single log file and returns it with typed columns.
+    """
+    fmt = os.path.splitext(path)[1].lstrip(".")
+
+    if fmt == "csv":
+        # Keep HTTP-style status codes as strings, as the generators write them
+        df = pd.read_csv(path, usecols=columns, dtype={"status": str})
+    elif fmt == "parquet":
+        _require_pyarrow(fmt)
+        # Decode string columns straight into categoricals on read
+        df = pd.read_parquet(path, columns=columns, read_dictionary=CATEGORICAL_COLUMNS)
+    elif fmt == "feather":
+        _require_pyarrow(fmt)
+        df = pd.read_feather(path, columns=columns)
+    else:
+        raise ValueError(f"Unknown log format: {fmt}")
+
+    return apply_log_types(df)
+
+
+def iter_log(path, chunk_size=250_000, columns=None):
+    """
+    Yields a log file as typed DataFrame chunks of up to chunk_size rows, in file order.
+    """
+    fmt = os.path.splitext(path)[1].lstrip(".")
+
+    if fmt == "csv":
+        for chunk in pd.read_csv(path, usecols=columns, dtype={"status": str}, chunksize=chunk_size):
+            yield apply_log_types(chunk)
+    elif fmt == "parquet":
+        _require_pyarrow(fmt)
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield apply_log_types(batch.to_pandas())
+    elif fmt == "feather":
+        _require_pyarrow(fmt)
+        import pyarrow.feather as feather
+
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunk_size):
+            yield apply_log_types(batch.to_pandas())
+    else:
+        raise ValueError(f"Unknown log format: {fmt}")
+
+
+def _local_candidates(log_dir, name, formats):
+    # Existing copies, newest first; copies written in the same instant keep the formats order
+    paths = [log_path(log_dir, name, fmt) for fmt in formats]
+    paths = [path for path in paths if os.path.exists(path)]
+    return sorted(paths, key=lambda path: -os.path.getmtime(path))
+
+
+def load_log(log_dir, name, formats=FORMATS, columns=None):
+    """
+    Loads a scenario log by name from the most recently written of its copies.
+
+    Regenerating only the CSVs therefore never leaves an older Parquet or
+    Feather copy in the way. A copy is skipped only when pyarrow is missing;
+    a file that fails to parse raises. log_dir may also be a URL prefix
+    (e.g. the notebooks' `log_base`): there the formats are tried in order
+    and a missing copy falls through to the next one.
+    """
+    remote = "://" in str(log_dir)
+    last_error = None
+
+    if remote:
+        paths = [f"{str(log_dir).rstrip('/')}/{os.path.splitext(name)[0]}.{fmt}" for fmt in formats]
+    else:
+        paths = _local_candidates(log_dir, name, formats)
+
+    for path in paths:
+        try:
+            return read_log(path, columns=columns)
+        except ImportError as e:
+            # No pyarrow for a columnar copy: fall through to the next format
+            last_error = e
+        except OSError as e:
+            if not remote:
+                raise
+            # Missing remote copy: fall through to the next format
+            last_error = e
+
+    raise FileNotFoundError(f"No {'/'.join(formats)} copy of {name!r} found in {log_dir}") from last_error
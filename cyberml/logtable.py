@@ -0,0 +1,463 @@
+"""
+Compact, dictionary-encoded in-memory logs.
+
+A LogTable holds one NumPy array per column instead of Python string
+objects:
+
+- string columns (user, region, event_name, resource, ...) as the smallest
+  signed integer codes that fit, into a Vocab of distinct values
+- IPv4 columns as packed uint32 addresses
+- the timestamp as int64 epoch nanoseconds (see cyberml.timestamps)
+- numbers as the narrowest fixed-width dtype that holds their range
+
+Multi-million-row scenario_02/03 logs shrink to a fraction of their
+DataFrame size, and group-bys, value counts and filters run on the
+integer codes without ever touching a string:
+
+    table = read_table("scenarios/scenario_03/logs/cloud_api.csv")
+    table.groupby(["user", "region"], {"latency_ms": ["mean", "max"], "resource": ["nunique"]})
+    api_calls = table.take(table.isin("event_name", ["AssumeRole", "GetObject"]))
+    df = api_calls.to_frame()        # the same typed DataFrame load_log returns
+
+Tables built with the same vocabs dict share one Vocab per column name, so
+codes are comparable across logs (e.g. cloud_api and cloud_iam users).
+From the command line, compare a log's footprint in both layouts:
+
+    python -m cyberml.logtable scenarios/scenario_03/logs/cloud_api.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from cyberml.ipaddr import ipv4_column, uint32_to_ipv4
+from cyberml.logio import CATEGORICAL_COLUMNS, iter_log
+from cyberml.timestamps import (EPOCH_NS_COLUMN, TIMESTAMP_COLUMN, epoch_ns_column, frame_epoch_ns,
+                                parse_epoch_ns, to_datetimes)
+
+# Column kinds
+CODES = "codes"
+IPV4 = "ipv4"
+TIME = "time"
+NUMBER = "number"
+
+AGGREGATIONS = ("count", "sum", "mean", "min", "max", "nunique")
+
+# Group-bys over at most this many possible keys count into a dense table instead of sorting
+DENSE_GROUP_LIMIT = 1 << 24
+
+
+def _code_dtype(n_values):
+    # Smallest signed type that holds every code plus -1 for missing values
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_values <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _narrow(values):
+    # Integers shrink to the narrowest type holding their range; floats and bools stay as they are
+    if not np.issubdtype(values.dtype, np.integer) or not len(values):
+        return values
+    low, high = values.min(), values.max()
+    candidates = (np.uint8, np.uint16, np.uint32) if low >= 0 else (np.int8, np.int16, np.int32)
+    for dtype in candidates:
+        if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+            return values.astype(dtype)
+    return values
+
+
+def _compact(keys, n_slots):
+    """
+    Returns (distinct keys sorted, group index of every key).
+
+    Keys from a small space are counted into a dense table in one pass;
+    larger spaces fall back to sorting.
+    """
+    if n_slots <= DENSE_GROUP_LIMIT:
+        present = np.bincount(keys, minlength=int(n_slots)) > 0
+        groups = np.flatnonzero(present)
+        slot = np.cumsum(present) - 1
+        return groups, slot[keys]
+    return np.unique(keys, return_inverse=True)
+
+
+class Vocab:
+    """
+    Append-only mapping between distinct strings and integer codes.
+    """
+
+    def __init__(self, values=()):
+        self.values = pd.Index(list(values), dtype="str")
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"Vocab({len(self)} values)"
+
+    @staticmethod
+    def _factorize(values):
+        values = pd.Series(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return values.cat.codes.to_numpy(), values.cat.categories.astype("str")
+        codes, uniques = pd.factorize(values)
+        return codes, pd.Index(uniques).astype("str")
+
+    def encode(self, values):
+        """
+        Returns int64 codes for values, adding unseen ones; missing values get -1.
+        """
+        codes, uniques = self._factorize(values)
+
+        mapping = self.values.get_indexer(uniques)
+        new = mapping < 0
+        if new.any():
+            mapping[new] = np.arange(len(self), len(self) + new.sum())
+            self.values = self.values.append(uniques[new])
+
+        # Code -1 (missing) lands on the appended -1 slot
+        return np.append(mapping, -1).astype(np.int64)[codes]
+
+    def lookup(self, values):
+        """
+        Returns int64 codes for values without adding any; unseen and missing values get -1.
+        """
+        codes, uniques = self._factorize(values)
+        return np.append(self.values.get_indexer(uniques), -1).astype(np.int64)[codes]
+
+    def code(self, value):
+        """
+        Returns the code of one value, or -1 if the vocab has never seen it.
+        """
+        return int(self.values.get_indexer([str(value)])[0])
+
+    def decode(self, codes):
+        """
+        Returns the strings for codes as a str Series (missing where the code is -1).
+        """
+        codes = np.asarray(codes)
+        return pd.Series(pd.Categorical.from_codes(codes, self.values)).astype("str")
+
+
+class LogTable:
+    """
+    A log as column arrays: dictionary codes, packed IPv4, epoch ns and narrow numbers.
+    """
+
+    def __init__(self, columns, kinds, vocabs=None, valid=None, dtypes=None, epoch_column=False):
+        self.columns = dict(columns)
+        self.kinds = dict(kinds)
+        self.vocabs = vocabs if vocabs is not None else {}
+        self.valid = dict(valid or {})
+        self.dtypes = dict(dtypes or {})
+        # Whether to_frame() also emits timestamp_ns next to the typed timestamp
+        self.epoch_column = epoch_column
+
+    # -----------------------------
+    # Building
+    # -----------------------------
+    @classmethod
+    def from_frame(cls, df, vocabs=None):
+        """
+        Encodes a log DataFrame (raw or typed). Pass one vocabs dict to several
+        calls to share a Vocab per column name between tables.
+        """
+        vocabs = vocabs if vocabs is not None else {}
+        columns, kinds, valid, dtypes = {}, {}, {}, {}
+        epoch_column = EPOCH_NS_COLUMN in df.columns and TIMESTAMP_COLUMN in df.columns
+
+        for name in df.columns:
+            values = df[name]
+            if name == EPOCH_NS_COLUMN and epoch_column:
+                continue
+
+            if name == TIMESTAMP_COLUMN:
+                columns[name], kinds[name] = frame_epoch_ns(df), TIME
+            elif name == EPOCH_NS_COLUMN:
+                columns[name], kinds[name] = _narrow(epoch_ns_column(values)), NUMBER
+                dtypes[name] = np.dtype(np.int64)
+            elif pd.api.types.is_datetime64_any_dtype(values):
+                columns[name], kinds[name] = parse_epoch_ns(values), TIME
+            elif pd.api.types.is_numeric_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+                array = values.to_numpy()
+                columns[name], kinds[name], dtypes[name] = _narrow(array), NUMBER, array.dtype
+            else:
+                packed = cls._pack_ipv4(values)
+                if packed is not None:
+                    columns[name], valid[name] = packed
+                    kinds[name] = IPV4
+                else:
+                    vocab = vocabs.setdefault(name, Vocab())
+                    codes = vocab.encode(values)
+                    columns[name], kinds[name] = codes.astype(_code_dtype(len(vocab))), CODES
+
+        return cls(columns, kinds, vocabs, valid, dtypes, epoch_column)
+
+    @staticmethod
+    def _pack_ipv4(values):
+        # Only columns whose every value is a canonical dotted quad round-trip through uint32
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            uniques = values.cat.categories
+        else:
+            uniques = pd.unique(values.dropna())
+        if not len(uniques):
+            return None
+
+        uniques = pd.Index(uniques).astype("str")
+        ints, ok = ipv4_column(uniques)
+        if not ok.all() or not (uint32_to_ipv4(ints) == uniques.to_numpy(dtype=object)).all():
+            return None
+
+        ints, ok = ipv4_column(values)
+        return ints, (None if ok.all() else ok)
+
+    @classmethod
+    def from_chunks(cls, chunks, vocabs=None):
+        """
+        Encodes an iterable of DataFrame chunks (e.g. iter_log) into one table.
+        """
+        vocabs = vocabs if vocabs is not None else {}
+        return cls.concat([cls.from_frame(chunk, vocabs) for chunk in chunks], vocabs)
+
+    @classmethod
+    def concat(cls, tables, vocabs=None):
+        """
+        Stacks tables with the same columns, encoded against the same vocabs.
+        """
+        tables = list(tables)
+        if not tables:
+            raise ValueError("Nothing to concatenate.")
+        first = tables[0]
+        vocabs = vocabs if vocabs is not None else first.vocabs
+
+        columns, kinds, valid = {}, {}, {}
+        for name, kind in first.kinds.items():
+            layouts = {t.kinds.get(name) for t in tables}
+            if layouts == {IPV4, CODES}:
+                # An IP column with a malformed value in some chunk falls back to codes throughout
+                vocab = vocabs.setdefault(name, Vocab())
+                codes = np.concatenate([vocab.encode(t.column(name)) for t in tables])
+                columns[name], kinds[name] = codes.astype(_code_dtype(len(vocab))), CODES
+                continue
+            if len(layouts) > 1:
+                raise ValueError(f"Column {name!r} does not have one layout across the tables.")
+
+            columns[name], kinds[name] = np.concatenate([t.columns[name] for t in tables]), kind
+            if kind == IPV4 and any(t.valid.get(name) is not None for t in tables):
+                valid[name] = np.concatenate([
+                    t.valid[name] if t.valid.get(name) is not None else np.ones(len(t), dtype=bool)
+                    for t in tables
+                ])
+
+        return cls(columns, kinds, vocabs, valid, first.dtypes, first.epoch_column)
+
+    # -----------------------------
+    # Access and conversion
+    # -----------------------------
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __repr__(self):
+        return f"LogTable({len(self)} rows, {len(self.columns)} columns, {self.nbytes / 1e6:.1f} MB)"
+
+    @property
+    def nbytes(self):
+        """
+        Bytes held by the column arrays plus the distinct strings of the vocabs used.
+        """
+        arrays = sum(a.nbytes for a in self.columns.values())
+        arrays += sum(m.nbytes for m in self.valid.values() if m is not None)
+        vocab_bytes = sum(self.vocabs[name].values.memory_usage(deep=True)
+                          for name, kind in self.kinds.items() if kind == CODES)
+        return arrays + vocab_bytes
+
+    def codes(self, name):
+        """
+        Returns the integer codes behind a column (uint32 addresses for IPv4, epoch ns for times).
+        """
+        return self.columns[name]
+
+    def column(self, name):
+        """
+        Decodes one column to a pandas Series.
+        """
+        kind, data = self.kinds[name], self.columns[name]
+
+        if kind == TIME:
+            return to_datetimes(data)
+        if kind == NUMBER:
+            return pd.Series(data.astype(self.dtypes.get(name, data.dtype), copy=False))
+        if kind == IPV4:
+            codes, uniques = pd.factorize(data)
+            text = pd.Series(uint32_to_ipv4(uniques)[codes], dtype="str")
+            if self.valid.get(name) is not None:
+                text[~self.valid[name]] = None
+            return text
+
+        if name in CATEGORICAL_COLUMNS:
+            return pd.Series(pd.Categorical.from_codes(data, self.vocabs[name].values))
+        return self.vocabs[name].decode(data)
+
+    def to_frame(self, columns=None):
+        """
+        Decodes the table to the typed DataFrame load_log would return for the same log.
+        """
+        out = {}
+        for name in columns or self.columns:
+            out[name] = self.column(name)
+            if name == TIMESTAMP_COLUMN and self.epoch_column:
+                out[EPOCH_NS_COLUMN] = pd.Series(self.columns[name])
+        return pd.DataFrame(out)
+
+    def take(self, rows):
+        """
+        Returns the table restricted to rows (a boolean mask or positions), sharing the vocabs.
+        """
+        rows = np.asarray(rows)
+        columns = {name: data[rows] for name, data in self.columns.items()}
+        valid = {name: mask[rows] for name, mask in self.valid.items() if mask is not None}
+        return LogTable(columns, self.kinds, self.vocabs, valid, self.dtypes, self.epoch_column)
+
+    def isin(self, name, values):
+        """
+        Returns a mask of the rows whose column value is one of values, compared on codes.
+        """
+        if self.kinds[name] != CODES:
+            return self.column(name).isin(values).to_numpy()
+
+        vocab = self.vocabs[name]
+        wanted = np.zeros(len(vocab) + 1, dtype=bool)
+        codes = vocab.values.get_indexer(pd.Index([str(v) for v in values], dtype="str"))
+        wanted[codes[codes >= 0]] = True
+        # Code -1 (missing) reads the trailing False slot
+        return wanted[self.columns[name]]
+
+    # -----------------------------
+    # Group-bys on codes
+    # -----------------------------
+    def _key(self, name):
+        # (codes, number of codes, labels) of one grouping column
+        kind, data = self.kinds[name], self.columns[name]
+        if kind == CODES:
+            vocab = self.vocabs[name]
+            return data.astype(np.int64), len(vocab), pd.Categorical.from_codes(np.arange(len(vocab)), vocab.values)
+        codes, uniques = pd.factorize(data)
+        if kind == IPV4:
+            if self.valid.get(name) is not None:
+                codes = np.where(self.valid[name], codes, -1)
+            labels = uint32_to_ipv4(uniques)
+        elif kind == TIME:
+            labels = to_datetimes(uniques).to_numpy()
+        else:
+            labels = uniques.astype(self.dtypes.get(name, uniques.dtype))
+        return codes.astype(np.int64), len(uniques), labels
+
+    def value_counts(self, name):
+        """
+        Rows per distinct value, most frequent first.
+        """
+        return self.groupby([name]).set_index(name)["count"].sort_values(ascending=False, kind="stable")
+
+    def groupby(self, by, aggregations=None):
+        """
+        Groups rows by one or more columns and aggregates others.
+
+        aggregations maps a column to a list of count / sum / mean / min /
+        max / nunique. Grouping keys are packed into one int64 per row
+        (mixed radix over the column codes), so the work is a bincount or a
+        sort of integers; rows with a missing key are dropped, as in pandas.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        aggregations = aggregations or {}
+        for column, funcs in aggregations.items():
+            unknown = set(funcs) - set(AGGREGATIONS)
+            if unknown:
+                raise ValueError(f"Unknown aggregations for {column!r}: {sorted(unknown)}")
+
+        keys = [self._key(name) for name in by]
+        packed = np.zeros(len(self), dtype=np.int64)
+        missing = np.zeros(len(self), dtype=bool)
+        for codes, size, _ in keys:
+            packed = packed * size + np.maximum(codes, 0)
+            missing |= codes < 0
+
+        rows = np.flatnonzero(~missing) if missing.any() else slice(None)
+        groups, group_of = _compact(packed[rows], int(np.prod([size for _, size, _ in keys], dtype=np.float64)))
+        n_groups = len(groups)
+
+        out = {}
+        # Unpack each group's key back into per-column codes, last column first
+        remainder = groups
+        for name, (_, size, labels) in reversed(list(zip(by, keys))):
+            remainder, code = np.divmod(remainder, size)
+            out[name] = labels.take(code) if isinstance(labels, pd.Categorical) else labels[code]
+        out = {name: out[name] for name in by}
+        counts = np.bincount(group_of, minlength=n_groups)
+        out["count"] = counts
+
+        for column, funcs in aggregations.items():
+            kind = self.kinds[column]
+            for func in funcs:
+                label = f"{column}_{func}"
+                if func == "count":
+                    out[label] = counts
+                elif func == "nunique":
+                    codes, size, _ = self._key(column)
+                    codes = codes[rows]
+                    present = codes >= 0
+                    size = max(size, 1)
+                    pairs, _ = _compact(group_of[present] * size + codes[present], n_groups * size)
+                    out[label] = np.bincount(pairs // size, minlength=n_groups)
+                elif kind != NUMBER:
+                    raise ValueError(f"{func} needs a numeric column, {column!r} is {kind}.")
+                else:
+                    values = self.columns[column][rows].astype(np.float64)
+                    # Integer columns keep integer sums, minima and maxima, as in pandas
+                    dtype = self.dtypes.get(column, values.dtype)
+                    exact = np.issubdtype(dtype, np.integer) or np.issubdtype(dtype, np.bool_)
+                    if func in ("sum", "mean"):
+                        total = np.bincount(group_of, weights=values, minlength=n_groups)
+                        if func == "mean":
+                            total = total / counts
+                        out[label] = total.astype(np.int64) if exact and func == "sum" else total
+                    else:
+                        reduce = np.minimum if func == "min" else np.maximum
+                        result = np.full(n_groups, np.inf if func == "min" else -np.inf)
+                        reduce.at(result, group_of, values)
+                        out[label] = result.astype(dtype) if exact else result
+
+        return pd.DataFrame(out)
+
+
+def read_table(path, chunk_size=250_000, columns=None, vocabs=None):
+    """
+    Reads a log file (csv/parquet/feather) chunk by chunk straight into a LogTable.
+
+    Only one chunk is ever held as a DataFrame, so the peak is the compact
+    table plus one chunk.
+    """
+    return LogTable.from_chunks(iter_log(path, chunk_size, columns), vocabs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare a log's memory as a DataFrame and as a LogTable.")
+    parser.add_argument("logs", nargs="+", help="Log files (csv/parquet/feather).")
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    args = parser.parse_args(argv)
+
+    vocabs = {}
+    for path in args.logs:
+        table = read_table(path, args.chunk_size, vocabs=vocabs)
+        frame_bytes = table.to_frame().memory_usage(deep=True).sum()
+        print(f"{os.path.basename(path)}: {len(table):,} rows, "
+              f"DataFrame {frame_bytes / 1e6:.1f} MB, LogTable {table.nbytes / 1e6:.1f} MB "
+              f"({table.nbytes / max(frame_bytes, 1):.0%})")
+        for name, kind in table.kinds.items():
+            detail = f", {len(table.vocabs[name])} values" if kind == CODES else ""
+            print(f"  {name:<20} {kind:<7} {table.columns[name].dtype}{detail}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+"""
+Reference anomaly models for the ML track.
+
+Each scenario has a baseline IsolationForest trained on one of its logs
+(BASELINES). Training needs scikit-learn; scoring does not. A trained forest
+is exported as complete-tree node arrays (feature, threshold, leaf path
+length), saved as .npy files next to a model.json and memory-mapped on
+load. Scoring walks every tree for a batch of distinct feature rows at
+once with NumPy and returns exactly what sklearn's decision_function would
+(negative = anomalous, like the anomaly_score students submit):
+
+    model = reference_model("scenario_03")          # trains + saves on first use
+    scores = model.score_frame(features_df)         # batch
+    for scores in model.score_chunks(iter_log(path)):   # streaming
+        ...
+
+Artifacts live in CYBERML_MODEL_DIR (default: <cache dir>/models/<scenario>)
+and are retrained automatically when the training log changes. From the
+command line:
+
+    python -m cyberml.models train scenario_01 scenario_02 scenario_03
+    python -m cyberml.models score scenario_03 scenarios/scenario_03/logs/cloud_api_features.csv --out scores.csv
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from cyberml.enrich import LABELS, enrich
+from cyberml.logcache import CACHE_DIR, file_digest
+from cyberml.logio import FORMATS, iter_log, load_log, log_path, write_log
+from cyberml.registry import SCENARIOS_DIR
+from cyberml.timestamps import frame_epoch_ns, hour_of_day
+
+MODEL_DIR = os.environ.get("CYBERML_MODEL_DIR") or os.path.join(CACHE_DIR, "models")
+
+ARTIFACT_VERSION = 1
+ARRAYS = ("feature", "threshold", "value")
+
+# Complete-tree layout doubles per level; sklearn's default max_samples=256 gives depth 8
+MAX_DEPTH = 16
+
+# Training log and features per scenario; scoring accepts any log with the same columns
+BASELINES = {
+    "scenario_01": {
+        "log": "historical_logins",
+        "features": ["hour", "geo_location", "device_id"],
+    },
+    "scenario_02": {
+        "log": "network",
+        "features": ["hour", "bytes_sent", "dst_ip_zone"],
+    },
+    "scenario_03": {
+        "log": "cloud_api_features",
+        "features": [
+            "api_count_total",
+            "unique_api_calls",
+            "unique_resources",
+            "avg_latency",
+            "error_rate",
+            "region_entropy",
+            "hour_mean",
+            "hour_std",
+        ],
+    },
+}
+
+# Same settings as the notebooks' example models
+FOREST_PARAMS = {"n_estimators": 100, "contamination": 0.05, "random_state": 42}
+
+
+def _require_sklearn():
+    try:
+        import sklearn  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Training reference models requires scikit-learn (pip install scikit-learn).") from e
+
+
+# -----------------------------
+# Features
+# -----------------------------
+class FeatureEncoder:
+    """
+    Turns log rows into the float feature matrix a baseline model scores.
+
+    "hour" comes from the timestamp, "<ip column>_zone" (and the other enrich
+    labels) from the IP range table, numeric columns pass through, and any
+    other column is encoded with a vocabulary fixed at training time (unseen
+    values become -1).
+    """
+
+    def __init__(self, features, vocab=None):
+        self.features = list(features)
+        self.vocab = vocab or {}
+
+    def _columns(self, df):
+        derived = {}
+        if "hour" in self.features and "hour" not in df.columns:
+            derived["hour"] = hour_of_day(frame_epoch_ns(df))
+
+        ip_columns = {f.rsplit("_", 1)[0] for f in self.features
+                      if f.rsplit("_", 1)[-1] in LABELS and f not in df.columns}
+        if ip_columns:
+            enriched = enrich(df[sorted(ip_columns)], columns=sorted(ip_columns))
+            derived.update({f: enriched[f] for f in self.features if f in enriched.columns})
+
+        return {f: derived[f] if f in derived else df[f] for f in self.features}
+
+    def fit(self, df):
+        for name, values in self._columns(df).items():
+            values = pd.Series(values)
+            if not pd.api.types.is_numeric_dtype(values):
+                self.vocab[name] = sorted(values.dropna().astype(str).unique().tolist())
+        return self
+
+    def transform(self, df):
+        columns = self._columns(df)
+        X = np.empty((len(df), len(self.features)), dtype=np.float64)
+        for i, name in enumerate(self.features):
+            values = pd.Series(columns[name])
+            if name in self.vocab:
+                X[:, i] = pd.Categorical(values.astype(str), categories=self.vocab[name]).codes
+            else:
+                X[:, i] = values.to_numpy(dtype="float64", na_value=np.nan)
+        return np.nan_to_num(X, nan=0.0)
+
+    def to_dict(self):
+        return {"features": self.features, "vocab": self.vocab}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["features"], data.get("vocab"))
+
+
+# -----------------------------
+# Forest export
+# -----------------------------
+def _average_path_length(n):
+    # Expected path length of an unsuccessful BST search over n points (sklearn's c(n))
+    n = np.asarray(n, dtype=np.float64)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    big = n > 2
+    result[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return result
+
+
+def export_forest(forest, n_features):
+    """
+    Flattens a fitted sklearn IsolationForest into node arrays and scoring constants.
+
+    Every tree is laid out as a complete binary tree of the forest's depth
+    (children of slot i at 2i+1 and 2i+2), so scoring needs no child
+    pointers. A leaf above the bottom level fills its whole subtree: its
+    slots test "x <= inf" and every bottom slot below it holds its value.
+    """
+    depth = int(max(tree.tree_.max_depth for tree in forest.estimators_))
+    if depth > MAX_DEPTH:
+        raise ValueError(f"Trees of depth {depth} are too deep to export (max {MAX_DEPTH}); lower max_samples")
+
+    n_trees = len(forest.estimators_)
+    inner_slots, leaf_slots = 2 ** depth - 1, 2 ** depth
+    feature = np.zeros((n_trees, inner_slots), dtype=np.int32)
+    threshold = np.full((n_trees, inner_slots), np.inf, dtype=np.float64)
+    value = np.zeros((n_trees, leaf_slots), dtype=np.float64)
+
+    for i, (tree, features) in enumerate(zip(forest.estimators_, forest.estimators_features_)):
+        t = tree.tree_
+        # Path length credited at each leaf: its depth plus c(samples left in it)
+        leaf_value = _average_path_length(t.n_node_samples)
+        stack = [(0, 0, 0)]
+        while stack:
+            node, slot, level = stack.pop()
+            if t.children_left[node] >= 0:
+                # Trees trained on a feature subset index into that subset
+                feature[i, slot] = features[t.feature[node]]
+                threshold[i, slot] = t.threshold[node]
+                stack.append((t.children_left[node], 2 * slot + 1, level + 1))
+                stack.append((t.children_right[node], 2 * slot + 2, level + 1))
+            else:
+                span = 2 ** (depth - level)
+                first = (slot - (2 ** level - 1)) * span
+                value[i, first:first + span] = level + leaf_value[node]
+
+    arrays = {"feature": feature, "threshold": threshold, "value": value}
+    meta = {
+        "n_features": int(n_features),
+        "depth": depth,
+        "denominator": float(n_trees * _average_path_length([forest.max_samples_])[0]),
+        "offset": float(forest.offset_),
+    }
+    return arrays, meta
+
+
+# -----------------------------
+# Scoring
+# -----------------------------
+class ReferenceModel:
+    """
+    A memory-mapped forest artifact plus its feature encoder.
+    """
+
+    # Rows walked at once; the slot matrix is batch x n_trees
+    BATCH_ROWS = 4096
+
+    def __init__(self, arrays, meta):
+        self.arrays = arrays
+        self.meta = meta
+        self.encoder = FeatureEncoder.from_dict(meta["encoder"])
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, "model.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"{path}: unsupported model artifact version {meta.get('version')}")
+
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in ARRAYS}
+        return cls(arrays, meta)
+
+    def save(self, path):
+        """
+        Writes the artifact directory, replacing any previous one in a single rename.
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        for name in ARRAYS:
+            np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(self.arrays[name]))
+        with open(os.path.join(tmp, "model.json"), "w") as f:
+            json.dump(self.meta, f, indent=4)
+
+        old = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+        return path
+
+    def score(self, X):
+        """
+        Returns decision_function scores for a feature matrix (negative = anomalous).
+        """
+        # sklearn compares float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.meta["n_features"]:
+            raise ValueError(f"Expected {self.meta['n_features']} features, got shape {X.shape}")
+
+        # Log features repeat heavily (hours, categories), so score each distinct row once
+        keys = X.view(np.dtype((np.void, X.dtype.itemsize * X.shape[1]))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        depths = self._path_lengths(X[first])[inverse.reshape(-1)]
+
+        return -(2.0 ** (-depths / self.meta["denominator"])) - self.meta["offset"]
+
+    def _path_lengths(self, X):
+        # Sum over trees of each row's path length, walking all trees a level at a time
+        feature = np.asarray(self.arrays["feature"]).ravel()
+        threshold = np.asarray(self.arrays["threshold"]).ravel()
+        value = np.asarray(self.arrays["value"]).ravel()
+        n_trees, inner_slots = self.arrays["feature"].shape
+        tree_inner = (np.arange(n_trees) * inner_slots)[None, :]
+        tree_leaf = (np.arange(n_trees) * (inner_slots + 1))[None, :]
+
+        totals = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.BATCH_ROWS):
+            batch = X[start:start + self.BATCH_ROWS]
+            flat = batch.ravel()
+            row_base = (np.arange(len(batch)) * batch.shape[1])[:, None]
+            slot = np.zeros((len(batch), n_trees), dtype=np.int64)
+
+            for _ in range(self.meta["depth"]):
+                index = tree_inner + slot
+                go_right = ~(flat[row_base + feature[index]] <= threshold[index])
+                slot = 2 * slot + 1 + go_right
+
+            totals[start:start + len(batch)] = value[tree_leaf + slot - inner_slots].sum(axis=1)
+        return totals
+
+    def score_frame(self, df):
+        return self.score(self.encoder.transform(df))
+
+    def score_chunks(self, chunks):
+        """
+        Yields one score array per DataFrame chunk, e.g. from logio.iter_log.
+        """
+        for chunk in chunks:
+            yield self.score_frame(chunk)
+
+
+def train_model(df, features, params=None):
+    """
+    Fits an IsolationForest on df[features] and returns it as a ReferenceModel.
+    """
+    _require_sklearn()
+    from sklearn.ensemble import IsolationForest
+
+    encoder = FeatureEncoder(features).fit(df)
+    X = encoder.transform(df)
+    forest = IsolationForest(**{**FOREST_PARAMS, **(params or {})}).fit(X)
+
+    arrays, meta = export_forest(forest, X.shape[1])
+    meta.update({
+        "version": ARTIFACT_VERSION,
+        "encoder": encoder.to_dict(),
+        "params": {**FOREST_PARAMS, **(params or {})},
+        "trained_rows": len(X),
+        "created": time.time(),
+    })
+    return ReferenceModel(arrays, meta)
+
+
+# -----------------------------
+# Per-scenario baselines
+# -----------------------------
+def _training_log(scenario, scenarios_dir):
+    log_dir = os.path.join(scenarios_dir, scenario, "logs")
+    name = BASELINES[scenario]["log"]
+    for fmt in FORMATS:
+        path = log_path(log_dir, name, fmt)
+        if os.path.exists(path):
+            return log_dir, name, path
+    raise FileNotFoundError(f"No {name} log in {log_dir}")
+
+
+def model_path(scenario, model_dir=MODEL_DIR):
+    return os.path.join(model_dir, scenario)
+
+
+def train_baseline(scenario, scenarios_dir=SCENARIOS_DIR, model_dir=MODEL_DIR, params=None):
+    """
+    Trains the scenario's baseline on its training log and saves the artifact.
+    """
+    if scenario not in BASELINES:
+        raise KeyError(f"No baseline model for {scenario}; known: {', '.join(sorted(BASELINES))}")
+
+    log_dir, name, path = _training_log(scenario, scenarios_dir)
+    model = train_model(load_log(log_dir, name), BASELINES[scenario]["features"], params)
+    model.meta.update({"scenario": scenario, "log": name, "log_sha256": file_digest(path)})
+    model.save(model_path(scenario, model_dir))
+    return model
+
+
+_loaded = {}
+
+
+def reference_model(scenario, scenarios_dir=SCENARIOS_DIR, model_dir=MODEL_DIR, train=True):
+    """
+    Returns the scenario's memory-mapped baseline, (re)training it if missing or stale.
+
+    With train=False a missing or stale artifact raises FileNotFoundError
+    instead, so callers such as evaluators never train.
+    """
+    _, _, path = _training_log(scenario, scenarios_dir)
+    digest = file_digest(path)
+
+    model = _loaded.get((scenario, model_dir))
+    if model is None or model.meta.get("log_sha256") != digest:
+        try:
+            model = ReferenceModel.load(model_path(scenario, model_dir))
+        except (OSError, ValueError):
+            model = None
+        if model is None or model.meta.get("log_sha256") != digest:
+            if not train:
+                raise FileNotFoundError(f"No up-to-date {scenario} reference model in {model_dir}; "
+                                        f"run python -m cyberml.models train {scenario}")
+            train_baseline(scenario, scenarios_dir, model_dir)
+            model = ReferenceModel.load(model_path(scenario, model_dir))
+        _loaded[(scenario, model_dir)] = model
+    return model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and score the per-scenario reference models.")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train = sub.add_parser("train", help="Train and save baselines.")
+    train.add_argument("scenarios", nargs="*", default=sorted(BASELINES))
+
+    score = sub.add_parser("score", help="Score a log (streamed in chunks) with a scenario baseline.")
+    score.add_argument("scenario")
+    score.add_argument("log")
+    score.add_argument("--chunk-size", type=int, default=250_000)
+    score.add_argument("--out", default=None, help="Write the log with an anomaly_score column.")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        for scenario in args.scenarios:
+            start = time.perf_counter()
+            model = train_baseline(scenario, model_dir=args.model_dir)
+            print(f"{scenario}: {model.meta['trained_rows']} rows, {len(model.arrays['feature'])} trees "
+                  f"in {time.perf_counter() - start:.2f}s -> {model_path(scenario, args.model_dir)}")
+        return
+
+    model = reference_model(args.scenario, model_dir=args.model_dir)
+    chunks = []
+    start = time.perf_counter()
+    rows = 0
+    for chunk in iter_log(args.log, args.chunk_size):
+        scored = chunk.assign(anomaly_score=model.score_frame(chunk))
+        rows += len(scored)
+        chunks.append(scored if args.out else scored.nsmallest(10, "anomaly_score"))
+    elapsed = time.perf_counter() - start
+
+    result = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+    print(f"Scored {rows} rows in {elapsed:.2f}s")
+    if args.out:
+        write_log(result, args.out)
+        print(f"Written to {args.out}")
+    else:
+        print(result.nsmallest(10, "anomaly_score").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
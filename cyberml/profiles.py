@@ -0,0 +1,491 @@
+"""
+Per-user login baselines for scenario_01's anomaly checks.
+
+A LoginProfile condenses a login history (scenario_01's
+historical_logins.csv) into per-user state:
+
+- a 24-bucket histogram of login hours (UTC)
+- the devices, destination hosts, source IPs and geo locations seen
+- the time and geo location of the last login
+
+Checking new logins is a handful of array and hash lookups against that
+state, never a rescan of the history, so millions of logins are flagged
+in one vectorized pass:
+
+    profile = baseline_profile("scenario_01")      # built + saved on first use
+    flags = profile.score(load_log(log_dir, "auth_log"))
+    flags[flags["novel_device"] | flags["off_hours"] | flags["impossible_travel"]]
+    profile.update(new_logins)                     # fold new logins into the baseline
+
+Impossible travel compares each login with the same user's previous one
+(earlier in the batch, otherwise the last login in the profile) and flags
+moves faster than MAX_TRAVEL_KMH between GEO_COORDINATES points. Profiles
+are saved as .npy arrays next to a profile.json, memory-mapped on load,
+and rebuilt when the history log changes. From the command line:
+
+    python -m cyberml.profiles build scenario_01
+    python -m cyberml.profiles score scenario_01 scenarios/scenario_01/logs/auth_log.csv --update
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from cyberml.logcache import CACHE_DIR, file_digest
+from cyberml.logio import FORMATS, _local_candidates, iter_log, write_log
+from cyberml.logtable import Vocab
+from cyberml.registry import SCENARIOS_DIR
+from cyberml.timestamps import NS_PER_HOUR, frame_epoch_ns, hour_of_day
+
+PROFILE_DIR = os.environ.get("CYBERML_PROFILE_DIR") or os.path.join(CACHE_DIR, "profiles")
+
+PROFILE_VERSION = 1
+
+# History log the baseline is built from, per scenario
+HISTORIES = {
+    "scenario_01": "historical_logins",
+}
+
+USER_COLUMNS = ("username", "user")
+
+# Attributes whose known values are kept per user, with the columns they are read from
+ATTRIBUTES = {
+    "device": ("device_id",),
+    "host": ("destination_host", "host"),
+    "ip": ("source_ip",),
+    "geo": ("geo_location", "region")
+}
+
+# An hour (with its neighbours) holding less than this share of a user's logins is off-hours
+OFF_HOURS_SHARE = 0.05
+OFF_HOURS_WINDOW = 1
+
+# Faster than an airliner, over more than geo-IP noise
+MAX_TRAVEL_KMH = 1000.0
+MIN_TRAVEL_KM = 100.0
+EARTH_RADIUS_KM = 6371.0
+
+# Approximate (lat, lon) of each region's largest city; pass coordinates= for other codes
+GEO_COORDINATES = {
+    "US-TX": (29.76, -95.37),
+    "US-CA": (34.05, -118.24),
+    "US-NY": (40.71, -74.01),
+    "US-WA": (47.61, -122.33),
+    "US-IL": (41.88, -87.63),
+    "US-VA": (38.88, -77.10),
+    "US-FL": (25.76, -80.19),
+    "US-GA": (33.75, -84.39),
+    "CA-ON": (43.65, -79.38),
+    "GB-LND": (51.51, -0.13),
+    "IE-D": (53.35, -6.26),
+    "FR-IDF": (48.86, 2.35),
+    "DE-BE": (52.52, 13.40),
+    "DE-HE": (50.11, 8.68),
+    "NL-NH": (52.37, 4.90),
+    "RU-MOW": (55.76, 37.62),
+    "IN-MH": (19.08, 72.88),
+    "SG-01": (1.29, 103.85),
+    "JP-13": (35.68, 139.69),
+    "AU-NSW": (-33.87, 151.21),
+    "BR-SP": (-23.55, -46.63)
+}
+
+# last_ns of a user with no login yet
+NO_LOGIN = np.iinfo(np.int64).min
+
+# Boolean columns of LoginProfile.score(), plus its measurements
+FLAG_COLUMNS = ["new_user"] + [f"novel_{attribute}" for attribute in ATTRIBUTES] + ["off_hours", "impossible_travel"]
+SCORE_COLUMNS = FLAG_COLUMNS[:-2] + ["hour_share", "off_hours", "travel_km", "travel_kmh", "impossible_travel"]
+
+
+def _pick(columns, candidates):
+    return next((column for column in candidates if column in columns), None)
+
+
+def _pair_keys(users, codes):
+    # (user, value) pairs as one int64; a -1 user or value never matches a stored pair
+    return (users.astype(np.int64) << 32) | codes.astype(np.int64)
+
+
+def _merge_keys(known, keys):
+    # Sorted union; the stable sort (timsort) merges the two sorted runs in linear time
+    merged = np.sort(np.concatenate([known, np.sort(keys)]), kind="stable")
+    if not len(merged):
+        return merged
+    return merged[np.r_[True, merged[1:] != merged[:-1]]]
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class LoginProfile:
+    """
+    Per-user hour histograms, known attribute values and last login, with vectorized checks.
+    """
+
+    def __init__(self, users=None, vocabs=None, arrays=None, meta=None, coordinates=None):
+        arrays = arrays or {}
+        self.users = users or Vocab()
+        self.vocabs = vocabs or {attribute: Vocab() for attribute in ATTRIBUTES}
+        self.hours = arrays.get("hours", np.zeros((0, 24), dtype=np.int64))
+        self.last_ns = arrays.get("last_ns", np.zeros(0, dtype=np.int64))
+        self.last_geo = arrays.get("last_geo", np.zeros(0, dtype=np.int64))
+        # Sorted int64 (user, value) pair keys per attribute
+        self.known = {attribute: arrays.get(f"known_{attribute}", np.zeros(0, dtype=np.int64))
+                      for attribute in ATTRIBUTES}
+        self.meta = meta or {"rows": 0}
+        self.coordinates = GEO_COORDINATES if coordinates is None else coordinates
+        # Lookup structures derived from the arrays, rebuilt after an update
+        self._derived = {}
+
+    def __len__(self):
+        return len(self.users)
+
+    def __repr__(self):
+        return f"LoginProfile({len(self)} users, {self.meta.get('rows', 0)} logins)"
+
+    @staticmethod
+    def _columns(df):
+        user = _pick(df.columns, USER_COLUMNS)
+        if user is None:
+            raise KeyError(f"No user column; expected one of {', '.join(USER_COLUMNS)}")
+        attributes = {attribute: _pick(df.columns, candidates) for attribute, candidates in ATTRIBUTES.items()}
+        return user, {attribute: column for attribute, column in attributes.items() if column}
+
+    # -----------------------------
+    # Building
+    # -----------------------------
+    def update(self, df):
+        """
+        Folds a batch of logins into the profile and returns it.
+
+        Only the batch and the profile's own arrays are touched, so a
+        profile can follow a login stream chunk by chunk.
+        """
+        if not len(df):
+            return self
+        user_column, columns = self._columns(df)
+        users = self.users.encode(df[user_column])
+        ns = frame_epoch_ns(df)
+        valid = users >= 0
+        n_users = len(self.users)
+
+        hours = np.zeros((n_users, 24), dtype=np.int64)
+        hours[:len(self.hours)] = self.hours
+        slots = users[valid] * 24 + hour_of_day(ns[valid])
+        hours += np.bincount(slots, minlength=n_users * 24).reshape(n_users, 24)
+        self.hours = hours
+
+        codes = {}
+        for attribute, column in columns.items():
+            codes[attribute] = self.vocabs[attribute].encode(df[column])
+            seen = valid & (codes[attribute] >= 0)
+            pairs = _pair_keys(users[seen], codes[attribute][seen])
+            self.known[attribute] = _merge_keys(self.known[attribute], pairs)
+
+        # Latest login per user in the batch, kept if it is newer than the stored one
+        last_ns = np.full(n_users, NO_LOGIN, dtype=np.int64)
+        last_ns[:len(self.last_ns)] = self.last_ns
+        last_geo = np.full(n_users, -1, dtype=np.int64)
+        last_geo[:len(self.last_geo)] = self.last_geo
+
+        rows = np.flatnonzero(valid)
+        rows = rows[np.lexsort((ns[rows], users[rows]))]
+        final = rows[np.r_[users[rows][1:] != users[rows][:-1], True]] if len(rows) else rows
+        newer = final[ns[final] >= last_ns[users[final]]]
+        last_ns[users[newer]] = ns[newer]
+        if "geo" in codes:
+            last_geo[users[newer]] = codes["geo"][newer]
+        self.last_ns, self.last_geo = last_ns, last_geo
+
+        self.meta["rows"] = self.meta.get("rows", 0) + len(df)
+        self._derived = {}
+        return self
+
+    # -----------------------------
+    # Scoring
+    # -----------------------------
+    def _known_index(self, attribute):
+        # A hash index over the pair keys, so each lookup is O(1)
+        key = ("known", attribute)
+        if key not in self._derived:
+            self._derived[key] = pd.Index(self.known[attribute])
+        return self._derived[key]
+
+    def _hour_windows(self):
+        # Logins per user within OFF_HOURS_WINDOW hours of each hour, plus each user's total
+        if "hours" not in self._derived:
+            hours = np.asarray(self.hours)
+            window = sum(np.roll(hours, shift, axis=1) for shift in range(-OFF_HOURS_WINDOW, OFF_HOURS_WINDOW + 1))
+            self._derived["hours"] = (window, hours.sum(axis=1))
+        return self._derived["hours"]
+
+    def _points(self, values):
+        # (lat, lon) per value, NaN where the value is missing or has no known coordinates
+        codes, uniques = pd.factorize(pd.Series(values))
+        points = [self.coordinates.get(str(value), (np.nan, np.nan)) for value in uniques] + [(np.nan, np.nan)]
+        points = np.array(points, dtype=np.float64)
+        return points[codes, 0], points[codes, 1]
+
+    def _last_logins(self):
+        # Last login time and point per user, with a trailing "no login" slot that code -1 lands on
+        if "last" not in self._derived:
+            lat, lon = self._points(self.vocabs["geo"].values)
+            geo = np.asarray(self.last_geo)
+            last_lat = np.append(np.append(lat, np.nan)[geo], np.nan)
+            last_lon = np.append(np.append(lon, np.nan)[geo], np.nan)
+            self._derived["last"] = (np.append(self.last_ns, NO_LOGIN), last_lat, last_lon)
+        return self._derived["last"]
+
+    def _travel(self, df, users, ns, geo_column, user_column):
+        """
+        Returns (km, km/h) from each login's previous login by the same user, NaN if unknown.
+        """
+        lat, lon = self._points(df[geo_column])
+        batch_users = pd.factorize(df[user_column])[0]
+        order = np.lexsort((ns, batch_users))
+        sorted_users = batch_users[order]
+        first = np.r_[True, sorted_users[1:] != sorted_users[:-1]]
+
+        prev_ns = np.r_[NO_LOGIN, ns[order][:-1]]
+        prev_lat = np.r_[np.nan, lat[order][:-1]]
+        prev_lon = np.r_[np.nan, lon[order][:-1]]
+
+        # A user's first login in the batch is compared with the last login in the profile
+        last_ns, last_lat, last_lon = self._last_logins()
+        profile_users = users[order][first]
+        prev_ns[first] = last_ns[profile_users]
+        prev_lat[first] = last_lat[profile_users]
+        prev_lon[first] = last_lon[profile_users]
+        # Logins without a user are not chained to each other
+        has_prev = (prev_ns != NO_LOGIN) & (sorted_users >= 0)
+        prev_ns = np.where(has_prev, prev_ns, ns[order])
+        prev_lat[~has_prev] = np.nan
+
+        km = np.empty(len(df))
+        hours = np.empty(len(df))
+        km[order] = _haversine_km(prev_lat, prev_lon, lat[order], lon[order])
+        hours[order] = np.abs(ns[order] - prev_ns) / NS_PER_HOUR
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speed = np.where(km > 0, km / hours, 0.0)
+        speed[np.isnan(km)] = np.nan
+        return km, speed
+
+    def score(self, df):
+        """
+        Flags each login against the profile and returns a DataFrame aligned with df.
+
+        Columns: new_user, novel_<attribute> (a value this user has never
+        used; False where the value is missing), hour_share and off_hours,
+        travel_km, travel_kmh and impossible_travel. The profile is not
+        changed; call update() to fold the batch in.
+        """
+        user_column, columns = self._columns(df)
+        if not len(df):
+            return pd.DataFrame(columns=SCORE_COLUMNS, index=df.index)
+        users = self.users.lookup(df[user_column])
+        known_user = users >= 0
+        ns = frame_epoch_ns(df)
+        flags = {"new_user": ~known_user}
+
+        for attribute, column in columns.items():
+            keys = _pair_keys(users, self.vocabs[attribute].lookup(df[column]))
+            seen = self._known_index(attribute).get_indexer(keys) >= 0
+            flags[f"novel_{attribute}"] = df[column].notna().to_numpy() & ~seen
+
+        share = np.full(len(df), np.nan)
+        if len(self.users):
+            window, totals = self._hour_windows()
+            rows = np.flatnonzero(known_user)
+            hour = hour_of_day(ns[rows])
+            share[rows] = window[users[rows], hour] / np.maximum(totals[users[rows]], 1)
+        flags["hour_share"] = share
+        flags["off_hours"] = known_user & (np.nan_to_num(share, nan=1.0) < OFF_HOURS_SHARE)
+
+        if "geo" in columns:
+            km, speed = self._travel(df, users, ns, columns["geo"], user_column)
+            flags["travel_km"] = km
+            flags["travel_kmh"] = speed
+            flags["impossible_travel"] = (np.nan_to_num(km) >= MIN_TRAVEL_KM) & (np.nan_to_num(speed) > MAX_TRAVEL_KMH)
+
+        return pd.DataFrame(flags, index=df.index)
+
+    def score_chunks(self, chunks, update=False):
+        """
+        Yields one flag frame per DataFrame chunk, e.g. from logio.iter_log.
+
+        With update=True each chunk is folded in after it is scored, so
+        later chunks are checked against everything before them.
+        """
+        for chunk in chunks:
+            yield self.score(chunk)
+            if update:
+                self.update(chunk)
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def _arrays(self):
+        arrays = {"hours": self.hours, "last_ns": self.last_ns, "last_geo": self.last_geo}
+        arrays.update({f"known_{attribute}": keys for attribute, keys in self.known.items()})
+        return arrays
+
+    @classmethod
+    def load(cls, path, mmap=True, coordinates=None):
+        with open(os.path.join(path, "profile.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != PROFILE_VERSION:
+            raise ValueError(f"{path}: unsupported profile version {meta.get('version')}")
+
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in meta["arrays"]}
+        users = Vocab(np.load(os.path.join(path, "vocab_users.npy")))
+        vocabs = {attribute: Vocab(np.load(os.path.join(path, f"vocab_{attribute}.npy"))) for attribute in ATTRIBUTES}
+        return cls(users, vocabs, arrays, meta, coordinates)
+
+    def save(self, path):
+        """
+        Writes the profile directory, replacing any previous one in a single rename.
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        arrays = self._arrays()
+        for name, values in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(values))
+        # Fixed-width unicode arrays load without pickle
+        for name, vocab in [("users", self.users)] + list(self.vocabs.items()):
+            np.save(os.path.join(tmp, f"vocab_{name}.npy"), vocab.values.to_numpy(dtype="U"))
+
+        self.meta.update({"version": PROFILE_VERSION, "arrays": sorted(arrays), "users": len(self.users),
+                          "updated": time.time()})
+        with open(os.path.join(tmp, "profile.json"), "w") as f:
+            json.dump(self.meta, f, indent=4)
+
+        old = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+        return path
+
+
+def build_profile(chunks, coordinates=None):
+    """
+    Builds a LoginProfile from DataFrame chunks of a login history (or a single DataFrame).
+    """
+    profile = LoginProfile(coordinates=coordinates)
+    for chunk in [chunks] if isinstance(chunks, pd.DataFrame) else chunks:
+        profile.update(chunk)
+    return profile
+
+
+# -----------------------------
+# Per-scenario baselines
+# -----------------------------
+def _history_log(scenario, scenarios_dir):
+    log_dir = os.path.join(scenarios_dir, scenario, "logs")
+    name = HISTORIES[scenario]
+    # The newest copy, so a regenerated CSV is never shadowed by an older columnar one
+    paths = _local_candidates(log_dir, name, FORMATS)
+    if not paths:
+        raise FileNotFoundError(f"No {name} log in {log_dir}")
+    return name, paths[0]
+
+
+def profile_path(scenario, profile_dir=PROFILE_DIR):
+    return os.path.join(profile_dir, scenario)
+
+
+def build_baseline(scenario, scenarios_dir=SCENARIOS_DIR, profile_dir=PROFILE_DIR, chunk_size=250_000):
+    """
+    Builds the scenario's profile from its history log, streamed in chunks, and saves it.
+    """
+    if scenario not in HISTORIES:
+        raise KeyError(f"No login history for {scenario}; known: {', '.join(sorted(HISTORIES))}")
+
+    name, path = _history_log(scenario, scenarios_dir)
+    profile = build_profile(iter_log(path, chunk_size))
+    profile.meta.update({"scenario": scenario, "log": name, "log_sha256": file_digest(path), "created": time.time()})
+    profile.save(profile_path(scenario, profile_dir))
+    return profile
+
+
+def baseline_profile(scenario, scenarios_dir=SCENARIOS_DIR, profile_dir=PROFILE_DIR):
+    """
+    Returns the scenario's saved profile, (re)building it if missing or built from an older history.
+
+    Logins folded in with update() and saved stay in the profile until the
+    history log itself changes.
+    """
+    _, path = _history_log(scenario, scenarios_dir)
+    try:
+        profile = LoginProfile.load(profile_path(scenario, profile_dir))
+    except (OSError, ValueError, KeyError):
+        profile = None
+    if profile is None or profile.meta.get("log_sha256") != file_digest(path):
+        profile = build_baseline(scenario, scenarios_dir, profile_dir)
+    return profile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build per-user login baselines and flag new logins against them.")
+    parser.add_argument("--profile-dir", default=PROFILE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Build and save baselines from the scenario login histories.")
+    build.add_argument("scenarios", nargs="*", default=sorted(HISTORIES))
+
+    score = sub.add_parser("score", help="Flag the logins in a log (streamed in chunks) against a baseline.")
+    score.add_argument("scenario")
+    score.add_argument("log")
+    score.add_argument("--chunk-size", type=int, default=250_000)
+    score.add_argument("--update", action="store_true", help="Fold the scored logins into the saved profile.")
+    score.add_argument("--out", default=None, help="Write the log with its flag columns.")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        for scenario in args.scenarios:
+            start = time.perf_counter()
+            profile = build_baseline(scenario, profile_dir=args.profile_dir)
+            print(f"{scenario}: {profile!r} in {time.perf_counter() - start:.2f}s "
+                  f"-> {profile_path(scenario, args.profile_dir)}")
+        return
+
+    profile = baseline_profile(args.scenario, profile_dir=args.profile_dir)
+    chunks = []
+    rows = 0
+    start = time.perf_counter()
+    for chunk in iter_log(args.log, args.chunk_size):
+        flagged = chunk.join(profile.score(chunk))
+        if args.update:
+            profile.update(chunk)
+        rows += len(flagged)
+        suspicious = flagged[flagged[[c for c in FLAG_COLUMNS if c in flagged.columns]].any(axis=1)]
+        chunks.append(flagged if args.out else suspicious)
+    elapsed = time.perf_counter() - start
+
+    result = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+    print(f"Checked {rows} logins in {elapsed:.2f}s")
+    if args.update:
+        profile.save(profile_path(args.scenario, args.profile_dir))
+        print(f"Profile updated: {profile!r}")
+    if args.out:
+        write_log(result, args.out)
+        print(f"Written to {args.out}")
+    else:
+        print(result.head(20).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
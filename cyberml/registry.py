@@ -0,0 +1,142 @@
+"""
+Registry of scenario evaluators with one grading interface.
+
+Every scenario ships evaluation/evaluate_{soc,ml,combined}.py exposing
+score_* functions plus an answer_key.json. The registry discovers them,
+imports each module once and parses each answer key once, then exposes:
+
+    registry = load_registry()
+    grader = registry["scenario_03"]
+    grader.score_soc(soc_output)              # -> {"soc_score", "soc_feedback"}
+    grader.score_ml(ml_output)                # -> {"ml_score", "ml_feedback"}
+    grader.score_combined(soc_output, ml_output)
+    grader.grade(soc_output, ml_output)       # -> evaluation_output.json layout
+
+Scoring calls take already-parsed dicts. Most scorers work on those alone;
+two also read scenario data:
+
+    scenario_03 score_soc    runs the detection rule against the logs in
+                             key["log_dir"] (evaluate_soc.scenario_logs)
+    scenario_03 score_ml     reads the persisted reference model and the
+                             cloud_api_features log (evaluate_ml.reference_score)
+
+Both cache what they load at module level. batch_grade imports the
+evaluators once per worker, so each worker loads the scenario logs and
+reference model once (a per-student dataset is reloaded only when the
+student changes), and it trains the reference models before grading
+starts. Scorers that cannot load their data fall back to scoring the dict
+alone.
+"""
+import importlib.util
+import json
+import os
+
+from cyberml.tracing import span
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+SCENARIOS_DIR = os.path.join(REPO_ROOT, "scenarios")
+
+COMPONENTS = ["soc", "ml", "combined"]
+
+
+def _load_module(path):
+    name = "_".join(os.path.normpath(path).split(os.sep)[-3:]).replace(".py", "")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class ScenarioGrader:
+    """
+    A scenario's score_* functions bound to its parsed answer key.
+    """
+
+    def __init__(self, name, key, soc, ml, combined):
+        self.name = name
+        self.key = key
+        self._soc = soc
+        self._ml = ml
+        self._combined = combined
+
+    @classmethod
+    def from_dir(cls, scenario_dir, key=None):
+        """
+        Imports evaluation/evaluate_*.py and answer_key.json from a scenario folder.
+
+        Pass `key` to grade against a different answer key (e.g. a per-student
+        dataset) without re-importing the evaluators.
+        """
+        eval_dir = os.path.join(scenario_dir, "evaluation")
+        functions = {
+            component: getattr(_load_module(os.path.join(eval_dir, f"evaluate_{component}.py")), f"score_{component}")
+            for component in COMPONENTS
+        }
+
+        if key is None:
+            with open(os.path.join(eval_dir, "answer_key.json")) as f:
+                key = json.load(f)
+
+        return cls(os.path.basename(os.path.normpath(scenario_dir)), key, **functions)
+
+    def with_key(self, key):
+        """
+        Returns a grader sharing these evaluators but scoring against `key`.
+        """
+        return ScenarioGrader(self.name, key, self._soc, self._ml, self._combined)
+
+    def score_soc(self, soc_output):
+        with span(f"evaluate.{self.name}.soc", category="evaluate", rows=1):
+            return self._soc(soc_output, self.key)
+
+    def score_ml(self, ml_output):
+        with span(f"evaluate.{self.name}.ml", category="evaluate", rows=1):
+            return self._ml(ml_output, self.key)
+
+    def score_combined(self, soc_output, ml_output):
+        with span(f"evaluate.{self.name}.combined", category="evaluate", rows=1):
+            return self._combined(soc_output, ml_output, self.key)
+
+    def grade(self, soc_output, ml_output):
+        """
+        Runs all three evaluators and returns the evaluation_output.json layout.
+        """
+        soc = self.score_soc(soc_output)
+        ml = self.score_ml(ml_output)
+        combined = self.score_combined(soc_output, ml_output)
+
+        return {
+            "scenario": self.name,
+            "soc": soc,
+            "ml": ml,
+            "combined": combined,
+            "total_score": soc["soc_score"] + ml["ml_score"] + combined["combined_score"]
+        }
+
+    def __repr__(self):
+        return f"ScenarioGrader({self.name!r})"
+
+
+def discover_scenarios(scenarios_dir=SCENARIOS_DIR):
+    """
+    Returns {scenario_name: scenario_dir} for every gradable scenario.
+
+    A scenario is gradable when it has evaluation/answer_key.json and all
+    three evaluate_*.py modules; `_template` and similar folders are skipped.
+    """
+    found = {}
+    for name in sorted(os.listdir(scenarios_dir)):
+        eval_dir = os.path.join(scenarios_dir, name, "evaluation")
+        required = ["answer_key.json"] + [f"evaluate_{c}.py" for c in COMPONENTS]
+
+        if name.startswith("_") or not all(os.path.exists(os.path.join(eval_dir, r)) for r in required):
+            continue
+        found[name] = os.path.join(scenarios_dir, name)
+    return found
+
+
+def load_registry(scenarios_dir=SCENARIOS_DIR):
+    """
+    Returns {scenario_name: ScenarioGrader} for every discovered scenario.
+    """
+    return {name: ScenarioGrader.from_dir(path) for name, path in discover_scenarios(scenarios_dir).items()}
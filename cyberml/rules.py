@@ -0,0 +1,560 @@
+"""
+A small detection-rule language, compiled to vectorized masks over log DataFrames.
+
+A rule is a boolean expression over log fields, optionally followed by a
+count threshold:
+
+    event_name in ("CreateAccessKey", "AttachRolePolicy") and source_ip not cidr "10.0.0.0/8"
+    bucket == "sensitive-data" and bytes_read > 50000
+    timestamp between "2026-02-02T13:40:00Z" and "2026-02-02T14:00:00Z" and region like "eu-*"
+    event_name == "ConsoleLogin" | count >= 3 by user, source_ip within 10min
+
+Predicates: == != < <= > >= (numbers, strings, timestamps), in / not in
+(lists), between ... and ..., contains, like (shell-style * and ?), and cidr
+(one block or a list). Combine with and / or / not and parentheses.
+"| count OP N [by fields] [within duration]" keeps the matching rows whose
+group reaches the threshold; with `within`, only rows inside a window of
+that length that reaches it.
+
+Rules compile once (compile_rule caches them) and run against any DataFrame
+that has their fields. String predicates are evaluated on each column's
+distinct values and broadcast through its codes, so a rule costs a few
+array passes per predicate even on million-row logs:
+
+    rule = compile_rule('user == "cloud_eng_2" and source_ip cidr "185.199.110.0/24"')
+    flagged = rule.mask(df)
+
+From the command line:
+
+    python -m cyberml.rules 'event_name == "AssumeRole"' scenarios/scenario_03/logs/cloud_iam.csv
+"""
+import argparse
+import fnmatch
+import re
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from cyberml.ipaddr import in_cidrs, ipv4_column
+from cyberml.logio import TIMESTAMP_COLUMN, read_log
+from cyberml.timestamps import EPOCH_NS_COLUMN, epoch_ns_column, parse_epoch_ns
+
+
+class RuleError(ValueError):
+    """
+    Raised for rules that do not parse or reference fields a log lacks.
+    """
+
+
+# -----------------------------
+# Tokenizer
+# -----------------------------
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>==|!=|<=|>=|<|>|\(|\)|,|\|)
+      | (?P<word>[^\s"'(),|<>=!]+)
+    )""", re.VERBOSE)
+
+KEYWORDS = {"and", "or", "not", "in", "between", "contains", "like", "cidr", "count", "by", "within"}
+COMPARISONS = {"==", "!=", "<", "<=", ">", ">="}
+
+_NUMBER = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise RuleError(f"Unexpected character at {position}: {text[position:position + 10]!r}")
+        position = match.end()
+
+        if match.group("string") is not None:
+            tokens.append(("string", re.sub(r"\\(.)", r"\1", match.group("string")[1:-1])))
+        elif match.group("op") is not None:
+            tokens.append(("op", match.group("op")))
+        else:
+            word = match.group("word")
+            if word.lower() in KEYWORDS:
+                tokens.append(("keyword", word.lower()))
+            elif _NUMBER.match(word):
+                tokens.append(("number", float(word) if "." in word else int(word)))
+            else:
+                tokens.append(("word", word))
+    return tokens
+
+
+# -----------------------------
+# Evaluation context
+# -----------------------------
+class RuleContext:
+    """
+    One DataFrame plus the per-column encodings rules derive from it.
+
+    Share a context between rules run on the same log so factorized codes,
+    parsed timestamps and IPv4 integers are computed once.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._cache = {}
+
+    def _cached(self, kind, field, build):
+        key = (kind, field)
+        if key not in self._cache:
+            self._cache[key] = build(self.column(field))
+        return self._cache[key]
+
+    def column(self, field):
+        if field not in self.df.columns:
+            raise RuleError(f"Log has no field {field!r}")
+        return self.df[field]
+
+    def kind(self, field):
+        values = self.column(field)
+        if field == TIMESTAMP_COLUMN or pd.api.types.is_datetime64_any_dtype(values):
+            return "time"
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            return "number"
+        return "string"
+
+    def factorized(self, field):
+        """
+        Returns (codes, distinct values as str); code -1 marks missing values.
+        """
+        def build(values):
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                codes, uniques = pd.factorize(values)
+            return codes.astype(np.int64), pd.Index(uniques).astype(str)
+
+        return self._cached("codes", field, build)
+
+    def times(self, field=TIMESTAMP_COLUMN):
+        if field == TIMESTAMP_COLUMN and EPOCH_NS_COLUMN in self.df.columns:
+            # Generated logs carry epoch nanoseconds; read those instead of the strings
+            return self._cached("times", EPOCH_NS_COLUMN, epoch_ns_column)
+        return self._cached("times", field, parse_epoch_ns)
+
+    def numbers(self, field):
+        return self._cached("numbers", field, lambda values: values.to_numpy(dtype="float64", na_value=np.nan))
+
+    def ipv4(self, field):
+        return self._cached("ipv4", field, ipv4_column)
+
+
+def _broadcast(ctx, field, lookup):
+    # lookup is a mask over the distinct values; missing values never match
+    codes, _ = ctx.factorized(field)
+    return np.append(np.asarray(lookup, dtype=bool), False)[codes]
+
+
+def _timestamp(value):
+    try:
+        return int(parse_epoch_ns([value])[0])
+    except (ValueError, TypeError) as e:
+        raise RuleError(f"Not a timestamp: {value!r}") from e
+
+
+_COMPARE = {
+    "==": np.equal,
+    "!=": np.not_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+# -----------------------------
+# Syntax tree
+# -----------------------------
+class _Predicate:
+    def __init__(self, field, op, values):
+        self.field = field
+        self.op = op
+        self.values = values
+
+    @property
+    def fields(self):
+        return {self.field}
+
+    def _operands(self, ctx):
+        # The column and literal values in a comparable representation
+        kind = ctx.kind(self.field)
+        if kind == "time":
+            return ctx.times(self.field), [_timestamp(v) for v in self.values]
+        if kind == "number":
+            try:
+                return ctx.numbers(self.field), [float(v) for v in self.values]
+            except ValueError as e:
+                raise RuleError(f"{self.field} is numeric; cannot compare with {self.values}") from e
+        return None, [str(v) for v in self.values]
+
+    def mask(self, ctx):
+        op = self.op
+        if op == "contains":
+            _, uniques = ctx.factorized(self.field)
+            lookup = np.zeros(len(uniques), dtype=bool)
+            for value in self.values:
+                lookup |= np.asarray(uniques.str.contains(str(value), regex=False), dtype=bool)
+            return _broadcast(ctx, self.field, lookup)
+
+        if op == "like":
+            _, uniques = ctx.factorized(self.field)
+            pattern = "|".join(fnmatch.translate(str(v)) for v in self.values)
+            return _broadcast(ctx, self.field, uniques.str.match(pattern))
+
+        if op in ("cidr", "not cidr"):
+            ints, valid = ctx.ipv4(self.field)
+            try:
+                mask = in_cidrs(ints, valid, [str(v) for v in self.values])
+            except ValueError as e:
+                raise RuleError(str(e)) from e
+            return ~mask if op == "not cidr" else mask
+
+        column, values = self._operands(ctx)
+        if column is None:
+            # Strings: decide per distinct value, then broadcast through the codes
+            _, uniques = ctx.factorized(self.field)
+            column = uniques.to_numpy(dtype=object)
+            mask = self._apply(column, values)
+            if op in ("!=", "not in"):
+                return ~_broadcast(ctx, self.field, ~mask)
+            return _broadcast(ctx, self.field, mask)
+        return self._apply(column, values)
+
+    def _apply(self, column, values):
+        op = self.op
+        if op in ("in", "not in"):
+            mask = np.isin(column, values)
+            return ~mask if op == "not in" else mask
+        if op == "between":
+            return (column >= values[0]) & (column <= values[1])
+        return _COMPARE[op](column, values[0])
+
+
+class _And:
+    def __init__(self, *parts):
+        self.parts = parts
+
+    @property
+    def fields(self):
+        return set().union(*(p.fields for p in self.parts))
+
+    def mask(self, ctx):
+        result = self.parts[0].mask(ctx)
+        for part in self.parts[1:]:
+            result = result & part.mask(ctx)
+        return result
+
+
+class _Or(_And):
+    def mask(self, ctx):
+        result = self.parts[0].mask(ctx)
+        for part in self.parts[1:]:
+            result = result | part.mask(ctx)
+        return result
+
+
+class _Not:
+    def __init__(self, part):
+        self.part = part
+
+    @property
+    def fields(self):
+        return self.part.fields
+
+    def mask(self, ctx):
+        return ~self.part.mask(ctx)
+
+
+class _Count:
+    """
+    "| count OP N [by fields] [within duration]" applied to the rows of `where`.
+    """
+
+    def __init__(self, op, threshold, by, within):
+        self.op = op
+        self.threshold = threshold
+        self.by = by
+        self.within = within
+
+    @property
+    def fields(self):
+        return set(self.by) | ({TIMESTAMP_COLUMN} if self.within is not None else set())
+
+    def _groups(self, ctx, rows):
+        group = np.zeros(len(rows), dtype=np.int64)
+        for field in self.by:
+            codes, uniques = ctx.factorized(field)
+            group = group * (len(uniques) + 1) + codes[rows] + 1
+            group = np.unique(group, return_inverse=True)[1].reshape(-1)
+        return group
+
+    def mask(self, ctx, where):
+        rows = np.flatnonzero(where)
+        result = np.zeros(len(where), dtype=bool)
+        if not len(rows):
+            return result
+
+        compare = _COMPARE[self.op]
+        group = self._groups(ctx, rows)
+        if self.within is None:
+            counts = np.bincount(group)
+            result[rows] = compare(counts[group], self.threshold)
+            return result
+
+        # Sort by (group, time); count of each row's trailing window via one searchsorted
+        times = ctx.times()[rows]
+        order = np.lexsort((times, group))
+        group, times = group[order], times[order]
+        distinct = np.unique(times)
+        stride = len(distinct) + 1
+        packed = group * stride + np.searchsorted(distinct, times)
+        lower = group * stride + np.searchsorted(distinct, times - self.within)
+        position = np.arange(len(rows))
+        fired = np.flatnonzero(compare(position - np.searchsorted(packed, lower) + 1, self.threshold))
+
+        # A row is flagged when a firing window (same group, ending within `within` after it) covers it
+        if len(fired):
+            nxt = np.searchsorted(fired, position)
+            has_next = nxt < len(fired)
+            target = fired[np.minimum(nxt, len(fired) - 1)]
+            covered = has_next & (group[target] == group) & (times[target] - times <= self.within)
+            result[rows[order[covered]]] = True
+        return result
+
+
+class Rule:
+    """
+    A compiled rule: mask(df) returns a boolean array of the rows it flags.
+    """
+
+    def __init__(self, text, where, count=None):
+        self.text = text
+        self.where = where
+        self.count = count
+
+    @property
+    def fields(self):
+        fields = self.where.fields
+        return fields | self.count.fields if self.count is not None else fields
+
+    def applies_to(self, df):
+        return self.fields <= set(df.columns)
+
+    def mask(self, data):
+        """
+        Evaluates the rule on a DataFrame (or a shared RuleContext).
+        """
+        ctx = data if isinstance(data, RuleContext) else RuleContext(data)
+        where = self.where.mask(ctx)
+        return self.count.mask(ctx, where) if self.count is not None else where
+
+    def matches(self, df):
+        return df[self.mask(df)]
+
+    def __repr__(self):
+        return f"Rule({self.text!r})"
+
+
+# -----------------------------
+# Parser
+# -----------------------------
+class _Parser:
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def peek(self, kind=None, value=None):
+        if self.position >= len(self.tokens):
+            return None
+        token = self.tokens[self.position]
+        if (kind is not None and token[0] != kind) or (value is not None and token[1] != value):
+            return None
+        return token
+
+    def take(self, kind=None, value=None):
+        token = self.peek(kind, value)
+        if token is not None:
+            self.position += 1
+        return token
+
+    def expect(self, kind, value=None, what=None):
+        token = self.take(kind, value)
+        if token is None:
+            found = self.tokens[self.position][1] if self.position < len(self.tokens) else "end of rule"
+            raise RuleError(f"Expected {what or value or kind}, found {found!r}")
+        return token
+
+    def parse(self):
+        where = self.parse_or()
+        count = self.parse_count() if self.take("op", "|") else None
+        if self.position != len(self.tokens):
+            raise RuleError(f"Unexpected {self.tokens[self.position][1]!r}")
+        return where, count
+
+    def parse_or(self):
+        parts = [self.parse_and()]
+        while self.take("keyword", "or"):
+            parts.append(self.parse_and())
+        return parts[0] if len(parts) == 1 else _Or(*parts)
+
+    def parse_and(self):
+        parts = [self.parse_not()]
+        while self.take("keyword", "and"):
+            parts.append(self.parse_not())
+        return parts[0] if len(parts) == 1 else _And(*parts)
+
+    def parse_not(self):
+        if self.take("keyword", "not"):
+            return _Not(self.parse_not())
+        if self.take("op", "("):
+            node = self.parse_or()
+            self.expect("op", ")")
+            return node
+        return self.parse_predicate()
+
+    def value(self):
+        token = self.take("string") or self.take("number") or self.take("word")
+        if token is None:
+            self.expect("string", what="a value")
+        return token[1]
+
+    def values(self):
+        if not self.take("op", "("):
+            return [self.value()]
+        values = [self.value()]
+        while self.take("op", ","):
+            values.append(self.value())
+        self.expect("op", ")")
+        return values
+
+    def parse_predicate(self):
+        field = self.expect("word", what="a field name")[1]
+
+        token = self.take("op")
+        if token is not None:
+            if token[1] not in COMPARISONS:
+                raise RuleError(f"Unexpected {token[1]!r} after {field}")
+            return _Predicate(field, token[1], [self.value()])
+
+        negated = bool(self.take("keyword", "not"))
+        keyword = self.expect("keyword", what=f"an operator after {field}")[1]
+        if keyword == "between" and not negated:
+            low = self.value()
+            self.expect("keyword", "and")
+            return _Predicate(field, "between", [low, self.value()])
+        if keyword in ("in", "cidr"):
+            return _Predicate(field, f"not {keyword}" if negated else keyword, self.values())
+        if keyword in ("contains", "like"):
+            predicate = _Predicate(field, keyword, self.values())
+            return _Not(predicate) if negated else predicate
+        raise RuleError(f"Unexpected {keyword!r} after {field}")
+
+    def parse_count(self):
+        self.expect("keyword", "count")
+        op = self.expect("op", what="a comparison after count")[1]
+        if op not in COMPARISONS:
+            raise RuleError(f"Unexpected {op!r} after count")
+        threshold = self.expect("number", what="a count threshold")[1]
+
+        by = []
+        if self.take("keyword", "by"):
+            by.append(self.expect("word", what="a field name")[1])
+            while self.take("op", ","):
+                by.append(self.expect("word", what="a field name")[1])
+
+        within = None
+        if self.take("keyword", "within"):
+            duration = self.value()
+            try:
+                within = pd.Timedelta(duration).value
+            except ValueError as e:
+                raise RuleError(f"Not a duration: {duration!r}") from e
+        return _Count(op, threshold, by, within)
+
+
+@lru_cache(maxsize=1024)
+def compile_rule(text):
+    """
+    Parses rule text into a Rule; raises RuleError for invalid rules.
+    """
+    if not isinstance(text, str) or not text.strip():
+        raise RuleError("Empty rule")
+    where, count = _Parser(text).parse()
+    return Rule(text, where, count)
+
+
+# -----------------------------
+# Grading
+# -----------------------------
+def grade_rule(rule, logs, attack_rules):
+    """
+    Runs a rule against every log it applies to and scores it against the attack rows.
+
+    logs maps log name -> DataFrame; attack_rules maps log name -> rule (text
+    or Rule) selecting that log's true attack rows. Raises RuleError when the
+    rule is not rule text or a Rule, is invalid, or applies to none of the logs.
+    """
+    if isinstance(rule, str):
+        rule = compile_rule(rule)
+    elif not isinstance(rule, Rule):
+        raise RuleError(f"Not a rule: {type(rule).__name__}")
+    applicable = [name for name, df in logs.items() if rule.applies_to(df)]
+    if not applicable:
+        raise RuleError(f"No log has all of the fields {sorted(rule.fields)}")
+
+    tp = fp = fn = 0
+    for name in applicable:
+        ctx = RuleContext(logs[name])
+        flagged = rule.mask(ctx)
+        truth = attack_rules.get(name)
+        truth = (compile_rule(truth) if isinstance(truth, str) else truth).mask(ctx) if truth is not None \
+            else np.zeros(len(flagged), dtype=bool)
+
+        tp += int((flagged & truth).sum())
+        fp += int((flagged & ~truth).sum())
+        fn += int((~flagged & truth).sum())
+
+    return {
+        "logs": applicable,
+        "true_positives": tp,
+        "false_positives": fp,
+        "false_negatives": fn,
+        "precision": tp / (tp + fp) if tp + fp else 0.0,
+        "recall": tp / (tp + fn) if tp + fn else 0.0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a detection rule against log files.")
+    parser.add_argument("rule", help='e.g. \'event_name == "AssumeRole" and source_ip not cidr "10.0.0.0/8"\'')
+    parser.add_argument("logs", nargs="+", help="Log files (csv/parquet/feather).")
+    parser.add_argument("--show", type=int, default=10, help="Matching rows to print per log.")
+    args = parser.parse_args(argv)
+
+    rule = compile_rule(args.rule)
+    for path in args.logs:
+        df = read_log(path)
+        if not rule.applies_to(df):
+            print(f"{path}: skipped (missing {sorted(rule.fields - set(df.columns))})")
+            continue
+
+        start = time.perf_counter()
+        mask = rule.mask(df)
+        elapsed = time.perf_counter() - start
+        print(f"{path}: {int(mask.sum())} of {len(df)} rows in {elapsed * 1000:.1f} ms")
+        if args.show:
+            print(df[mask].head(args.show).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Sessionization for authentication and cloud IAM logs.
+
+Events are grouped into sessions keyed by (user, source_ip): a session ends
+once that key has been quiet for longer than `gap`. Logs are consumed in one
+pass, chunk by chunk, so arbitrarily large logs stream through with memory
+bounded by the chunk size plus the sessions still open:
+
+    from cyberml.logio import iter_log
+    from cyberml.sessions import sessionize
+    for session in sessionize(iter_log("scenarios/scenario_03/logs/cloud_iam.csv"), gap="30min"):
+        print(session["user"], session["sequence"])
+
+Each session is a compact summary: start/end, duration, event count, the
+event sequence (consecutive repeats collapsed, e.g.
+"ConsoleLogin -> CreateAccessKey -> AttachRolePolicy -> AssumeRole") and
+the set of regions seen; start/end are epoch nanoseconds until
+sessions_to_frame() turns them into UTC timestamps. From the command line:
+
+    python -m cyberml.sessions scenarios/scenario_03/logs/cloud_iam.csv --gap 30min --min-events 2
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from cyberml.logio import iter_log, write_log
+from cyberml.timestamps import frame_epoch_ns
+
+DEFAULT_GAP = "30min"
+
+# Longest event sequence kept per session, in runs of repeated events
+MAX_RUNS = 32
+
+# Column choices per log layout: scenario_03 IAM first, then scenario_01 auth
+USER_COLUMNS = ("user", "username")
+EVENT_COLUMNS = ("event_name", "destination_host", "event_type", "auth_result", "result")
+REGION_COLUMNS = ("region", "geo_location")
+IP_COLUMN = "source_ip"
+
+SESSION_COLUMNS = [
+    "session_id",
+    "user",
+    "source_ip",
+    "start",
+    "end",
+    "duration_s",
+    "event_count",
+    "sequence",
+    "regions",
+]
+
+
+def _pick(columns, candidates, name):
+    for column in candidates:
+        if column in columns:
+            return column
+    raise KeyError(f"No {name} column; expected one of {', '.join(candidates)}")
+
+
+def _categories(values):
+    # Categorical codes plus a name lookup where code -1 (missing) maps to None
+    values = values.astype("category").array
+    names = np.append(values.categories.astype(str).to_numpy(dtype=object), None)
+    return values.codes.astype(np.int64), names
+
+
+class _Session:
+    __slots__ = ("user", "source_ip", "start", "end", "count", "runs", "truncated", "regions")
+
+    def __init__(self, user, source_ip, start, end, count, runs, truncated, regions):
+        self.user = user
+        self.source_ip = source_ip
+        self.start = start
+        self.end = end
+        self.count = count
+        self.runs = runs
+        self.truncated = truncated
+        self.regions = regions
+
+    def extend(self, other):
+        # Append a later piece of the same session (e.g. from the next chunk)
+        self.start = min(self.start, other.start)
+        self.end = max(self.end, other.end)
+        self.count += other.count
+        self.regions |= other.regions
+
+        runs = other.runs
+        if self.runs and runs and self.runs[-1][0] == runs[0][0]:
+            self.runs[-1][1] += runs[0][1]
+            runs = runs[1:]
+        room = MAX_RUNS - len(self.runs)
+        self.runs.extend(runs[:room])
+        self.truncated = self.truncated or other.truncated or len(runs) > room
+
+    def summary(self, session_id):
+        steps = [name if n == 1 else f"{name} x{n}" for name, n in self.runs]
+        if self.truncated:
+            steps.append("...")
+        return {
+            "session_id": session_id,
+            "user": self.user,
+            "source_ip": self.source_ip,
+            "start": self.start,
+            "end": self.end,
+            "duration_s": (self.end - self.start) / 1e9,
+            "event_count": self.count,
+            "sequence": " -> ".join(steps),
+            "regions": sorted(self.regions)
+        }
+
+
+class Sessionizer:
+    """
+    Incremental sessionizer: feed() time-ordered chunks, then flush().
+
+    Rows inside a chunk may be in any order; chunks themselves must follow
+    each other in time, as generator output and log files do.
+    """
+
+    def __init__(self, gap=DEFAULT_GAP, user_col=None, ip_col=IP_COLUMN, event_col=None, region_col=None):
+        self.gap = pd.Timedelta(gap).value
+        self.user_col = user_col
+        self.ip_col = ip_col
+        self.event_col = event_col
+        self.region_col = region_col
+
+        self.open = {}
+        self.next_id = 0
+
+    def _resolve(self, columns):
+        if self.user_col is None:
+            self.user_col = _pick(columns, USER_COLUMNS, "user")
+        if self.event_col is None:
+            self.event_col = _pick(columns, EVENT_COLUMNS, "event")
+        if self.region_col is None:
+            self.region_col = next((c for c in REGION_COLUMNS if c in columns), False)
+
+    def _segments(self, chunk):
+        # Split one chunk into per-key pieces separated by more than `gap`, all vectorized
+        n = len(chunk)
+        times = frame_epoch_ns(chunk)
+        user_codes, user_names = _categories(chunk[self.user_col])
+        ip_codes, ip_names = _categories(chunk[self.ip_col])
+        event_codes, event_names = _categories(chunk[self.event_col])
+
+        # Shift codes by one so missing (-1) is a value of its own; len(ip_names) counts that slot
+        n_ips = len(ip_names)
+        key = (user_codes + 1) * n_ips + (ip_codes + 1)
+        order = np.lexsort((times, key))
+        key, times, event_codes = key[order], times[order], event_codes[order]
+
+        new = np.ones(n, dtype=bool)
+        new[1:] = (key[1:] != key[:-1]) | (times[1:] - times[:-1] > self.gap)
+        first = np.flatnonzero(new)
+        last = np.append(first[1:] - 1, n - 1)
+        seg = np.cumsum(new) - 1
+        n_seg = len(first)
+
+        # Runs of repeated events, keeping at most MAX_RUNS per segment
+        run_start = new.copy()
+        run_start[1:] |= event_codes[1:] != event_codes[:-1]
+        runs = np.flatnonzero(run_start)
+        run_len = np.diff(np.append(runs, n))
+        run_seg = seg[runs]
+        run_rank = np.arange(len(runs)) - np.searchsorted(run_seg, run_seg, side="left")
+        keep = run_rank < MAX_RUNS
+        truncated = np.bincount(run_seg[~keep], minlength=n_seg) > 0
+        runs, run_len, run_seg = runs[keep], run_len[keep], run_seg[keep]
+        run_names = event_names[event_codes[runs]]
+        run_bounds = np.searchsorted(run_seg, np.arange(n_seg + 1))
+
+        # Distinct regions per segment
+        if self.region_col:
+            region_codes, region_names = _categories(chunk[self.region_col])
+            region_codes = region_codes[order]
+            pairs = np.unique(seg * (len(region_names) + 1) + region_codes + 1)
+            pair_seg = pairs // (len(region_names) + 1)
+            pair_names = region_names[pairs % (len(region_names) + 1) - 1]
+            region_bounds = np.searchsorted(pair_seg, np.arange(n_seg + 1))
+        else:
+            pair_names, region_bounds = np.empty(0, dtype=object), np.zeros(n_seg + 1, dtype=np.int64)
+
+        # Plain Python lists: per-session access to numpy scalars dominates otherwise
+        seg_key = key[first]
+        users = user_names[seg_key // n_ips - 1].tolist()
+        ips = ip_names[seg_key % n_ips - 1].tolist()
+        starts, ends = times[first].tolist(), times[last].tolist()
+        counts = (last - first + 1).tolist()
+        run_names, run_len, run_bounds = run_names.tolist(), run_len.tolist(), run_bounds.tolist()
+        pair_names, region_bounds = pair_names.tolist(), region_bounds.tolist()
+        truncated = truncated.tolist()
+
+        for i, code in enumerate(seg_key.tolist()):
+            r0, r1 = run_bounds[i], run_bounds[i + 1]
+            regions = pair_names[region_bounds[i]:region_bounds[i + 1]]
+            yield code, _Session(
+                users[i],
+                ips[i],
+                starts[i],
+                ends[i],
+                counts[i],
+                [[name, length] for name, length in zip(run_names[r0:r1], run_len[r0:r1])],
+                truncated[i],
+                {r for r in regions if r is not None},
+            )
+
+    def _emit(self, sessions):
+        out = []
+        for session in sorted(sessions, key=lambda s: (s.start, s.user or "", s.source_ip or "")):
+            out.append(session.summary(self.next_id))
+            self.next_id += 1
+        return out
+
+    def feed(self, chunk):
+        """
+        Adds a chunk of events and returns the sessions it closed.
+        """
+        if chunk.empty:
+            return []
+        self._resolve(chunk.columns)
+
+        closed = []
+        previous = None
+        pieces = list(self._segments(chunk))
+
+        for i, (code, piece) in enumerate(pieces):
+            key = (piece.user, piece.source_ip)
+
+            if code != previous:
+                carried = self.open.pop(key, None)
+                if carried is not None:
+                    if piece.start - carried.end <= self.gap:
+                        carried.extend(piece)
+                        piece = carried
+                    else:
+                        closed.append(carried)
+
+            if i + 1 == len(pieces) or pieces[i + 1][0] != code:
+                self.open[key] = piece
+            else:
+                closed.append(piece)
+            previous = code
+
+        # Anything quiet for longer than the gap before this chunk's last event is over
+        horizon = max(s.end for s in self.open.values()) - self.gap
+        for key in [k for k, s in self.open.items() if s.end < horizon]:
+            closed.append(self.open.pop(key))
+
+        return self._emit(closed)
+
+    def flush(self):
+        """
+        Closes and returns every session still open.
+        """
+        closed, self.open = list(self.open.values()), {}
+        return self._emit(closed)
+
+
+def sessionize(chunks, gap=DEFAULT_GAP, **columns):
+    """
+    Yields session summaries from an iterable of time-ordered log chunks.
+    """
+    sessionizer = Sessionizer(gap, **columns)
+    for chunk in chunks:
+        yield from sessionizer.feed(chunk)
+    yield from sessionizer.flush()
+
+
+def sessionize_frame(df, gap=DEFAULT_GAP, **columns):
+    """
+    Returns the sessions of an in-memory log as a DataFrame, earliest first.
+    """
+    return sessions_to_frame(sessionize([df], gap, **columns))
+
+
+def sessions_to_frame(sessions):
+    """
+    Collects session summaries into a DataFrame with UTC start/end timestamps.
+    """
+    frame = pd.DataFrame(list(sessions), columns=SESSION_COLUMNS)
+    for column in ("start", "end"):
+        frame[column] = pd.to_datetime(frame[column].astype("int64"), unit="ns", utc=True)
+    frame["regions"] = frame["regions"].map(",".join)
+    return frame.sort_values(["start", "session_id"], kind="stable").reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Group auth / IAM events into (user, source_ip) sessions.")
+    parser.add_argument("log", help="Log file (csv/parquet/feather), e.g. logs/cloud_iam.csv")
+    parser.add_argument("--gap", default=DEFAULT_GAP, help="Inactivity that ends a session.")
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    parser.add_argument("--min-events", type=int, default=1, help="Only report sessions with this many events.")
+    parser.add_argument("--out", default=None, help="Write sessions to csv/parquet/feather.")
+    args = parser.parse_args(argv)
+
+    sessions = (s for s in sessionize(iter_log(args.log, args.chunk_size), args.gap)
+                if s["event_count"] >= args.min_events)
+    frame = sessions_to_frame(sessions)
+
+    if args.out:
+        write_log(frame, args.out)
+        print(f"{len(frame)} sessions written to {args.out}")
+    else:
+        print(frame.drop(columns=["session_id"]).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
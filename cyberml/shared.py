@@ -0,0 +1,200 @@
+"""
+Memory-mapped scenario logs shared by every notebook kernel on a host.
+
+On a shared JupyterHub every kernel used to parse its own private copy of
+cloud_api.csv, so memory grew with the number of students. Publishing a
+scenario writes each log once, as an uncompressed Arrow IPC file holding
+a single record batch:
+
+    python -m cyberml.logcache publish scenario_02 scenario_03
+    CYBERML_SHARED_DIR=/srv/cyberml/shared python -m cyberml.logcache publish scenario_03
+
+Kernels then map those files. Timestamp, numeric, categorical code and
+string columns all point straight into the mapping, so every kernel reads
+the one copy in the page cache and opening a log takes milliseconds
+whatever its size:
+
+    df = load_shared_log("scenario_03", "cloud_api")
+    latency = df["latency_ms"].to_numpy()        # a view of the mapped file
+
+The mapping is private (copy-on-write): a notebook can still modify its
+frames, and only the pages it writes to become its own. The published
+file never changes. load_scenario_log picks up a published copy on its
+own while the copy's source digest still matches the scenario manifest.
+Republishing replaces files instead of rewriting them, so kernels that
+already mapped the old copy keep reading it.
+"""
+import json
+import mmap
+import os
+
+import numpy as np
+import pandas as pd
+
+from cyberml.logio import _require_pyarrow, apply_log_types
+from cyberml.tracing import span
+
+SHARED_DIR = os.environ.get("CYBERML_SHARED_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "cyberml", "shared"
+)
+PUBLISHED_NAME = "published.json"
+SHARED_SUFFIX = ".arrow"
+
+
+# -----------------------------
+# Layout
+# -----------------------------
+def shared_path(shared_dir, scenario, name):
+    """
+    Builds the path of a published log, e.g. shared_path(root, "scenario_03", "cloud_api").
+    """
+    stem = os.path.splitext(name)[0]
+    return os.path.join(shared_dir or SHARED_DIR, scenario, stem + SHARED_SUFFIX)
+
+
+def read_published(shared_dir, scenario):
+    """
+    Returns {log name: {"source", "sha256", "rows"}} for a published scenario, or {}.
+    """
+    path = os.path.join(shared_dir or SHARED_DIR, scenario, PUBLISHED_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get("files", {})
+
+
+def write_published(shared_dir, scenario, files):
+    """
+    Writes <shared_dir>/<scenario>/published.json and returns its contents.
+    """
+    path = os.path.join(shared_dir or SHARED_DIR, scenario, PUBLISHED_NAME)
+    published = {"files": dict(sorted(files.items()))}
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(published, f, indent=4)
+    os.replace(tmp, path)
+    return published
+
+
+# -----------------------------
+# Writing and mapping
+# -----------------------------
+def write_shared_log(df, path):
+    """
+    Writes a log as an uncompressed single-batch Arrow IPC file that maps without copies.
+
+    The file is written beside `path` and moved into place, never rewritten
+    in place: truncating a file that other kernels have mapped would crash
+    them.
+    """
+    _require_pyarrow("shared")
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    typed = apply_log_types(df).reset_index(drop=True)
+    # One contiguous chunk per column; several chunks would be concatenated (copied) on load
+    table = pa.Table.from_pandas(typed, preserve_index=False).combine_chunks()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with span(f"write_shared_log:{os.path.basename(path)}", category="write", rows=len(typed)):
+        try:
+            feather.write_feather(table, tmp, compression="uncompressed", chunksize=max(len(typed), 1))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        os.replace(tmp, path)
+    return path
+
+
+def _map(path, columns=None):
+    import pyarrow as pa
+
+    # Private mapping: pages stay shared with every other kernel until this one writes to them
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    buffer = pa.py_buffer(mapping)
+    table = pa.ipc.open_file(pa.BufferReader(buffer)).read_all()
+    return mapping, buffer.address, table.select(columns) if columns is not None else table
+
+
+def map_shared_log(path, columns=None):
+    """
+    Maps a published log and returns it as a pyarrow Table whose buffers live in the mapping.
+
+    The mapping stays open for as long as anything references the table.
+    """
+    _require_pyarrow("shared")
+    return _map(path, columns)[2]
+
+
+def _view(mapping, base, array, dtype):
+    # A writable NumPy view of an Arrow array's value buffer inside the mapping
+    dtype = np.dtype(dtype)
+    offset = array.buffers()[1].address - base + array.offset * dtype.itemsize
+    return np.frombuffer(mapping, dtype=dtype, count=len(array), offset=offset)
+
+
+def _shared_column(mapping, base, column):
+    """
+    Returns a column as pandas data backed by the mapping, or None if pyarrow has to convert it.
+
+    pyarrow's own zero-copy conversion hands out read-only arrays, which
+    pandas cannot assign into, so fixed-width columns are viewed directly.
+    """
+    import pyarrow as pa
+
+    if column.num_chunks != 1 or column.null_count:
+        return None
+    chunk = column.chunks[0]
+    kind = chunk.type
+
+    if pa.types.is_dictionary(kind):
+        codes = _view(mapping, base, chunk.indices, kind.index_type.to_pandas_dtype())
+        categories = pd.CategoricalDtype(chunk.dictionary.to_pandas(), ordered=kind.ordered)
+        return pd.Categorical.from_codes(codes, dtype=categories)
+    if pa.types.is_timestamp(kind):
+        ticks = _view(mapping, base, chunk, np.int64)
+        if kind.tz is None:
+            return ticks.view(f"datetime64[{kind.unit}]")
+        # Reinterpreting int64 ticks as a tz-aware dtype keeps the buffer; tz_localize would copy
+        return pd.Series(ticks, copy=False).astype(pd.DatetimeTZDtype(kind.unit, kind.tz))
+    if pa.types.is_integer(kind) or pa.types.is_floating(kind):
+        return _view(mapping, base, chunk, kind.to_pandas_dtype())
+    return None
+
+
+def read_shared_log(path, columns=None):
+    """
+    Maps a published log and returns the typed DataFrame read_log would, without copying it.
+
+    Strings stay in Arrow's buffers; columns with missing values and
+    booleans (bit-packed in Arrow) are converted and so are not shared.
+    """
+    _require_pyarrow("shared")
+    with span(f"read_shared_log:{os.path.basename(path)}", category="read"):
+        mapping, base, table = _map(path, columns)
+
+        data = {name: _shared_column(mapping, base, table.column(name)) for name in table.column_names}
+        rest = [name for name, values in data.items() if values is None]
+        if rest:
+            # split_blocks keeps every column in its own block, so nothing is consolidated (copied)
+            converted = table.select(rest).to_pandas(split_blocks=True)
+            data.update({name: converted[name] for name in rest})
+
+        return pd.DataFrame(data, copy=False)
+
+
+def load_shared_log(scenario, name, columns=None, shared_dir=None):
+    """
+    Loads a published scenario log, e.g. load_shared_log("scenario_03", "cloud_api").
+
+    Raises FileNotFoundError if the scenario has not been published.
+    """
+    path = shared_path(shared_dir, scenario, name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"{scenario}/{os.path.splitext(name)[0]} has not been published to {shared_dir or SHARED_DIR}"
+        )
+    return read_shared_log(path, columns=columns)
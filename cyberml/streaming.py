@@ -0,0 +1,183 @@
+"""
+Chunked log generation helpers.
+
+Generators produce background traffic in fixed-size chunks and merge the
+(small) attack chain into the stream in timestamp order, so peak memory is
+bounded by the chunk size rather than the total row count.
+"""
+import os
+
+import pandas as pd
+
+from cyberml.logio import TIMESTAMP_COLUMN, log_path, log_timestamps
+from cyberml.tracing import span
+
+DEFAULT_CHUNK_SIZE = 250_000
+
+
+def iter_row_ranges(n_rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields (start, stop) row ranges covering n_rows in chunk_size steps.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    for start in range(0, n_rows, chunk_size):
+        yield start, min(start + chunk_size, n_rows)
+
+
+def merge_events(chunks, events, key):
+    """
+    Merges a small events DataFrame into a stream of chunks sorted on `key`.
+
+    Each event is emitted with the first chunk whose last key is >= the event
+    key; events later than the whole stream are flushed at the end. On ties
+    background rows come first, matching a stable sort of the full dataset.
+    """
+    pending = events.sort_values(key, kind="stable")
+
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+
+        upper = chunk[key].iloc[-1]
+        due = pending[key] <= upper
+
+        if due.any():
+            chunk = pd.concat([chunk, pending[due]], ignore_index=True)
+            chunk = chunk.sort_values(key, kind="stable").reset_index(drop=True)
+            pending = pending[~due]
+
+        yield chunk
+
+    if not pending.empty:
+        yield pending.reset_index(drop=True)
+
+
+# -----------------------------
+# Sinks
+# -----------------------------
+class CsvSink:
+    """
+    Appends chunks to a CSV file, writing the header only once.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows_written = 0
+        self._header_written = False
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Start from an empty file so reruns do not append to stale data
+        open(path, "w").close()
+
+    def write(self, chunk):
+        chunk.to_csv(self.path, mode="a", header=not self._header_written, index=False)
+        self._header_written = True
+        self.rows_written += len(chunk)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _ArrowSink:
+    """
+    Base class for columnar sinks: chunks are converted to Arrow tables with a
+    typed timestamp column and cast to the schema of the first chunk.
+    """
+
+    def __init__(self, path):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(f"{type(self).__name__} requires pyarrow (pip install pyarrow).") from e
+
+        self.path = path
+        self.rows_written = 0
+        self._writer = None
+        self._schema = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _open(self, schema):
+        raise NotImplementedError
+
+    def write(self, chunk):
+        import pyarrow as pa
+
+        if TIMESTAMP_COLUMN in chunk.columns:
+            chunk = chunk.assign(**{TIMESTAMP_COLUMN: log_timestamps(chunk)})
+
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            self._writer = self._open(table.schema)
+        else:
+            table = table.cast(self._schema)
+
+        self._writer.write_table(table)
+        self.rows_written += len(chunk)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetSink(_ArrowSink):
+    """
+    Appends chunks as row groups of a single Parquet file.
+    """
+
+    def _open(self, schema):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self.path, schema)
+
+
+class FeatherSink(_ArrowSink):
+    """
+    Appends chunks as record batches of a single Feather (Arrow IPC) file.
+    """
+
+    def _open(self, schema):
+        import pyarrow.ipc as ipc
+        return ipc.new_file(self.path, schema)
+
+
+SINKS = {"csv": CsvSink, "parquet": ParquetSink, "feather": FeatherSink}
+
+
+def open_sink(log_dir, name, fmt="csv"):
+    """
+    Opens the sink for log `name` in `log_dir`, e.g. open_sink(LOG_DIR, "auth", "parquet").
+    """
+    return SINKS[fmt](log_path(log_dir, name, fmt))
+
+
+def write_chunks(chunks, sink):
+    """
+    Drains a chunk iterator into a sink and returns the number of rows written.
+    """
+    rows = 0
+    name = os.path.basename(getattr(sink, "path", "")) or type(sink).__name__
+    # The outer span's self time is producing the chunks; the inner ones are the writes
+    with span(f"write_chunks:{name}", category="write") as stream, sink:
+        for chunk in chunks:
+            with span(f"sink.write:{name}", category="write", rows=len(chunk)):
+                sink.write(chunk)
+            rows += len(chunk)
+        stream.rows = rows
+    return rows
@@ -0,0 +1,245 @@
+"""
+Fixed-format timestamp parsing and formatting.
+
+Every generated log carries two views of the same instant: the readable
+ISO string in "timestamp" and an int64 "timestamp_ns" column of UTC epoch
+nanoseconds. Loaders and feature code read the integer column when it is
+there and never touch the strings; everything else goes through one
+strict parser instead of per-notebook format guessing:
+
+    ns = frame_epoch_ns(df)                       # timestamp_ns, or parsed "timestamp"
+    ns = parse_epoch_ns(["2026-02-02T13:40:00.250000Z"])
+    text = format_epoch_ns(ns)                    # "2026-02-02T13:40:00.250000Z"
+
+The fast path covers the layouts the generators have written,
+"YYYY-MM-DDTHH:MM:SS[.ffffff]" followed by "Z", "+00:00" or the legacy
+"+00:00Z". Anything else is parsed as ISO 8601, and a value that is
+missing or not a timestamp raises ValueError naming the row instead of
+turning into NaT.
+"""
+import numpy as np
+import pandas as pd
+
+TIMESTAMP_COLUMN = "timestamp"
+EPOCH_NS_COLUMN = "timestamp_ns"
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_HOUR = 3600 * NS_PER_SECOND
+
+# "YYYY-MM-DDTHH:MM:SS" + optional ".ffffff" + the longest suffix, "+00:00Z"
+_BASE_LENGTH = 19
+_FRACTION_LENGTH = 7
+_SUFFIX_LENGTH = 7
+_MAX_LENGTH = _BASE_LENGTH + _FRACTION_LENGTH + _SUFFIX_LENGTH
+
+_SEPARATORS = {4: b"-", 7: b"-", 10: b"T", 13: b":", 16: b":"}
+# (start, width) of year, month, day, hour, minute and second
+_FIELDS = [(0, 4), (5, 2), (8, 2), (11, 2), (14, 2), (17, 2)]
+_SUFFIXES = [b"Z", b"+00:00", b"+00:00Z"]
+
+
+# -----------------------------
+# Parsing
+# -----------------------------
+def _days_from_civil(year, month, day):
+    # Days since 1970-01-01 in the proleptic Gregorian calendar (H. Hinnant's algorithm)
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _days_in_month(year, month):
+    leap = ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+    days = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[month.clip(0, 12)]
+    return days + (leap & (month == 2))
+
+
+def _char_matrix(text):
+    """
+    Returns the strings as an (n, _MAX_LENGTH) byte matrix; ones that cannot match are all zero.
+
+    Arrow-backed strings of one common width (every generator writes
+    fixed-width timestamps) are reshaped straight from the Arrow data
+    buffer; otherwise the strings are encoded to fixed-width bytes.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        pa = None
+
+    if pa is not None and isinstance(text.dtype, pd.StringDtype) and text.dtype.storage == "pyarrow":
+        array = pa.array(text.array)
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        offset_type = np.int64 if pa.types.is_large_string(array.type) else np.int32
+        offsets = np.frombuffer(array.buffers()[1], dtype=offset_type)[array.offset:array.offset + len(array) + 1]
+        widths = np.diff(offsets)
+        if len(widths) and widths.min() == widths.max() <= _MAX_LENGTH:
+            data = np.frombuffer(array.buffers()[2], dtype=np.uint8)[offsets[0]:offsets[-1]]
+            chars = np.zeros((len(text), _MAX_LENGTH), dtype=np.uint8)
+            chars[:, :widths[0]] = data.reshape(len(text), widths[0])
+            return chars
+
+    # NumPy truncates longer strings silently, so those are blanked first
+    text = text.where(text.str.len().le(_MAX_LENGTH), "")
+    try:
+        raw = np.asarray(text.to_numpy(dtype=object), dtype=f"S{_MAX_LENGTH}")
+    except UnicodeEncodeError:
+        raw = np.asarray(text.where(text.str.isascii(), "").to_numpy(dtype=object), dtype=f"S{_MAX_LENGTH}")
+    return raw.view(np.uint8).reshape(len(text), _MAX_LENGTH)
+
+
+def _number(digits, start, width):
+    # Reads one fixed-width decimal field; ok is False where a character is not a digit
+    value = np.zeros(digits.shape[1], dtype=np.int32)
+    ok = np.ones(digits.shape[1], dtype=bool)
+    for position in range(start, start + width):
+        ok &= digits[position] <= 9
+        value = value * 10 + digits[position]
+    return value, ok
+
+
+def _parse_fixed(text):
+    """
+    Parses fixed-layout strings to epoch ns. Returns (ns, valid); invalid entries are 0.
+
+    The strings are laid out as a byte matrix and every field is read with a
+    handful of column operations, so the cost does not depend on how many
+    distinct values there are.
+    """
+    # One contiguous row per character position, like ipaddr's parser
+    columns = np.ascontiguousarray(_char_matrix(text).T)
+    digits = columns - np.uint8(48)  # unsigned: anything below "0" wraps around
+
+    valid = np.ones(len(text), dtype=bool)
+    for position, separator in _SEPARATORS.items():
+        valid &= columns[position] == ord(separator)
+
+    fields = [_number(digits, start, width) for start, width in _FIELDS]
+    for _, ok in fields:
+        valid &= ok
+    (year, _), (month, _), (day, _), (hour, _), (minute, _), (second, _) = fields
+
+    # Optional ".ffffff", then the UTC suffix
+    has_fraction = columns[_BASE_LENGTH] == ord(".")
+    micros, ok = _number(digits, _BASE_LENGTH + 1, _FRACTION_LENGTH - 1)
+    valid &= ~has_fraction | ok
+    micros[~has_fraction] = 0
+
+    suffix = np.where(
+        has_fraction,
+        columns[_BASE_LENGTH + _FRACTION_LENGTH:],
+        columns[_BASE_LENGTH:_BASE_LENGTH + _SUFFIX_LENGTH]
+    )
+    matches = np.zeros(len(text), dtype=bool)
+    for pattern in _SUFFIXES:
+        match = np.ones(len(text), dtype=bool)
+        for position, byte in enumerate(pattern.ljust(_SUFFIX_LENGTH, b"\0")):
+            match &= suffix[position] == byte
+        matches |= match
+    valid &= matches
+    # Nothing may follow the suffix of a value without a fraction
+    valid &= has_fraction | ~columns[_BASE_LENGTH + _SUFFIX_LENGTH:].any(axis=0)
+
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= _days_in_month(year, month))
+    valid &= (hour <= 23) & (minute <= 59) & (second <= 59)
+
+    days = _days_from_civil(year, month, day).astype(np.int64)
+    seconds = days * 86400 + (hour * 3600 + minute * 60 + second)
+    ns = seconds * NS_PER_SECOND + micros.astype(np.int64) * 1000
+    ns[~valid] = 0
+    return ns, valid
+
+
+def _datetime_epoch_ns(values):
+    if values.dt.tz is None:
+        values = values.dt.tz_localize("UTC")
+    missing = values.isna().to_numpy()
+    if missing.any():
+        raise ValueError(f"Missing timestamp at row {values.index[missing.argmax()]!r}")
+    return values.dt.tz_convert(None).to_numpy().astype("datetime64[ns]").astype(np.int64)
+
+
+def parse_epoch_ns(values):
+    """
+    Parses UTC timestamps (strings or datetimes) to int64 epoch nanoseconds.
+
+    Raises ValueError on a missing or unparseable value rather than returning NaT.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return _datetime_epoch_ns(values)
+
+    missing = values.isna().to_numpy()
+    if missing.any():
+        raise ValueError(f"Missing timestamp at row {values.index[missing.argmax()]!r}")
+
+    text = values.astype("str")
+    ns, valid = _parse_fixed(text)
+    if not valid.all():
+        # Other ISO 8601 spellings (a space separator, millisecond fractions, ...) are rare
+        rest = text[~valid]
+        try:
+            parsed = pd.to_datetime(rest.str.removesuffix("Z"), utc=True, format="ISO8601")
+        except (ValueError, TypeError):
+            for label, value in rest.items():
+                try:
+                    pd.to_datetime(value.removesuffix("Z"), utc=True, format="ISO8601")
+                except (ValueError, TypeError):
+                    raise ValueError(f"Not a timestamp at row {label!r}: {value!r}") from None
+            raise
+        ns[~valid] = _datetime_epoch_ns(parsed)
+    return ns
+
+
+def frame_epoch_ns(df, column=TIMESTAMP_COLUMN):
+    """
+    Returns a log's epoch nanoseconds, read from timestamp_ns when the log has it.
+    """
+    if EPOCH_NS_COLUMN in df.columns and column == TIMESTAMP_COLUMN:
+        return epoch_ns_column(df[EPOCH_NS_COLUMN])
+    return parse_epoch_ns(df[column])
+
+
+def epoch_ns_column(values):
+    """
+    Validates a timestamp_ns column and returns it as an int64 array.
+    """
+    values = pd.Series(values)
+    if not pd.api.types.is_integer_dtype(values):
+        # A CSV column with a blank cell is read back as float
+        missing = values.isna().to_numpy()
+        if missing.any():
+            raise ValueError(f"Missing {EPOCH_NS_COLUMN} at row {values.index[missing.argmax()]!r}")
+    return values.to_numpy(dtype=np.int64)
+
+
+# -----------------------------
+# Conversion and formatting
+# -----------------------------
+def to_datetimes(ns, index=None):
+    """
+    Wraps epoch nanoseconds as a datetime64[us, UTC] Series, the typed log timestamp.
+    """
+    stamps = np.asarray(ns, dtype=np.int64).view("datetime64[ns]").astype("datetime64[us]")
+    return pd.Series(stamps, index=index).dt.tz_localize("UTC")
+
+
+def format_epoch_ns(ns):
+    """
+    Renders epoch nanoseconds as "YYYY-MM-DDTHH:MM:SS.ffffffZ" strings (object array).
+
+    Generators keep microsecond precision, so anything below a microsecond is dropped.
+    """
+    stamps = np.asarray(ns, dtype=np.int64).view("datetime64[ns]").astype("datetime64[us]")
+    return np.char.add(np.datetime_as_string(stamps, unit="us"), "Z").astype(object)
+
+
+def hour_of_day(ns):
+    """
+    Returns the UTC hour (0-23) of each epoch nanosecond value.
+    """
+    return (np.asarray(ns, dtype=np.int64) // NS_PER_HOUR) % 24
@@ -0,0 +1,461 @@
+"""
+Stage-level instrumentation for generate -> feature -> grade.
+
+Set CYBERML_TRACE=1 and every instrumented stage records a span with its
+wall time, row count, rows/sec and peak resident memory:
+
+    - the generate_*_logs functions and generate_api_feature_table
+    - write_log / write_chunks (CSV, Parquet and Feather writes)
+    - every evaluator call made through the registry (batch grading, benchmarks)
+    - leaderboard writes and exports
+
+Each process, including grading workers, appends its spans to
+CYBERML_TRACE_DIR (default: traces/). The run command traces any command,
+merges its processes' spans into one Chrome trace file (viewable in
+chrome://tracing or https://ui.perfetto.dev) and prints the hottest stages
+by self time:
+
+    python -m cyberml.tracing run -- python -m cyberml.batch_grade --workers 4
+    python -m cyberml.tracing run -- python scenarios/scenario_03/generator/generate_data.py --rows 1000000
+    python -m cyberml.tracing summary traces/20250101-120000-4242.json --top 20
+
+Instrumenting code takes a decorator or a with-block:
+
+    @traced("scenario_03.generate_api_logs", category="generate", rows=len)
+    def generate_api_logs(...): ...
+
+    with span("leaderboard.write", category="leaderboard", rows=len(rows)):
+        ...
+
+When tracing is off, traced() returns the function itself and span() returns
+a shared no-op, so instrumented code runs at full speed.
+"""
+import argparse
+import functools
+import glob
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+TRACE_DIR = os.environ.get("CYBERML_TRACE_DIR") or os.path.join(REPO_ROOT, "traces")
+
+
+def _env_enabled():
+    return os.environ.get("CYBERML_TRACE", "").lower() in ("1", "true", "yes", "on")
+
+
+# -----------------------------
+# Resident memory (/proc on Linux, ru_maxrss elsewhere)
+# -----------------------------
+def _status_kb(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def rss_kb():
+    """
+    Current resident set size in KiB.
+    """
+    return _status_kb("VmRSS") or 0
+
+
+def peak_rss_kb():
+    """
+    Resident high-water mark in KiB, since process start or the last reset_peak_rss().
+    """
+    peak = _status_kb("VmHWM")
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:
+        return 0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss // 1024 if sys.platform == "darwin" else maxrss
+
+
+def reset_peak_rss():
+    """
+    Resets the high-water mark to the current size where the OS allows it (Linux 4.0+).
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+# -----------------------------
+# Spans
+# -----------------------------
+_enabled = False
+_events = []
+_local = threading.local()
+
+
+def enabled():
+    return _enabled
+
+
+def _open_spans():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _fold_peak(stack):
+    # The high-water mark is process-wide: credit it to every open span, then
+    # reset it so the next reading covers only what happens from here on
+    peak = peak_rss_kb()
+    for open_span in stack:
+        if peak > open_span.peak_kb:
+            open_span.peak_kb = peak
+    reset_peak_rss()
+    return peak
+
+
+class Span:
+    """
+    A timed stage. Set .rows inside the block if the count is only known there.
+    """
+
+    __slots__ = ("name", "category", "rows", "args", "start_ns", "wall_ns", "peak_kb", "rss_kb")
+
+    def __init__(self, name, category="stage", rows=None, **args):
+        self.name = name
+        self.category = category
+        self.rows = rows
+        self.args = args
+
+    def __enter__(self):
+        stack = _open_spans()
+        _fold_peak(stack)
+        self.rss_kb = self.peak_kb = rss_kb()
+        stack.append(self)
+        self.wall_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        stack = _open_spans()
+        _fold_peak(stack)
+        stack.remove(self)
+
+        seconds = duration_ns / 1e9
+        args = {**self.args, "peak_rss_mb": round(self.peak_kb / 1024, 1),
+                "peak_growth_mb": round(max(self.peak_kb - self.rss_kb, 0) / 1024, 1)}
+        if self.rows is not None:
+            args["rows"] = int(self.rows)
+            args["rows_per_s"] = round(self.rows / seconds, 1) if seconds > 0 else None
+        if exc[0] is not None:
+            args["error"] = exc[0].__name__
+
+        _emit({
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": self.wall_ns / 1000,
+            "dur": duration_ns / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args
+        })
+        return False
+
+
+class _NullSpan:
+    """
+    Stands in for Span while tracing is off.
+    """
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, category="stage", rows=None, **args):
+    """
+    Context manager timing one stage (a no-op unless tracing is enabled).
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, category, rows, **args)
+
+
+def traced(name, category="stage", rows=None, rows_of="result"):
+    """
+    Decorator recording a span per call.
+
+    rows(result) gives the row count, or rows(first argument) with
+    rows_of="input" (e.g. for a feature table, whose input is the log).
+    Whether tracing is on is decided when the function is decorated, i.e.
+    at import, so a disabled trace leaves the function untouched.
+    """
+    def decorate(fn):
+        if not _enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Span(name, category) as s:
+                if rows is not None and rows_of == "input":
+                    s.rows = rows(args[0])
+                result = fn(*args, **kwargs)
+                if rows is not None and rows_of == "result":
+                    s.rows = rows(result)
+            return result
+        return wrapper
+    return decorate
+
+
+# -----------------------------
+# Trace files
+# -----------------------------
+# Every process appends its spans to <run>-<pid>.part.jsonl as they close,
+# so nothing is lost when a pool worker exits through os._exit(); the run
+# command merges the parts into one Chrome trace afterwards.
+_lock = threading.Lock()
+_part = None
+
+
+def run_id():
+    return os.environ.get("CYBERML_TRACE_RUN", "")
+
+
+def _emit(event):
+    global _part
+    _events.append(event)
+    with _lock:
+        if _part is None or _part[0] != event["pid"]:
+            path = os.path.join(TRACE_DIR, f"{run_id()}-{event['pid']}.part.jsonl")
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            _part = (event["pid"], open(path, "a"))
+        _part[1].write(json.dumps(event) + "\n")
+        _part[1].flush()
+
+
+def spans():
+    """
+    The spans this process has recorded so far, as Chrome trace events.
+    """
+    return list(_events)
+
+
+def chrome_trace(events, **metadata):
+    return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": metadata}
+
+
+def _write_json(path, data):
+    # Write to a temp file first so readers never see a half-written file
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def export(path):
+    """
+    Writes this process's spans as a Chrome trace file (e.g. from a notebook).
+    """
+    _write_json(path, chrome_trace(spans(), run=run_id(), pid=os.getpid()))
+    return path
+
+
+def _after_fork():
+    # A forked worker starts with a copy of the parent's spans and part file
+    global _part
+    del _events[:]
+    _local.stack = []
+    _part = None
+
+
+def enable(trace_dir=None):
+    """
+    Turns tracing on for this process and any process it starts.
+
+    Only functions decorated afterwards are traced, so enable before
+    importing the modules to trace (or set CYBERML_TRACE=1).
+    """
+    global _enabled, TRACE_DIR
+    if trace_dir:
+        TRACE_DIR = os.environ["CYBERML_TRACE_DIR"] = trace_dir
+    os.environ["CYBERML_TRACE"] = "1"
+    os.environ.setdefault("CYBERML_TRACE_RUN", f"{datetime.now(timezone.utc):%Y%m%d-%H%M%S}-{os.getpid()}")
+    if not _enabled:
+        _enabled = True
+        os.register_at_fork(after_in_child=_after_fork)
+
+
+if _env_enabled():
+    enable()
+
+
+# -----------------------------
+# Reading and summarizing traces
+# -----------------------------
+def load_events(paths):
+    """
+    Reads spans from Chrome trace files and/or .part.jsonl files.
+    """
+    loaded = []
+    for path in paths:
+        with open(path) as f:
+            if path.endswith(".jsonl"):
+                # A process killed mid-write can leave a truncated last line
+                for line in f:
+                    try:
+                        loaded.append(json.loads(line))
+                    except ValueError:
+                        pass
+                continue
+            data = json.load(f)
+        loaded.extend(e for e in data.get("traceEvents", data) if e.get("ph") == "X")
+    return loaded
+
+
+def merge_run(run, trace_dir=None):
+    """
+    Combines a run's per-process part files into <run>.json and returns its path.
+    """
+    trace_dir = trace_dir or TRACE_DIR
+    parts = sorted(glob.glob(os.path.join(trace_dir, f"{run}-*.part.jsonl")))
+    if not parts:
+        return None
+
+    path = os.path.join(trace_dir, f"{run}.json")
+    _write_json(path, chrome_trace(load_events(parts), run=run, processes=len(parts)))
+    for part in parts:
+        os.remove(part)
+    return path
+
+
+def self_times(events):
+    """
+    Returns each span's time minus the time of the spans nested directly inside it (µs).
+    """
+    result = [0.0] * len(events)
+    by_thread = {}
+    for i, event in enumerate(events):
+        by_thread.setdefault((event["pid"], event["tid"]), []).append(i)
+
+    for indices in by_thread.values():
+        # Parents sort before their children: earlier start, then longer duration
+        indices.sort(key=lambda i: (events[i]["ts"], -events[i]["dur"]))
+        stack = []
+        for i in indices:
+            start = events[i]["ts"]
+            while stack and events[stack[-1]]["ts"] + events[stack[-1]]["dur"] <= start:
+                stack.pop()
+            result[i] = events[i]["dur"]
+            if stack:
+                result[stack[-1]] -= events[i]["dur"]
+            stack.append(i)
+    return result
+
+
+def summarize(events):
+    """
+    Returns per-stage totals sorted by self time, hottest first.
+    """
+    stages = {}
+    for event, self_us in zip(events, self_times(events)):
+        stage = stages.setdefault(event["name"], {
+            "name": event["name"], "category": event.get("cat", ""), "calls": 0,
+            "total_s": 0.0, "self_s": 0.0, "rows": 0, "peak_rss_mb": 0.0
+        })
+        args = event.get("args", {})
+        stage["calls"] += 1
+        stage["total_s"] += event["dur"] / 1e6
+        stage["self_s"] += self_us / 1e6
+        stage["rows"] += args.get("rows") or 0
+        stage["peak_rss_mb"] = max(stage["peak_rss_mb"], args.get("peak_rss_mb") or 0.0)
+
+    for stage in stages.values():
+        stage["rows_per_s"] = stage["rows"] / stage["total_s"] if stage["rows"] and stage["total_s"] else None
+    return sorted(stages.values(), key=lambda s: s["self_s"], reverse=True)
+
+
+def format_summary(stages, top=15):
+    total = sum(s["self_s"] for s in stages) or 1.0
+    lines = [f"{'stage':<44} {'calls':>7} {'self s':>9} {'%':>6} {'total s':>9} {'rows/s':>13} {'peak MB':>9}"]
+    for s in stages[:top]:
+        rate = f"{s['rows_per_s']:>13,.0f}" if s["rows_per_s"] else f"{'-':>13}"
+        lines.append(f"{s['name'][:44]:<44} {s['calls']:>7} {s['self_s']:>9.3f} {100 * s['self_s'] / total:>5.1f}% "
+                     f"{s['total_s']:>9.3f} {rate} {s['peak_rss_mb']:>9.1f}")
+    return "\n".join(lines)
+
+
+def _latest_trace(trace_dir):
+    traces = glob.glob(os.path.join(trace_dir, "*.json"))
+    return max(traces, key=os.path.getmtime) if traces else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trace pipeline stages and summarize where time goes.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run a command with tracing on, then merge and summarize its trace.")
+    run.add_argument("--dir", default=TRACE_DIR)
+    run.add_argument("--top", type=int, default=15)
+    run.add_argument("cmd", nargs=argparse.REMAINDER, help="Command to run, after --.")
+
+    summary = sub.add_parser("summary", help="Summarize trace files (default: the latest run).")
+    summary.add_argument("paths", nargs="*")
+    summary.add_argument("--dir", default=TRACE_DIR)
+    summary.add_argument("--top", type=int, default=15)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+        if not cmd:
+            parser.error("run needs a command, e.g. run -- python -m cyberml.batch_grade")
+
+        run_name = f"{datetime.now(timezone.utc):%Y%m%d-%H%M%S}-{os.getpid()}"
+        env = {**os.environ, "CYBERML_TRACE": "1", "CYBERML_TRACE_RUN": run_name,
+               "CYBERML_TRACE_DIR": os.path.abspath(args.dir)}
+        status = subprocess.run(cmd, env=env).returncode
+
+        path = merge_run(run_name, args.dir)
+        if path is None:
+            print("No spans were recorded (does the command use instrumented code?).")
+            sys.exit(status)
+        paths = [path]
+    else:
+        paths = args.paths or [p for p in [_latest_trace(args.dir)] if p]
+        if not paths:
+            parser.error(f"No trace files in {args.dir}")
+        status = 0
+
+    events = load_events(paths)
+    print(format_summary(summarize(events), args.top))
+    print(f"\n{len(events)} spans. Trace: {', '.join(paths)}")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,85 @@
 import json
-import random
+import argparse
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 import os
+import sys
 
-def generate_normal_logins(num=50):
-    rows = []
-    base_time = datetime.now(timezone.utc)
-
-    for i in range(num):
-        rows.append({
-            "timestamp": (base_time + timedelta(minutes=i)).isoformat() + "Z",
-            "username": "j.smith",
-            "source_ip": "10.0.1.15",
-            "destination_host": "workstation-22",
-            "event_type": "login",
-            "details": "success"
-        })
-    return rows
-
-def generate_attack_event():
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from cyberml.cohort import StudentStreams, add_arguments, output_dirs  # noqa: E402
+from cyberml.streaming import DEFAULT_CHUNK_SIZE, CsvSink, iter_row_ranges, merge_events, write_chunks  # noqa: E402
+from cyberml.timestamps import NS_PER_SECOND, format_epoch_ns  # noqa: E402
+
+def epoch_ns(moment):
+    # Render timestamps with the shared formatter; isoformat() + "Z"
+    # on an aware datetime produced "...+00:00Z", which nothing parses cleanly.
+    moment = moment.astimezone(timezone.utc).replace(tzinfo=None) if moment.tzinfo else moment
+    return int(np.datetime64(moment, "ns").astype(np.int64))
+
+def generate_normal_logins(num=50, base_time=None, start=0):
+    base_time = base_time or datetime.now(timezone.utc)
+
+    # One login per minute, built column by column and formatted in a single vectorized pass
+    ns = epoch_ns(base_time) + np.arange(start, start + num, dtype=np.int64) * 60 * NS_PER_SECOND
+    return pd.DataFrame({
+        "timestamp": format_epoch_ns(ns),
+        "timestamp_ns": ns,
+        "username": "j.smith",
+        "source_ip": "10.0.1.15",
+        "destination_host": "workstation-22",
+        "event_type": "login",
+        "details": "success"
+    })
+
+def generate_attack_event(base_time=None, rng=None):
+    base_time = base_time or datetime.now(timezone.utc)
+    rng = rng if rng is not None else np.random.default_rng()
     return {
-        "timestamp": datetime.now(timezone.utc).isoformat() + "Z",
+        "timestamp": format_epoch_ns([epoch_ns(base_time)])[0],
+        "timestamp_ns": epoch_ns(base_time),
         "username": "j.smith",
-        "source_ip": "185.199.110." + str(random.randint(1, 254)),
-        "destination_host": "server-" + str(random.randint(1, 20)),
+        "source_ip": "185.199.110." + str(int(rng.integers(1, 255))),
+        "destination_host": "server-" + str(int(rng.integers(1, 21))),
         "event_type": "login",
         "details": "success"
     }
 
-def main():
-    os.makedirs("../logs", exist_ok=True)
-    os.makedirs("../evaluation", exist_ok=True)
+def stream_logs(num, attack, base_time, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Build each chunk independently so memory stays flat,
+    # and let merge_events slot the attack rows in by timestamp.
+    chunks = (
+        generate_normal_logins(stop - start, base_time, start)
+        for start, stop in iter_row_ranges(num, chunk_size)
+    )
+    return merge_events(chunks, pd.DataFrame([attack]), "timestamp_ns")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate template scenario logs.")
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--stream", action="store_true",
+                        help="Write logs chunk by chunk instead of one in-memory DataFrame.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    # --seed / --student-id make the output reproducible per student (see cyberml.cohort)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    log_dir, eval_dir = output_dirs(args, "../logs", "../evaluation")
 
-    normal = generate_normal_logins()
-    attack = generate_attack_event()
+    streams = StudentStreams("_template", args.seed, args.student_id)
+    base_time = streams.base_time().replace(tzinfo=timezone.utc)
+    attack = generate_attack_event(base_time, streams.rng("incident"))
 
-    df = pd.DataFrame(normal + [attack])
-    df.to_csv("../logs/generated_logs.csv", index=False)
+    if args.stream:
+        write_chunks(stream_logs(args.rows, attack, base_time, args.chunk_size),
+                     CsvSink(os.path.join(log_dir, "generated_logs.csv")))
+    else:
+        # One chunk holding every row, merged exactly as --stream merges its chunks
+        df = pd.concat(stream_logs(args.rows, attack, base_time, max(args.rows, 1)), ignore_index=True)
+        df.to_csv(os.path.join(log_dir, "generated_logs.csv"), index=False)
 
     answer_key = {
         "malicious_ip": attack["source_ip"],
@@ -45,7 +87,7 @@ def main():
         "expected_mitre": ["T1078", "T1021"]
     }
 
-    with open("../evaluation/answer_key.json", "w") as f:
+    with open(os.path.join(eval_dir, "answer_key.json"), "w") as f:
         json.dump(answer_key, f, indent=4)
 
     print("Generated logs and answer key.")
@@ -1,18 +1,14 @@
 import json
 import sys
 
-def evaluate_combined(soc_path, ml_path):
-    with open(soc_path, "r") as f:
-        soc = json.load(f)
-
-    with open(ml_path, "r") as f:
-        ml = json.load(f)
+def score_combined(soc, ml, key=None):
+    attacker_ip = (key or {}).get("attacker_ip", "185.199.110.153")
 
     combined_score = 0
     feedback = []
 
     # Did SOC and ML agree?
-    if "185.199.110.153" in soc.get("ioc_list", []) and ml.get("anomaly_score", 0) < -0.1:
+    if attacker_ip in soc.get("ioc_list", []) and ml.get("anomaly_score", 0) < -0.1:
         combined_score += 50
     else:
         feedback.append("SOC and ML findings do not align.")
@@ -34,6 +30,20 @@ def evaluate_combined(soc_path, ml_path):
         "combined_feedback": feedback
     }
 
+def evaluate_combined(soc_path, ml_path, key_path=None):
+    with open(soc_path, "r") as f:
+        soc = json.load(f)
+
+    with open(ml_path, "r") as f:
+        ml = json.load(f)
+
+    key = None
+    if key_path:
+        with open(key_path, "r") as f:
+            key = json.load(f)
+
+    return score_combined(soc, ml, key)
+
 if __name__ == "__main__":
-    result = evaluate_combined(sys.argv[1], sys.argv[2])
+    result = evaluate_combined(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
     print(json.dumps(result, indent=4))
@@ -1,10 +1,7 @@
 import json
 import sys
 
-def evaluate_ml(path):
-    with open(path, "r") as f:
-        data = json.load(f)
-
+def score_ml(data, key=None):
     score = 0
     feedback = []
 
@@ -34,6 +31,12 @@ def evaluate_ml(path):
         "ml_feedback": feedback
     }
 
+def evaluate_ml(path):
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    return score_ml(data)
+
 if __name__ == "__main__":
     result = evaluate_ml(sys.argv[1])
     print(json.dumps(result, indent=4))
@@ -2,30 +2,40 @@ import json
 import sys
 import os
 
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from cyberml.iocs import ioc_index  # noqa: E402
+
 EXPECTED_IOCS = ["185.199.110.153"]
 EXPECTED_MITRE = ["T1078", "T1021"]
 
-def evaluate_soc(path):
-    with open(path, "r") as f:
-        data = json.load(f)
+def score_soc(data, key=None):
+    key = key or {}
+    expected_iocs = key.get("expected_iocs", EXPECTED_IOCS)
+    expected_mitre = key.get("expected_mitre", EXPECTED_MITRE)
+    attacker_ip = key.get("attacker_ip", expected_iocs[0])
+
+    index = ioc_index(expected_iocs + [attacker_ip])
 
     score = 0
     feedback = []
 
     #IOC Check
-    if any(ioc in data.get("ioc_list", []) for ioc in EXPECTED_IOCS):
+    if index.exact(data.get("ioc_list", [])) & set(expected_iocs):
         score += 40
     else:
         feedback.append("Missing expected IOC(s).")
 
     # MITRE Check
-    if any(m in data.get("mitre_mapping", []) for m in EXPECTED_MITRE):
+    if any(m in data.get("mitre_mapping", []) for m in expected_mitre):
         score += 40
     else:
         feedback.append("Incorrect MITRE ATT&CK mapping.")
 
     #Detection rule check
-    if "185.199.110.153" in data.get("detection_rules", ""):
+    if attacker_ip in index.scan(data.get("detection_rules", "")):
         score += 20
     else:
         feedback.append("Detection rule does not match suspicious IP.")
@@ -35,8 +45,19 @@ def evaluate_soc(path):
         "soc_feedback": feedback
     }
 
+def evaluate_soc(path, key_path=None):
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    key = None
+    if key_path:
+        with open(key_path, "r") as f:
+            key = json.load(f)
+
+    return score_soc(data, key)
+
 if __name__ == "__main__":
-    result = evaluate_soc(sys.argv[1])
+    result = evaluate_soc(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
     print(json.dumps(result, indent=4))
     
 ### End of File ###
\ No newline at end of file
@@ -1,16 +1,7 @@
 import json
 import sys
 
-def evaluate_combined(soc_path, ml_path, key_path):
-    with open(soc_path) as f:
-        soc = json.load(f)
-
-    with open(ml_path) as f:
-        ml = json.load(f)
-
-    with open(key_path) as f:
-        key = json.load(f)
-
+def score_combined(soc, ml, key):
     score = 0
     feedback = []
 
@@ -27,6 +18,18 @@ def evaluate_combined(soc_path, ml_path, key_path):
 
     return {"combined_score": score, "combined_feedback": feedback}
 
+def evaluate_combined(soc_path, ml_path, key_path):
+    with open(soc_path) as f:
+        soc = json.load(f)
+
+    with open(ml_path) as f:
+        ml = json.load(f)
+
+    with open(key_path) as f:
+        key = json.load(f)
+
+    return score_combined(soc, ml, key)
+
 if __name__ == "__main__":
     print(json.dumps(
         evaluate_combined(sys.argv[1], sys.argv[2], sys.argv[3]),
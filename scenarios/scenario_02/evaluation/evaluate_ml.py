@@ -1,10 +1,7 @@
 import json
 import sys
 
-def evaluate_ml(student_path, key_path):
-    with open(student_path) as f:
-        student = json.load(f)
-
+def score_ml(student, key):
     score = 0
     feedback = []
 
@@ -23,6 +20,12 @@ def evaluate_ml(student_path, key_path):
 
     return {"ml_score": score, "ml_feedback": feedback}
 
+def evaluate_ml(student_path, key_path):
+    with open(student_path) as f:
+        student = json.load(f)
+
+    return score_ml(student, None)
+
 if __name__ == "__main__":
     print(json.dumps(
         evaluate_ml(sys.argv[1], sys.argv[2]),
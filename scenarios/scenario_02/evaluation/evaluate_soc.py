@@ -1,13 +1,7 @@
 import json
 import sys
 
-def evaluate_soc(student_path, key_path):
-    with open(student_path) as f:
-        student = json.load(f)
-
-    with open(key_path) as f:
-        key = json.load(f)
-
+def score_soc(student, key):
     score = 0
     feedback = []
 
@@ -28,6 +22,15 @@ def evaluate_soc(student_path, key_path):
 
     return {"soc_score": score, "soc_feedback": feedback}
 
+def evaluate_soc(student_path, key_path):
+    with open(student_path) as f:
+        student = json.load(f)
+
+    with open(key_path) as f:
+        key = json.load(f)
+
+    return score_soc(student, key)
+
 if __name__ == "__main__":
     print(json.dumps(
         evaluate_soc(sys.argv[1], sys.argv[2]),
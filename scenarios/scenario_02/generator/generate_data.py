@@ -1,8 +1,10 @@
 import json
-import random
+import argparse
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
+import sys
 
 # -----------------------------
 # Path-safe directory handling
@@ -10,98 +12,202 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_DIR = os.path.join(BASE_DIR, "..", "logs")
 EVAL_DIR = os.path.join(BASE_DIR, "..", "evaluation")
+REPO_ROOT = os.path.abspath(os.path.join(BASE_DIR, "..", "..", ".."))
 
 os.makedirs(LOG_DIR, exist_ok=True)
 os.makedirs(EVAL_DIR, exist_ok=True)
 
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from cyberml.cohort import StudentStreams, add_arguments, output_dirs  # noqa: E402
+from cyberml.logcache import write_manifest  # noqa: E402
+from cyberml.logio import FORMATS, log_path, write_log  # noqa: E402
+from cyberml.streaming import DEFAULT_CHUNK_SIZE, iter_row_ranges, merge_events, open_sink, write_chunks  # noqa: E402
+from cyberml.timestamps import format_epoch_ns  # noqa: E402
+from cyberml.tracing import traced  # noqa: E402
+
 # -----------------------------
 # Scenario configuration
 # -----------------------------
 USERS = ["j.smith", "a.lee", "m.garcia", "t.jones"]
 HOSTS = ["workstation-01", "workstation-02", "workstation-03", "fileserver-01"]
+PROCESSES = ["chrome.exe", "explorer.exe", "outlook.exe"]
+
+# Address vocabularies, indexed with NumPy instead of formatting per row
+WORKSTATION_IPS = np.array(["10.0.1." + str(i) for i in range(10, 51)], dtype=object)
+SERVER_IPS = np.array(["10.0.2." + str(i) for i in range(10, 51)], dtype=object)
+
+AUTH_COLUMNS = ["timestamp", "timestamp_ns", "username", "source_ip", "destination_host", "result"]
+PROCESS_COLUMNS = ["timestamp", "timestamp_ns", "host", "username", "process"]
+NETWORK_COLUMNS = ["timestamp", "timestamp_ns", "src_ip", "dst_ip", "bytes_sent"]
 
-def generate_auth_logs(comp_user, attacker_ip):
-    rows = []
-    base = datetime.now()
+def _choice(rng, values, n):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
 
-    # Normal logins
-    for i in range(50):
-        rows.append({
-            "timestamp": (base + timedelta(minutes=i)).isoformat() + "Z",
-            "username": random.choice(USERS),
-            "source_ip": "10.0.1." + str(random.randint(10, 50)),
-            "destination_host": random.choice(HOSTS),
-            "result": "success"
-        })
+def _render(df, base, columns):
+    ns = (np.datetime64(base, "ns") + df["offset_us"].to_numpy().astype("timedelta64[us]")).astype(np.int64)
+    df = df.copy()
+    df["timestamp"] = format_epoch_ns(ns)
+    df["timestamp_ns"] = ns
+    return df[columns].reset_index(drop=True)
 
+def _finalize(background, attack, base, columns):
+    df = pd.concat([background, attack], ignore_index=True)
+    return _render(df.sort_values("offset_us", kind="stable"), base, columns)
+
+def _stream(background_fn, attack, n_rows, chunk_size, base, columns):
+    chunks = (background_fn(start, stop) for start, stop in iter_row_ranges(n_rows, chunk_size))
+    for chunk in merge_events(chunks, attack, "offset_us"):
+        yield _render(chunk, base, columns)
+
+# -----------------------------
+# Authentication logs
+# -----------------------------
+def _auth_background(rng, start, stop):
+    # Normal logins, one per minute
+    n = stop - start
+    return pd.DataFrame({
+        "offset_us": np.arange(start, stop, dtype=np.int64) * 60_000_000,
+        "username": _choice(rng, USERS, n),
+        "source_ip": _choice(rng, WORKSTATION_IPS, n),
+        "destination_host": _choice(rng, HOSTS, n),
+        "result": "success"
+    })
+
+def _auth_attack(comp_user, attacker_ip):
     # Malicious login
-    rows.append({
-        "timestamp": (base + timedelta(minutes=55)).isoformat() + "Z",
+    return pd.DataFrame([{
+        "offset_us": 55 * 60_000_000,
         "username": comp_user,
         "source_ip": attacker_ip,
         "destination_host": "workstation-02",
         "result": "success"
-    })
+    }])
 
-    return pd.DataFrame(rows)
+@traced("scenario_02.generate_auth_logs", category="generate", rows=len)
+def generate_auth_logs(comp_user, attacker_ip, n_rows=50, base=None, rng=None):
+    base = base or datetime.now()
+    rng = rng if rng is not None else np.random.default_rng()
+    return _finalize(_auth_background(rng, 0, n_rows), _auth_attack(comp_user, attacker_ip), base, AUTH_COLUMNS)
 
-def generate_process_logs(comp_user):
-    rows = []
-    base = datetime.now()
+def stream_auth_logs(comp_user, attacker_ip, n_rows=50, base=None, rng=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    base = base or datetime.now()
+    rng = rng if rng is not None else np.random.default_rng()
+    return _stream(lambda start, stop: _auth_background(rng, start, stop),
+                   _auth_attack(comp_user, attacker_ip), n_rows, chunk_size, base, AUTH_COLUMNS)
 
-    # Normal processes
-    for i in range(100):
-        rows.append({
-            "timestamp": (base + timedelta(seconds=i)).isoformat() + "Z",
-            "host": random.choice(HOSTS),
-            "username": random.choice(USERS),
-            "process": random.choice(["chrome.exe", "explorer.exe", "outlook.exe"])
-        })
+# -----------------------------
+# Process creation logs
+# -----------------------------
+def _process_background(rng, start, stop):
+    # Normal processes, one per second
+    n = stop - start
+    return pd.DataFrame({
+        "offset_us": np.arange(start, stop, dtype=np.int64) * 1_000_000,
+        "host": _choice(rng, HOSTS, n),
+        "username": _choice(rng, USERS, n),
+        "process": _choice(rng, PROCESSES, n)
+    })
 
-    # Malicious process
-    rows.append({
-        "timestamp": (base + timedelta(seconds=200)).isoformat() + "Z",
+def _process_attack(comp_user):
+    # Malicious process, two minutes after the malicious login
+    return pd.DataFrame([{
+        "offset_us": 57 * 60_000_000,
         "host": "workstation-02",
         "username": comp_user,
         "process": "mimikatz.exe"
-    })
+    }])
 
-    return pd.DataFrame(rows)
+@traced("scenario_02.generate_process_logs", category="generate", rows=len)
+def generate_process_logs(comp_user, n_rows=100, base=None, rng=None):
+    base = base or datetime.now()
+    rng = rng if rng is not None else np.random.default_rng()
+    return _finalize(_process_background(rng, 0, n_rows), _process_attack(comp_user), base, PROCESS_COLUMNS)
 
-def generate_network_logs(attacker_ip):
-    rows = []
-    base = datetime.now()
+def stream_process_logs(comp_user, n_rows=100, base=None, rng=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    base = base or datetime.now()
+    rng = rng if rng is not None else np.random.default_rng()
+    return _stream(lambda start, stop: _process_background(rng, start, stop),
+                   _process_attack(comp_user), n_rows, chunk_size, base, PROCESS_COLUMNS)
 
-    # Normal traffic
-    for i in range(80):
-        rows.append({
-            "timestamp": (base + timedelta(seconds=i)).isoformat() + "Z",
-            "src_ip": "10.0.1." + str(random.randint(10, 50)),
-            "dst_ip": "10.0.2." + str(random.randint(10, 50)),
-            "bytes_sent": random.randint(200, 2000)
-        })
-
-    # Exfil attempt
-    rows.append({
-        "timestamp": (base + timedelta(seconds=300)).isoformat() + "Z",
-        "src_ip": attacker_ip,
-        "dst_ip": "185.199.110." + str(random.randint(1, 254)),
-        "bytes_sent": random.randint(50000, 200000)
+# -----------------------------
+# Network connection logs
+# -----------------------------
+def _network_background(rng, start, stop):
+    # Normal traffic, one flow per second
+    n = stop - start
+    return pd.DataFrame({
+        "offset_us": np.arange(start, stop, dtype=np.int64) * 1_000_000,
+        "src_ip": _choice(rng, WORKSTATION_IPS, n),
+        "dst_ip": _choice(rng, SERVER_IPS, n),
+        "bytes_sent": rng.integers(200, 2001, n)
     })
 
-    return pd.DataFrame(rows)
-
-def main():
-    comp_user = random.choice(USERS)
-    attacker_ip = "185.199.110." + str(random.randint(1, 254))
-
-    auth = generate_auth_logs(comp_user, attacker_ip)
-    proc = generate_process_logs(comp_user)
-    net = generate_network_logs(attacker_ip)
-
-    auth.to_csv(os.path.join(LOG_DIR, "auth.csv"), index=False)
-    proc.to_csv(os.path.join(LOG_DIR, "process.csv"), index=False)
-    net.to_csv(os.path.join(LOG_DIR, "network.csv"), index=False)
+def _network_attack(attacker_ip, rng):
+    # Exfil attempt, five minutes after the malicious login
+    return pd.DataFrame([{
+        "offset_us": 60 * 60_000_000,
+        "src_ip": attacker_ip,
+        "dst_ip": "185.199.110." + str(int(rng.integers(1, 255))),
+        "bytes_sent": int(rng.integers(50000, 200001))
+    }])
+
+@traced("scenario_02.generate_network_logs", category="generate", rows=len)
+def generate_network_logs(attacker_ip, n_rows=80, base=None, rng=None):
+    base = base or datetime.now()
+    rng = rng if rng is not None else np.random.default_rng()
+    return _finalize(_network_background(rng, 0, n_rows), _network_attack(attacker_ip, rng), base, NETWORK_COLUMNS)
+
+def stream_network_logs(attacker_ip, n_rows=80, base=None, rng=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    base = base or datetime.now()
+    rng = rng if rng is not None else np.random.default_rng()
+    return _stream(lambda start, stop: _network_background(rng, start, stop),
+                   _network_attack(attacker_ip, rng), n_rows, chunk_size, base, NETWORK_COLUMNS)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Scenario 02 domain logs.")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="Multiply the default 50 / 100 / 80 auth / process / network rows.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write logs chunk by chunk instead of building full DataFrames in memory.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows per chunk in --stream mode.")
+    parser.add_argument("--format", choices=FORMATS, default="csv",
+                        help="Output format; parquet/feather keep typed timestamps and categorical columns.")
+    add_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    log_dir, eval_dir = output_dirs(args, LOG_DIR, EVAL_DIR)
+
+    # Seeded runs are reproducible from (scenario, seed, student); see cyberml.cohort
+    streams = StudentStreams("scenario_02", args.seed, args.student_id)
+    incident = streams.rng("incident")
+    comp_user = USERS[int(incident.integers(0, len(USERS)))]
+    attacker_ip = "185.199.110." + str(int(incident.integers(1, 255)))
+
+    base = streams.base_time()
+    auth_rng = streams.rng("auth")
+    process_rng = streams.rng("process")
+    network_rng = streams.rng("network")
+
+    if args.stream:
+        write_chunks(stream_auth_logs(comp_user, attacker_ip, 50 * args.scale, base, auth_rng, args.chunk_size),
+                     open_sink(log_dir, "auth", args.format))
+        write_chunks(stream_process_logs(comp_user, 100 * args.scale, base, process_rng, args.chunk_size),
+                     open_sink(log_dir, "process", args.format))
+        write_chunks(stream_network_logs(attacker_ip, 80 * args.scale, base, network_rng, args.chunk_size),
+                     open_sink(log_dir, "network", args.format))
+    else:
+        auth = generate_auth_logs(comp_user, attacker_ip, 50 * args.scale, base, auth_rng)
+        proc = generate_process_logs(comp_user, 100 * args.scale, base, process_rng)
+        net = generate_network_logs(attacker_ip, 80 * args.scale, base, network_rng)
+
+        write_log(auth, log_path(log_dir, "auth", args.format))
+        write_log(proc, log_path(log_dir, "process", args.format))
+        write_log(net, log_path(log_dir, "network", args.format))
 
     answer_key = {
         "compromised_user": comp_user,
@@ -111,9 +217,12 @@ def main():
         "expected_mitre": ["T1078", "T1003", "T1021", "T1041"]
     }
 
-    with open(os.path.join(EVAL_DIR, "answer_key.json"), "w") as f:
+    with open(os.path.join(eval_dir, "answer_key.json"), "w") as f:
         json.dump(answer_key, f, indent=4)
 
+    # Refresh the digests notebooks use to validate their cached copies
+    write_manifest(log_dir)
+
     print("Scenario 02 data generated successfully.")
 
 if __name__ == "__main__":
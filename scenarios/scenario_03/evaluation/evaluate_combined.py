@@ -1,17 +1,15 @@
 import json
+import os
 import sys
 
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
 
-def evaluate_combined(soc_path, ml_path, key_path):
-    with open(soc_path) as f:
-        soc = json.load(f)
+from cyberml.iocs import ioc_index  # noqa: E402
 
-    with open(ml_path) as f:
-        ml = json.load(f)
-
-    with open(key_path) as f:
-        key = json.load(f)
 
+def score_combined(soc, ml, key):
     score = 0
     feedback = []
 
@@ -20,14 +18,17 @@ def evaluate_combined(soc_path, ml_path, key_path):
     ml_explanation = ml.get("explanation", "")
     anomaly_score = ml.get("anomaly_score", 0)
 
+    chain = [key["compromised_user"], key["sensitive_bucket"], key["attacker_bucket"]]
+    index = ioc_index([key["attacker_ip"]] + chain)
+
     # Alignment: SOC IOCs + ML anomaly
-    if key["attacker_ip"] in iocs and anomaly_score < -0.1:
+    if key["attacker_ip"] in index.exact(iocs) and anomaly_score < -0.1:
         score += 40
     else:
         feedback.append("SOC findings and ML anomaly detection do not clearly align.")
 
     # Full-chain triage summary
-    if all(x in triage for x in [key["compromised_user"], key["sensitive_bucket"], key["attacker_bucket"]]):
+    if index.scan(triage).issuperset(chain):
         score += 30
     else:
         feedback.append("Triage summary does not clearly describe the full attack chain.")
@@ -41,6 +42,19 @@ def evaluate_combined(soc_path, ml_path, key_path):
     return {"combined_score": score, "combined_feedback": feedback}
 
 
+def evaluate_combined(soc_path, ml_path, key_path):
+    with open(soc_path) as f:
+        soc = json.load(f)
+
+    with open(ml_path) as f:
+        ml = json.load(f)
+
+    with open(key_path) as f:
+        key = json.load(f)
+
+    return score_combined(soc, ml, key)
+
+
 if __name__ == "__main__":
     print(json.dumps(
         evaluate_combined(sys.argv[1], sys.argv[2], sys.argv[3]),
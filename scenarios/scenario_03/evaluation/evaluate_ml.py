@@ -1,11 +1,49 @@
 import json
+import os
 import sys
 
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
 
-def evaluate_ml(student_path, key_path):
-    with open(student_path) as f:
-        student = json.load(f)
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "logs")
+
+_reference = {}
+
+
+def _reference_score(log_dir, user):
+    try:
+        from cyberml.logio import load_log
+        from cyberml.models import reference_model
+    except ImportError:
+        return None
+
+    # The model is trained ahead of time (cyberml.models train, or batch_grade); never here
+    try:
+        model = reference_model("scenario_03", train=False)
+        features = load_log(log_dir, "cloud_api_features")
+    except (OSError, ValueError):
+        return None
+    match = features["user"].astype(str).eq(user).to_numpy()
+    return float(model.score_frame(features)[match].min()) if match.any() else None
+
+
+def reference_score(key):
+    """
+    The baseline model's anomaly score for the compromised user, or None if unavailable.
 
+    None when the model has not been trained or the features log cannot be
+    read; either way the outcome is cached, so grading does no repeated I/O.
+    """
+    user = key["compromised_user"]
+    # Per-student keys (cyberml.cohort) point at that student's own logs
+    log_dir = key.get("log_dir", LOG_DIR)
+    if (log_dir, user) not in _reference:
+        _reference[log_dir, user] = _reference_score(log_dir, user)
+    return _reference[log_dir, user]
+
+
+def score_ml(student, key):
     score = 0
     feedback = []
 
@@ -38,7 +76,21 @@ def evaluate_ml(student_path, key_path):
     else:
         feedback.append("ML explanation too short or lacking depth.")
 
-    return {"ml_score": score, "ml_feedback": feedback}
+    result = {"ml_score": score, "ml_feedback": feedback}
+    if key:
+        # Reported alongside the grade so instructors can compare against a baseline
+        result["reference_anomaly_score"] = reference_score(key)
+    return result
+
+
+def evaluate_ml(student_path, key_path):
+    with open(student_path) as f:
+        student = json.load(f)
+
+    with open(key_path) as f:
+        key = json.load(f)
+
+    return score_ml(student, key)
 
 
 if __name__ == "__main__":
@@ -1,14 +1,59 @@
 import json
+import os
 import sys
 
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
 
-def evaluate_soc(student_path, key_path):
-    with open(student_path) as f:
-        student = json.load(f)
+from cyberml.iocs import ioc_index  # noqa: E402
+from cyberml.logio import load_log  # noqa: E402
+from cyberml.rules import RuleError, grade_rule  # noqa: E402
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "logs")
+
+# Rows of each log the attacker produced, as rules over the answer key
+ATTACK_ROWS = {
+    "cloud_iam": 'user == "{compromised_user}" and source_ip == "{attacker_ip}"',
+    "cloud_api": 'user == "{compromised_user}" and region == "{attacker_region}"',
+    "storage_access": 'user == "{compromised_user}" and source_ip == "{attacker_ip}"',
+}
+
+_logs = {}
+
+
+def scenario_logs(log_dir=LOG_DIR):
+    # Loaded once per process, so batch grading reads each log only once.
+    # Only the latest dataset is kept: per-student cohorts change it every call.
+    # None if the logs are missing or unreadable (e.g. a cohort never generated).
+    if log_dir not in _logs:
+        _logs.clear()
+        try:
+            _logs[log_dir] = {name: load_log(log_dir, name) for name in ATTACK_ROWS}
+        except (OSError, ValueError):
+            _logs[log_dir] = None
+    return _logs[log_dir]
+
+
+def run_detection_rule(detection_rule, key):
+    """
+    Executes the rule against the scenario logs; None if it is not a valid
+    rule or the logs cannot be loaded.
+
+    A key generated for one student (see cyberml.cohort) carries the
+    "log_dir" of that student's dataset.
+    """
+    logs = scenario_logs(key.get("log_dir", LOG_DIR))
+    if logs is None:
+        return None
+    attack_rows = {name: rule.format(**key) for name, rule in ATTACK_ROWS.items()}
+    try:
+        return grade_rule(detection_rule, logs, attack_rows)
+    except RuleError:
+        return None
 
-    with open(key_path) as f:
-        key = json.load(f)
 
+def score_soc(student, key):
     score = 0
     feedback = []
 
@@ -17,26 +62,30 @@ def evaluate_soc(student_path, key_path):
     triage = student.get("triage_summary", "")
     detection_rule = student.get("detection_rule", "")
 
+    index = ioc_index([key["compromised_user"], key["attacker_ip"], key["sensitive_bucket"], key["attacker_bucket"]])
+    ioc_hits = index.exact(iocs)
+    rule_hits = index.scan(detection_rule)
+
     # Compromised user
-    if key["compromised_user"] in iocs:
+    if key["compromised_user"] in ioc_hits:
         score += 20
     else:
         feedback.append("Compromised user not clearly identified in IOCs.")
 
     # Attacker IP
-    if key["attacker_ip"] in iocs:
+    if key["attacker_ip"] in ioc_hits:
         score += 20
     else:
         feedback.append("Attacker IP missing from IOCs.")
 
     # Sensitive bucket
-    if key["sensitive_bucket"] in iocs:
+    if key["sensitive_bucket"] in ioc_hits:
         score += 15
     else:
         feedback.append("Sensitive bucket not identified as an IOC.")
 
     # Exfil bucket
-    if key["attacker_bucket"] in iocs:
+    if key["attacker_bucket"] in ioc_hits:
         score += 15
     else:
         feedback.append("Exfiltration bucket not identified as an IOC.")
@@ -53,13 +102,35 @@ def evaluate_soc(student_path, key_path):
     else:
         feedback.append("Triage summary too short or lacking detail.")
 
-    # Detection rule
-    if any(x in detection_rule for x in [key["attacker_ip"], key["sensitive_bucket"], key["attacker_bucket"]]):
+    # Detection rule: executed against the logs when it is written in the rule
+    # language, otherwise checked for the attacker's indicators
+    rule_result = run_detection_rule(detection_rule, key)
+    if rule_result is not None:
+        passed = rule_result["true_positives"] > 0 and rule_result["precision"] >= 0.5
+    else:
+        passed = bool(rule_hits & {key["attacker_ip"], key["sensitive_bucket"], key["attacker_bucket"]})
+
+    if passed:
         score += 5
+    elif rule_result is not None:
+        feedback.append(
+            f"Detection rule flagged {rule_result['true_positives']} attack rows and "
+            f"{rule_result['false_positives']} benign rows."
+        )
     else:
         feedback.append("Detection rule does not clearly target attacker behavior.")
 
-    return {"soc_score": score, "soc_feedback": feedback}
+    return {"soc_score": score, "soc_feedback": feedback, "detection_rule_result": rule_result}
+
+
+def evaluate_soc(student_path, key_path):
+    with open(student_path) as f:
+        student = json.load(f)
+
+    with open(key_path) as f:
+        key = json.load(f)
+
+    return score_soc(student, key)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,8 @@
+import io
 import os
+import sys
 import json
-import random
-from datetime import datetime, timedelta
+import argparse
 
 import pandas as pd
 import numpy as np
@@ -11,6 +12,17 @@ import numpy as np
 # -----------------------------
 GEN_DIR = os.path.dirname(os.path.abspath(__file__))          # /scenario_03/generator
 BASE_DIR = os.path.abspath(os.path.join(GEN_DIR, ".."))       # /scenario_03
+REPO_ROOT = os.path.abspath(os.path.join(BASE_DIR, "..", ".."))
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from cyberml.cohort import StudentStreams, add_arguments, output_dirs  # noqa: E402
+from cyberml.logcache import write_manifest  # noqa: E402
+from cyberml.logio import FORMATS, log_path, write_log  # noqa: E402
+from cyberml.streaming import DEFAULT_CHUNK_SIZE, iter_row_ranges, merge_events, open_sink, write_chunks  # noqa: E402
+from cyberml.timestamps import format_epoch_ns, frame_epoch_ns, hour_of_day  # noqa: E402
+from cyberml.tracing import traced  # noqa: E402
 
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 EVAL_DIR = os.path.join(BASE_DIR, "evaluation")
@@ -38,193 +50,341 @@ SENSITIVE_OBJECTS = [
 ]
 
 
-def random_internal_ip():
-    return INTERNAL_IP_RANGE.format(random.randint(1, 5), random.randint(10, 250))
+def random_internal_ip(rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    return INTERNAL_IP_RANGE.format(int(rng.integers(1, 6)), int(rng.integers(10, 251)))
 
 
-def random_external_ip():
-    return EXTERNAL_IP_RANGE.format(random.randint(1, 254))
+def random_external_ip(rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    return EXTERNAL_IP_RANGE.format(int(rng.integers(1, 255)))
+
+
+# -----------------------------
+# Vectorized generation helpers
+# -----------------------------
+# Background traffic is drawn from small vocabularies with NumPy integer
+# indexing, so generating millions of rows never touches a per-row Python loop.
+INTERNAL_IPS = np.array(
+    [INTERNAL_IP_RANGE.format(a, b) for a in range(1, 6) for b in range(10, 251)],
+    dtype=object
+)
+APP_LOG_OBJECTS = np.array([f"logs/app_{i}.log" for i in range(1, 101)], dtype=object)
+NORMAL_API_CALLS = ["DescribeInstances", "ListBuckets", "GetParameter"]
+
+
+def build_user_pool(n_users):
+    """
+    Returns the scenario users padded with synthetic accounts up to n_users.
+    """
+    if n_users <= len(USERS):
+        return list(USERS)
+    return list(USERS) + [f"user_{i:05d}" for i in range(n_users - len(USERS))]
+
+
+def _choice(rng, values, n):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+
+
+def _background_offsets(start, stop, interval_s):
+    # One event every interval_s seconds, matching the original minute cadence
+    return np.arange(start, stop, dtype=np.int64) * int(round(interval_s * 1e6))
+
+
+def _attack_offset(minutes, seconds=0):
+    return int((minutes * 60 + seconds) * 1e6)
+
+
+def _render(df, base_time, columns):
+    """
+    Renders ISO and epoch-nanosecond timestamps from microsecond offsets in a single vectorized pass.
+    """
+    ns = (np.datetime64(base_time, "ns") + df["offset_us"].to_numpy().astype("timedelta64[us]")).astype(np.int64)
+    df = df.copy()
+    df["timestamp"] = format_epoch_ns(ns)
+    df["timestamp_ns"] = ns
+    return df[columns].reset_index(drop=True)
+
+
+def _finalize(background, attack, base_time, columns):
+    """
+    Merges background rows with the attack chain and orders everything by time.
+    """
+    df = pd.concat([background, attack], ignore_index=True)
+    df = df.sort_values("offset_us", kind="stable")
+    return _render(df, base_time, columns)
+
+
+def _stream(background_fn, attack, n_rows, chunk_size, base_time, columns):
+    """
+    Yields time-ordered chunks of background rows with the attack chain merged in.
+    """
+    chunks = (background_fn(start, stop) for start, stop in iter_row_ranges(n_rows, chunk_size))
+    for chunk in merge_events(chunks, attack, "offset_us"):
+        yield _render(chunk, base_time, columns)
 
 
 # -----------------------------
 # IAM log generation
 # -----------------------------
-def generate_iam_logs(comp_user, attacker_ip, attacker_region, base_time):
-    rows = []
+IAM_COLUMNS = ["timestamp", "timestamp_ns", "user", "event_name", "source_ip", "region", "result"]
 
-    # Normal logins
-    for i in range(40):
-        rows.append({
-            "timestamp": (base_time + timedelta(minutes=i)).isoformat() + "Z",
-            "user": random.choice(USERS),
-            "event_name": "ConsoleLogin",
-            "source_ip": random_internal_ip(),
-            "region": random.choice(REGIONS_NORMAL),
-            "result": "Success"
-        })
 
-    # Suspicious login
-    rows.append({
-        "timestamp": (base_time + timedelta(minutes=45)).isoformat() + "Z",
-        "user": comp_user,
+def _iam_background(rng, start, stop, users, interval_s):
+    # Normal logins
+    n = stop - start
+    return pd.DataFrame({
+        "offset_us": _background_offsets(start, stop, interval_s),
+        "user": _choice(rng, users, n),
         "event_name": "ConsoleLogin",
-        "source_ip": attacker_ip,
-        "region": attacker_region,
+        "source_ip": INTERNAL_IPS[rng.integers(0, len(INTERNAL_IPS), n)],
+        "region": _choice(rng, REGIONS_NORMAL, n),
         "result": "Success"
     })
 
-    # Privilege escalation
-    rows.append({
-        "timestamp": (base_time + timedelta(minutes=47)).isoformat() + "Z",
-        "user": comp_user,
-        "event_name": "CreateAccessKey",
-        "source_ip": attacker_ip,
-        "region": attacker_region,
-        "result": "Success"
-    })
-    rows.append({
-        "timestamp": (base_time + timedelta(minutes=49)).isoformat() + "Z",
-        "user": comp_user,
-        "event_name": "AttachRolePolicy",
-        "source_ip": attacker_ip,
-        "region": attacker_region,
-        "result": "Success"
-    })
-    rows.append({
-        "timestamp": (base_time + timedelta(minutes=51)).isoformat() + "Z",
-        "user": comp_user,
-        "event_name": "AssumeRole",
-        "source_ip": attacker_ip,
-        "region": attacker_region,
-        "result": "Success"
-    })
 
-    return pd.DataFrame(rows)
+def _iam_attack(comp_user, attacker_ip, attacker_region):
+    # Suspicious login followed by privilege escalation
+    return pd.DataFrame([
+        {
+            "offset_us": _attack_offset(minute),
+            "user": comp_user,
+            "event_name": event_name,
+            "source_ip": attacker_ip,
+            "region": attacker_region,
+            "result": "Success"
+        }
+        for minute, event_name in [
+            (45, "ConsoleLogin"),
+            (47, "CreateAccessKey"),
+            (49, "AttachRolePolicy"),
+            (51, "AssumeRole"),
+        ]
+    ])
+
+
+@traced("scenario_03.generate_iam_logs", category="generate", rows=len)
+def generate_iam_logs(comp_user, attacker_ip, attacker_region, base_time,
+                      n_rows=40, users=USERS, interval_s=60, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    return _finalize(
+        _iam_background(rng, 0, n_rows, users, interval_s),
+        _iam_attack(comp_user, attacker_ip, attacker_region),
+        base_time, IAM_COLUMNS
+    )
+
+
+def stream_iam_logs(comp_user, attacker_ip, attacker_region, base_time,
+                    n_rows=40, users=USERS, interval_s=60, rng=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    rng = rng if rng is not None else np.random.default_rng()
+    return _stream(
+        lambda start, stop: _iam_background(rng, start, stop, users, interval_s),
+        _iam_attack(comp_user, attacker_ip, attacker_region),
+        n_rows, chunk_size, base_time, IAM_COLUMNS
+    )
 
 
 # -----------------------------
 # CloudTrail API log generation
 # -----------------------------
-def generate_api_logs(comp_user, attacker_ip, attacker_region, base_time):
-    rows = []
+API_COLUMNS = ["timestamp", "timestamp_ns", "user", "event_name", "resource", "region", "latency_ms", "status"]
 
-    # Normal API calls
-    for i in range(60):
-        rows.append({
-            "timestamp": (base_time + timedelta(minutes=i)).isoformat() + "Z",
-            "user": random.choice(USERS),
-            "event_name": random.choice(["DescribeInstances", "ListBuckets", "GetParameter"]),
-            "resource": random.choice(BUCKETS_NORMAL),
-            "region": random.choice(REGIONS_NORMAL),
-            "latency_ms": random.randint(20, 200),
-            "status": "200"
-        })
 
-    # Discovery phase
-    rows.append({
-        "timestamp": (base_time + timedelta(minutes=55)).isoformat() + "Z",
-        "user": comp_user,
-        "event_name": "ListBuckets",
-        "resource": "*",
-        "region": attacker_region,
-        "latency_ms": random.randint(30, 150),
-        "status": "200"
-    })
-    rows.append({
-        "timestamp": (base_time + timedelta(minutes=56)).isoformat() + "Z",
-        "user": comp_user,
-        "event_name": "ListObjects",
-        "resource": BUCKET_SENSITIVE,
-        "region": attacker_region,
-        "latency_ms": random.randint(30, 150),
+def _api_background(rng, start, stop, users, interval_s):
+    # Normal API calls
+    n = stop - start
+    return pd.DataFrame({
+        "offset_us": _background_offsets(start, stop, interval_s),
+        "user": _choice(rng, users, n),
+        "event_name": _choice(rng, NORMAL_API_CALLS, n),
+        "resource": _choice(rng, BUCKETS_NORMAL, n),
+        "region": _choice(rng, REGIONS_NORMAL, n),
+        "latency_ms": rng.integers(20, 201, n),
         "status": "200"
     })
 
-    # Collection phase
-    for i, obj in enumerate(SENSITIVE_OBJECTS):
-        rows.append({
-            "timestamp": (base_time + timedelta(minutes=57, seconds=30 * i)).isoformat() + "Z",
+
+def _api_attack(comp_user, attacker_region, rng):
+    def row(offset_us, event_name, resource, latency_ms):
+        return {
+            "offset_us": offset_us,
             "user": comp_user,
-            "event_name": "GetObject",
-            "resource": f"{BUCKET_SENSITIVE}/{obj}",
+            "event_name": event_name,
+            "resource": resource,
             "region": attacker_region,
-            "latency_ms": random.randint(40, 250),
+            "latency_ms": latency_ms,
             "status": "200"
-        })
+        }
+
+    # Discovery phase
+    rows = [
+        row(_attack_offset(55), "ListBuckets", "*", int(rng.integers(30, 151))),
+        row(_attack_offset(56), "ListObjects", BUCKET_SENSITIVE, int(rng.integers(30, 151))),
+    ]
+
+    # Collection phase
+    for i, obj in enumerate(SENSITIVE_OBJECTS):
+        rows.append(row(
+            _attack_offset(57, 30 * i), "GetObject", f"{BUCKET_SENSITIVE}/{obj}", int(rng.integers(40, 251))
+        ))
 
     # Exfiltration
-    rows.append({
-        "timestamp": (base_time + timedelta(minutes=60)).isoformat() + "Z",
-        "user": comp_user,
-        "event_name": "PutObject",
-        "resource": BUCKET_ATTACKER,
-        "region": attacker_region,
-        "latency_ms": random.randint(50, 300),
-        "status": "200"
-    })
+    rows.append(row(_attack_offset(60), "PutObject", BUCKET_ATTACKER, int(rng.integers(50, 301))))
 
     return pd.DataFrame(rows)
 
 
+@traced("scenario_03.generate_api_logs", category="generate", rows=len)
+def generate_api_logs(comp_user, attacker_ip, attacker_region, base_time,
+                      n_rows=60, users=USERS, interval_s=60, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    return _finalize(
+        _api_background(rng, 0, n_rows, users, interval_s),
+        _api_attack(comp_user, attacker_region, rng),
+        base_time, API_COLUMNS
+    )
+
+
+def stream_api_logs(comp_user, attacker_ip, attacker_region, base_time,
+                    n_rows=60, users=USERS, interval_s=60, rng=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    rng = rng if rng is not None else np.random.default_rng()
+    return _stream(
+        lambda start, stop: _api_background(rng, start, stop, users, interval_s),
+        _api_attack(comp_user, attacker_region, rng),
+        n_rows, chunk_size, base_time, API_COLUMNS
+    )
+
+
 # -----------------------------
 # S3 access logs (optional for SOC)
 # -----------------------------
-def generate_storage_logs(comp_user, attacker_ip, base_time):
-    rows = []
+STORAGE_COLUMNS = ["timestamp", "timestamp_ns", "user", "bucket", "object", "bytes_read", "bytes_written", "source_ip"]
+
 
+def _storage_background(rng, start, stop, users, interval_s):
     # Normal access
-    for i in range(50):
-        rows.append({
-            "timestamp": (base_time + timedelta(minutes=i)).isoformat() + "Z",
-            "user": random.choice(USERS),
-            "bucket": random.choice(BUCKETS_NORMAL),
-            "object": f"logs/app_{random.randint(1, 100)}.log",
-            "bytes_read": random.randint(1000, 50000),
-            "bytes_written": random.randint(0, 2000),
-            "source_ip": random_internal_ip()
-        })
+    n = stop - start
+    return pd.DataFrame({
+        "offset_us": _background_offsets(start, stop, interval_s),
+        "user": _choice(rng, users, n),
+        "bucket": _choice(rng, BUCKETS_NORMAL, n),
+        "object": APP_LOG_OBJECTS[rng.integers(0, len(APP_LOG_OBJECTS), n)],
+        "bytes_read": rng.integers(1000, 50001, n),
+        "bytes_written": rng.integers(0, 2001, n),
+        "source_ip": INTERNAL_IPS[rng.integers(0, len(INTERNAL_IPS), n)]
+    })
+
 
+def _storage_attack(comp_user, attacker_ip, rng):
     # Sensitive reads
-    for i, obj in enumerate(SENSITIVE_OBJECTS):
-        rows.append({
-            "timestamp": (base_time + timedelta(minutes=57, seconds=30 * i)).isoformat() + "Z",
+    rows = [
+        {
+            "offset_us": _attack_offset(57, 30 * i),
             "user": comp_user,
             "bucket": BUCKET_SENSITIVE,
             "object": obj,
-            "bytes_read": random.randint(50000, 200000),
+            "bytes_read": int(rng.integers(50000, 200001)),
             "bytes_written": 0,
             "source_ip": attacker_ip
-        })
+        }
+        for i, obj in enumerate(SENSITIVE_OBJECTS)
+    ]
 
     # Exfiltration
     rows.append({
-        "timestamp": (base_time + timedelta(minutes=60)).isoformat() + "Z",
+        "offset_us": _attack_offset(60),
         "user": comp_user,
         "bucket": BUCKET_ATTACKER,
         "object": "exfiltrated_archive.zip",
         "bytes_read": 0,
-        "bytes_written": random.randint(50000000, 200000000),
+        "bytes_written": int(rng.integers(50000000, 200000001)),
         "source_ip": attacker_ip
     })
 
     return pd.DataFrame(rows)
 
 
+@traced("scenario_03.generate_storage_logs", category="generate", rows=len)
+def generate_storage_logs(comp_user, attacker_ip, base_time,
+                          n_rows=50, users=USERS, interval_s=60, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    return _finalize(
+        _storage_background(rng, 0, n_rows, users, interval_s),
+        _storage_attack(comp_user, attacker_ip, rng),
+        base_time, STORAGE_COLUMNS
+    )
+
+
+def stream_storage_logs(comp_user, attacker_ip, base_time,
+                        n_rows=50, users=USERS, interval_s=60, rng=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    rng = rng if rng is not None else np.random.default_rng()
+    return _stream(
+        lambda start, stop: _storage_background(rng, start, stop, users, interval_s),
+        _storage_attack(comp_user, attacker_ip, rng),
+        n_rows, chunk_size, base_time, STORAGE_COLUMNS
+    )
+
+
 # -----------------------------
 # ML Feature Dataset Generation
 # -----------------------------
+def _error_rate(status, user):
+    # Share of non-200 responses per user (boolean mean, no per-group callback)
+    return status.ne("200").groupby(user).mean()
+
+
+def _region_entropy(user_codes, n_users, regions):
+    """
+    Shannon entropy (bits) of each user's region distribution.
+
+    Region counts come from a single bincount over (user, region) pairs. Each
+    user's probabilities are ordered like value_counts() (count descending,
+    ties by first appearance) and summed over exactly as many regions as the
+    user visited, so the result matches a per-group value_counts() bit for bit.
+    """
+    region_codes, _ = pd.factorize(np.asarray(regions, dtype=object))
+    valid = (user_codes >= 0) & (region_codes >= 0)
+    user_codes, region_codes = user_codes[valid], region_codes[valid]
+    n_regions = max(int(region_codes.max()) + 1 if len(region_codes) else 0, 1)
+
+    pairs = user_codes.astype(np.int64) * n_regions + region_codes
+    counts = np.bincount(pairs, minlength=n_users * n_regions).reshape(n_users, n_regions)
+
+    first_seen = np.full(n_users * n_regions, len(pairs), dtype=np.int64)
+    unique_pairs, first_index = np.unique(pairs, return_index=True)
+    first_seen[unique_pairs] = first_index
+    first_seen = first_seen.reshape(n_users, n_regions)
+
+    order = np.lexsort((first_seen, -counts), axis=1)
+    counts = np.take_along_axis(counts, order, axis=1)
+
+    totals = counts.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = counts / totals
+        terms = np.where(counts > 0, p * np.log2(p), 0.0)
+
+    # Sum each row over its visited regions only, one slice per distinct width
+    visited = (counts > 0).sum(axis=1)
+    entropy = np.zeros(n_users)
+    for k in np.unique(visited):
+        rows = visited == k
+        entropy[rows] = terms[rows, :k].sum(axis=1)
+
+    return entropy * -1
+
+
+@traced("scenario_03.generate_api_feature_table", category="features", rows=len, rows_of="input")
 def generate_api_feature_table(api_df):
     """
     Produces ML‑friendly behavioral features for Scenario 03C.
     """
     df = api_df.copy()
 
-    # Convert timestamp
-    df["timestamp"] = pd.to_datetime(df["timestamp"].str.replace("Z", ""), utc=True)
-    df["hour"] = df["timestamp"].dt.hour
+    df["hour"] = hour_of_day(frame_epoch_ns(df))
 
     # Group by user for behavioral aggregation
     grouped = df.groupby("user")
+    user_codes = grouped.ngroup().to_numpy()
 
     feature_table = pd.DataFrame({
         "user": grouped.size().index,
@@ -232,8 +392,8 @@ def generate_api_feature_table(api_df):
         "unique_api_calls": grouped["event_name"].nunique().values,
         "unique_resources": grouped["resource"].nunique().values,
         "avg_latency": grouped["latency_ms"].mean().values,
-        "error_rate": (grouped["status"].apply(lambda x: (x != "200").mean())).values,
-        "region_entropy": grouped["region"].apply(lambda x: x.value_counts(normalize=True).mul(np.log2(x.value_counts(normalize=True))).sum() * -1).values,
+        "error_rate": _error_rate(df["status"], df["user"]).values,
+        "region_entropy": _region_entropy(user_codes, grouped.ngroups, df["region"]),
         "hour_mean": grouped["hour"].mean().values,
         "hour_std": grouped["hour"].std().fillna(0).values
     })
@@ -242,33 +402,377 @@ def generate_api_feature_table(api_df):
 
 
 # -----------------------------
-# Main
+# Incremental feature table
 # -----------------------------
-def main():
-    base_time = datetime.now()
-    compromised_user = random.choice(USERS)
-    attacker_ip = random_external_ip()
-    attacker_region = random.choice(REGIONS_SUSPICIOUS)
+class IncrementalFeatureTable:
+    """
+    Mergeable per-user state behind generate_api_feature_table.
+
+    Keeps counts, latency / hour sums, hour sum-of-squares, error counts and
+    per-(user, value) counts for event names, resources and regions. New API
+    rows are folded in with update(), so refreshing the feature table costs
+    time proportional to the new rows plus the number of users, not the
+    full history. Results match generate_api_feature_table up to
+    floating-point rounding in hour_std and region_entropy.
+    """
 
-    iam_df = generate_iam_logs(compromised_user, attacker_ip, attacker_region, base_time)
-    api_df = generate_api_logs(compromised_user, attacker_ip, attacker_region, base_time)
-    storage_df = generate_storage_logs(compromised_user, attacker_ip, base_time)
+    SUM_COLUMNS = ["api_count_total", "latency_sum", "hour_sum", "hour_sumsq", "errors"]
+
+    def __init__(self):
+        self.totals = pd.DataFrame(columns=self.SUM_COLUMNS, dtype="float64")
+        self.totals.index.name = "user"
+        self.event_counts = pd.Series(dtype="int64")
+        self.resource_counts = pd.Series(dtype="int64")
+        self.region_counts = pd.Series(dtype="int64")
+
+        # Byte offset into cloud_api.csv that has already been consumed
+        self.csv_offset = 0
+
+    @staticmethod
+    def _add(left, right):
+        return left.add(right, fill_value=0) if len(left) else right
+
+    def update(self, api_df):
+        """
+        Folds a batch of new CloudTrail API rows into the state.
+        """
+        if api_df.empty:
+            return self
+
+        hour = hour_of_day(frame_epoch_ns(api_df)).astype("float64")
+
+        batch = pd.DataFrame({
+            "user": api_df["user"].to_numpy(),
+            "api_count_total": 1.0,
+            "latency_sum": api_df["latency_ms"].to_numpy(dtype="float64"),
+            "hour_sum": hour,
+            "hour_sumsq": hour * hour,
+            "errors": api_df["status"].ne("200").to_numpy(dtype="float64"),
+        }).groupby("user").sum()
+
+        self.totals = self._add(self.totals, batch)
+        self.event_counts = self._add(self.event_counts, api_df.groupby(["user", "event_name"]).size())
+        self.resource_counts = self._add(self.resource_counts, api_df.groupby(["user", "resource"]).size())
+        self.region_counts = self._add(self.region_counts, api_df.groupby(["user", "region"]).size())
+        return self
+
+    def merge(self, other):
+        """
+        Combines the state of another table (e.g. built from a parallel shard).
+        """
+        self.totals = self._add(self.totals, other.totals)
+        self.event_counts = self._add(self.event_counts, other.event_counts)
+        self.resource_counts = self._add(self.resource_counts, other.resource_counts)
+        self.region_counts = self._add(self.region_counts, other.region_counts)
+        return self
+
+    def update_from_csv(self, path):
+        """
+        Applies only the rows appended to `path` since the last call.
+        """
+        size = os.path.getsize(path)
+        if size < self.csv_offset:
+            raise ValueError(f"{path} shrank since the last update; rebuild the feature state")
+        if size == self.csv_offset:
+            return self
+
+        with open(path, "rb") as f:
+            f.seek(self.csv_offset)
+            data = f.read(size - self.csv_offset)
+
+        # Ignore a trailing partial line from a writer that is still appending
+        data = data[:data.rfind(b"\n") + 1]
+        if not data:
+            return self
+
+        if self.csv_offset == 0:
+            batch = pd.read_csv(io.BytesIO(data), dtype={"status": str})
+        else:
+            batch = pd.read_csv(io.BytesIO(data), header=None, names=API_COLUMNS, dtype={"status": str})
+
+        self.csv_offset += len(data)
+        return self.update(batch)
+
+    def to_frame(self):
+        """
+        Emits the feature table in the same layout as generate_api_feature_table.
+        """
+        t = self.totals.sort_index()
+        n = t["api_count_total"]
+        hour_mean = t["hour_sum"] / n
+        hour_var = (t["hour_sumsq"] - n * hour_mean * hour_mean) / (n - 1).where(n > 1)
+
+        p = self.region_counts / self.region_counts.groupby(level="user").transform("sum")
+        region_entropy = (p * np.log2(p)).groupby(level="user").sum() * -1
+
+        return pd.DataFrame({
+            "user": t.index.to_numpy(),
+            "api_count_total": n.astype("int64").to_numpy(),
+            "unique_api_calls": self.event_counts.groupby(level="user").size().reindex(t.index).to_numpy(),
+            "unique_resources": self.resource_counts.groupby(level="user").size().reindex(t.index).to_numpy(),
+            "avg_latency": (t["latency_sum"] / n).to_numpy(),
+            "error_rate": (t["errors"] / n).to_numpy(),
+            "region_entropy": region_entropy.reindex(t.index).to_numpy(),
+            "hour_mean": hour_mean.to_numpy(),
+            "hour_std": np.sqrt(hour_var.clip(lower=0)).fillna(0).to_numpy()
+        })
 
-    # ML feature dataset
-    feature_df = generate_api_feature_table(api_df)
+    STATE_FIELDS = ["totals", "event_counts", "resource_counts", "region_counts", "csv_offset"]
 
-    # -----------------------------
-    # Save logs with new naming
-    # -----------------------------
-    iam_path = os.path.join(LOG_DIR, "cloud_iam.csv")
-    api_path = os.path.join(LOG_DIR, "cloud_api.csv")
-    storage_path = os.path.join(LOG_DIR, "storage_access.csv")
-    feature_path = os.path.join(LOG_DIR, "cloud_api_features.csv")
+    def save(self, path):
+        # Plain dict of pandas objects, so the state loads whether this file
+        # runs as a script or is imported as a module
+        pd.to_pickle({field: getattr(self, field) for field in self.STATE_FIELDS}, path)
+
+    @classmethod
+    def load(cls, path):
+        table = cls()
+        if os.path.exists(path):
+            for field, value in pd.read_pickle(path).items():
+                setattr(table, field, value)
+        return table
+
+
+# -----------------------------
+# Rolling window features (event level)
+# -----------------------------
+FEATURE_WINDOWS = {"5m": 5 * 60, "1h": 60 * 60, "24h": 24 * 60 * 60}
+
+
+def _window_starts(user_codes, ts_us, window_s):
+    """
+    For events sorted by (user, time), returns the index of the first event in
+    each event's trailing (t - window, t] window for the same user.
+
+    Users are laid out on one int64 axis (user * stride + time) so a single
+    searchsorted covers every user without crossing segment boundaries.
+    """
+    window_us = int(window_s * 1e6)
+    t_rel = ts_us - ts_us.min() if len(ts_us) else ts_us
+    stride = int(t_rel.max() if len(t_rel) else 0) + window_us + 1
+
+    if (int(user_codes.max()) + 1 if len(user_codes) else 0) * stride >= np.iinfo(np.int64).max:
+        raise ValueError("Capture window too long for the combined user/time key")
+
+    key = user_codes.astype(np.int64) * stride + t_rel
+    return np.searchsorted(key, key - window_us, side="right")
+
+
+def _window_sum(values, starts):
+    # Prefix sums turn every window aggregate into one subtraction
+    csum = np.concatenate([np.zeros((1,) + values.shape[1:], dtype=values.dtype), np.cumsum(values, axis=0)])
+    return csum[np.arange(1, len(values) + 1)] - csum[starts]
+
+
+def _window_categorical(codes, n_values, starts, counts, block=16):
+    """
+    Distinct values and Shannon entropy (bits) inside each trailing window.
+
+    Per-value prefix counts are built for `block` values at a time, so memory
+    stays at n_events * block regardless of vocabulary size.
+    """
+    distinct = np.zeros(len(codes), dtype=np.int64)
+    entropy = np.zeros(len(codes))
+
+    for lo in range(0, n_values, block):
+        hi = min(lo + block, n_values)
+        onehot = (codes[:, None] == np.arange(lo, hi)[None, :]).astype(np.int32)
+        in_window = _window_sum(onehot, starts)
+
+        distinct += (in_window > 0).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p = in_window / counts[:, None]
+            entropy -= np.where(in_window > 0, p * np.log2(p), 0.0).sum(axis=1)
+
+    return distinct, entropy
 
-    iam_df.to_csv(iam_path, index=False)
-    api_df.to_csv(api_path, index=False)
-    storage_df.to_csv(storage_path, index=False)
-    feature_df.to_csv(feature_path, index=False)
+
+@traced("scenario_03.generate_api_window_features", category="features", rows=len, rows_of="input")
+def generate_api_window_features(api_df, windows=FEATURE_WINDOWS):
+    """
+    Per-event behavioral features over trailing per-user time windows.
+
+    For every API call and window (5m / 1h / 24h by default) this emits the
+    user's call count, unique resources, region entropy and latency mean/std
+    over the window ending at that call. Events are sorted once and every
+    window aggregate comes from prefix sums, so the cost is linear in the
+    number of events per window size.
+    """
+    df = api_df.reset_index(drop=True).copy()
+    user_codes, _ = pd.factorize(df["user"])
+    ts_us = frame_epoch_ns(df) // 1000
+    order = np.lexsort((ts_us, user_codes))
+
+    user_sorted = user_codes[order]
+    ts_sorted = ts_us[order]
+    latency = df["latency_ms"].to_numpy(dtype=np.float64)[order]
+    resource_codes, resources = pd.factorize(df["resource"])
+    region_codes, regions = pd.factorize(df["region"])
+    resource_codes, region_codes = resource_codes[order], region_codes[order]
+
+    features = {}
+    for label, window_s in windows.items():
+        starts = _window_starts(user_sorted, ts_sorted, window_s)
+        count = np.arange(1, len(order) + 1) - starts
+
+        lat_sum = _window_sum(latency, starts)
+        lat_sq = _window_sum(latency * latency, starts)
+        mean = lat_sum / count
+        var = np.clip((lat_sq - count * mean * mean) / np.maximum(count - 1, 1), 0, None)
+
+        unique_resources, _ = _window_categorical(resource_codes, len(resources), starts, count)
+        _, region_entropy = _window_categorical(region_codes, len(regions), starts, count)
+
+        features[f"api_count_last_{label}"] = count
+        features[f"unique_resources_last_{label}"] = unique_resources
+        features[f"region_entropy_last_{label}"] = region_entropy
+        features[f"avg_latency_last_{label}"] = mean
+        features[f"latency_std_last_{label}"] = np.where(count > 1, np.sqrt(var), 0.0)
+
+    # Scatter back to the caller's row order
+    out = pd.DataFrame(features)
+    out.index = order
+    out = out.sort_index()
+
+    return pd.concat([df[["timestamp", "user", "event_name", "resource", "region"]], out], axis=1)
+
+
+# -----------------------------
+# Main
+# -----------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Scenario 03 cloud logs.")
+    parser.add_argument("--rows", type=int, default=60,
+                        help="Background CloudTrail API rows; IAM and storage logs scale proportionally.")
+    parser.add_argument("--users", type=int, default=len(USERS),
+                        help="Number of cloud users in the cohort (pads with synthetic accounts).")
+    parser.add_argument("--hours", type=float, default=None,
+                        help="Spread background rows over this many hours (default: one row per minute).")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write logs chunk by chunk instead of building full DataFrames in memory.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows per chunk in --stream mode.")
+    parser.add_argument("--format", choices=FORMATS, default="csv",
+                        help="Output format; parquet/feather keep typed timestamps and categorical columns.")
+    parser.add_argument("--window-features", action="store_true",
+                        help="Also write per-event 5m/1h/24h rolling features (cloud_api_window_features).")
+    parser.add_argument("--update-features", action="store_true",
+                        help="Do not generate; fold rows appended to cloud_api.csv into cloud_api_features.csv.")
+    add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+FEATURE_STATE_NAME = ".cloud_api_features_state.pkl"
+FEATURE_STATE_PATH = os.path.join(LOG_DIR, FEATURE_STATE_NAME)
+
+
+def update_feature_table(log_dir=LOG_DIR):
+    """
+    Refreshes cloud_api_features.csv from rows appended to cloud_api.csv.
+    """
+    api_path = log_path(log_dir, "cloud_api", "csv")
+    feature_path = log_path(log_dir, "cloud_api_features", "csv")
+    state_path = os.path.join(log_dir, FEATURE_STATE_NAME)
+
+    state = IncrementalFeatureTable.load(state_path)
+    state.update_from_csv(api_path)
+    write_log(state.to_frame(), feature_path)
+    state.save(state_path)
+    write_manifest(log_dir)
+
+    print(f"ML feature table updated: {feature_path}")
+
+
+def _tee_features(chunks, table):
+    for chunk in chunks:
+        table.update(chunk)
+        yield chunk
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    log_dir, eval_dir = output_dirs(args, LOG_DIR, EVAL_DIR)
+
+    if args.update_features:
+        update_feature_table(log_dir)
+        return
+
+    # Every draw comes from a stream keyed on (scenario, seed, student), so a
+    # seeded run is reproducible and each student gets a different incident
+    streams = StudentStreams("scenario_03", args.seed, args.student_id)
+    base_time = streams.base_time()
+    users = build_user_pool(args.users)
+    incident = streams.rng("incident")
+    compromised_user = users[int(incident.integers(0, len(users)))]
+    attacker_ip = random_external_ip(incident)
+    attacker_region = REGIONS_SUSPICIOUS[int(incident.integers(0, len(REGIONS_SUSPICIOUS)))]
+
+    # Keep the original 40 / 60 / 50 IAM / API / storage ratio at every scale
+    api_rows = args.rows
+    iam_rows = api_rows * 40 // 60
+    storage_rows = api_rows * 50 // 60
+
+    def interval(n_rows):
+        return args.hours * 3600 / max(n_rows, 1) if args.hours else 60
+
+    iam_path = log_path(log_dir, "cloud_iam", args.format)
+    api_path = log_path(log_dir, "cloud_api", args.format)
+    storage_path = log_path(log_dir, "storage_access", args.format)
+    feature_path = log_path(log_dir, "cloud_api_features", args.format)
+    state_path = os.path.join(log_dir, FEATURE_STATE_NAME)
+
+    iam_rng = streams.rng("cloud_iam")
+    api_rng = streams.rng("cloud_api")
+    storage_rng = streams.rng("storage_access")
+
+    # A freshly generated API log invalidates any incremental feature state
+    if os.path.exists(state_path):
+        os.remove(state_path)
+
+    if args.stream:
+        # Peak memory is bounded by --chunk-size regardless of --rows
+        write_chunks(stream_iam_logs(compromised_user, attacker_ip, attacker_region, base_time,
+                                     n_rows=iam_rows, users=users, interval_s=interval(iam_rows),
+                                     rng=iam_rng, chunk_size=args.chunk_size),
+                     open_sink(log_dir, "cloud_iam", args.format))
+        features = IncrementalFeatureTable()
+        write_chunks(_tee_features(stream_api_logs(compromised_user, attacker_ip, attacker_region, base_time,
+                                                   n_rows=api_rows, users=users, interval_s=interval(api_rows),
+                                                   rng=api_rng, chunk_size=args.chunk_size), features),
+                     open_sink(log_dir, "cloud_api", args.format))
+        write_chunks(stream_storage_logs(compromised_user, attacker_ip, base_time,
+                                         n_rows=storage_rows, users=users, interval_s=interval(storage_rows),
+                                         rng=storage_rng, chunk_size=args.chunk_size),
+                     open_sink(log_dir, "storage_access", args.format))
+
+        # ML feature dataset, folded in chunk by chunk
+        write_log(features.to_frame(), feature_path)
+        if args.format == "csv":
+            features.csv_offset = os.path.getsize(api_path)
+            features.save(state_path)
+    else:
+        iam_df = generate_iam_logs(compromised_user, attacker_ip, attacker_region, base_time,
+                                   n_rows=iam_rows, users=users, interval_s=interval(iam_rows), rng=iam_rng)
+        api_df = generate_api_logs(compromised_user, attacker_ip, attacker_region, base_time,
+                                   n_rows=api_rows, users=users, interval_s=interval(api_rows), rng=api_rng)
+        storage_df = generate_storage_logs(compromised_user, attacker_ip, base_time,
+                                           n_rows=storage_rows, users=users, interval_s=interval(storage_rows), rng=storage_rng)
+
+        # ML feature dataset
+        feature_df = generate_api_feature_table(api_df)
+
+        # -----------------------------
+        # Save logs with new naming
+        # -----------------------------
+        write_log(iam_df, iam_path)
+        write_log(api_df, api_path)
+        write_log(storage_df, storage_path)
+        write_log(feature_df, feature_path)
+
+        if args.window_features:
+            window_path = log_path(log_dir, "cloud_api_window_features", args.format)
+            write_log(generate_api_window_features(api_df), window_path)
+            print(f"Window features: {window_path}")
 
     # -----------------------------
     # Save answer key
@@ -289,9 +793,12 @@ def main():
         ]
     }
 
-    with open(os.path.join(EVAL_DIR, "answer_key.json"), "w") as f:
+    with open(os.path.join(eval_dir, "answer_key.json"), "w") as f:
         json.dump(answer_key, f, indent=4)
 
+    # Refresh the digests notebooks use to validate their cached copies
+    write_manifest(log_dir)
+
     print("Scenario 03 data generated successfully.")
     print(f"IAM logs: {iam_path}")
     print(f"API logs: {api_path}")
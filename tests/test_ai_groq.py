@@ -0,0 +1,41 @@
+import io
+import json
+from email.message import Message
+from urllib.error import HTTPError
+
+from ai import ai_groq
+
+
+def _rate_limited(retry_after):
+    headers = Message()
+    headers["Retry-After"] = retry_after
+    return HTTPError("https://groq.test", 429, "Too Many Requests", headers, io.BytesIO())
+
+
+def _reply(content):
+    return io.BytesIO(json.dumps({"choices": [{"message": {"content": content}}]}).encode())
+
+
+def test_http_date_retry_after_is_retried(monkeypatch):
+    responses = [_rate_limited("Wed, 21 Oct 2015 07:28:00 GMT"), _reply('{"score": 0.8, "feedback": "ok"}')]
+    sleeps = []
+
+    def urlopen(request, timeout):
+        response = responses.pop(0)
+        if isinstance(response, HTTPError):
+            raise response
+        return response
+
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr(ai_groq, "urlopen", urlopen)
+    monkeypatch.setattr(ai_groq.time, "sleep", sleeps.append)
+
+    assert ai_groq.ask_groq("grade this") == {"score": 0.8, "feedback": "ok"}
+    assert sleeps == [0.0]
+
+
+def test_retry_delay_falls_back_to_exponential_backoff():
+    assert ai_groq._retry_delay("3", 0) == 3.0
+    assert ai_groq._retry_delay(None, 1) == 2.0
+    assert ai_groq._retry_delay("soon", 1) == 2.0
+    assert ai_groq._retry_delay("nan", 0) == 1.0
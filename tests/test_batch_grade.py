@@ -0,0 +1,25 @@
+import json
+import os
+
+from cyberml.batch_grade import grade_all
+
+
+def _submit(root, student, scenario, soc):
+    folder = os.path.join(root, student, scenario)
+    os.makedirs(folder)
+    with open(os.path.join(folder, "soc_output.json"), "w") as f:
+        json.dump(soc, f)
+
+
+def test_one_crashing_submission_does_not_stop_the_class(tmp_path):
+    submissions = str(tmp_path / "submissions")
+    _submit(submissions, "alice", "scenario_03", {"ioc_list": [], "triage_summary": None})
+    _submit(submissions, "bob", "scenario_03", {"ioc_list": [], "triage_summary": "Nothing found."})
+
+    results = grade_all(submissions, workers=1, cohorts_dir=str(tmp_path / "cohorts"))
+
+    by_student = {result["student"]: result for result in results}
+    assert by_student["alice"]["total_score"] == 0
+    assert by_student["alice"]["error"].startswith("AttributeError")
+    assert "error" not in by_student["bob"]
+    assert "soc_feedback" in by_student["bob"]["soc"]
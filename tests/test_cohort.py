@@ -0,0 +1,11 @@
+import os
+
+from cyberml.cohort import generate_cohort
+
+
+def test_template_generator_runs_for_every_student(tmp_path):
+    folders = generate_cohort("_template", 1, ["student_001", "student_002"], cohorts_dir=str(tmp_path), workers=1)
+
+    for folder in folders:
+        assert os.path.exists(os.path.join(folder, "logs", "generated_logs.csv"))
+        assert os.path.exists(os.path.join(folder, "evaluation", "answer_key.json"))
@@ -0,0 +1,47 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVALUATION = os.path.join(ROOT, "scenarios", "scenario_03", "evaluation")
+
+
+def _evaluate_soc():
+    spec = importlib.util.spec_from_file_location("evaluate_soc", os.path.join(EVALUATION, "evaluate_soc.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_missing_logs_fall_back_to_the_ioc_scan(tmp_path):
+    evaluate_soc = _evaluate_soc()
+    with open(os.path.join(EVALUATION, "answer_key.json")) as f:
+        key = json.load(f)
+    key["log_dir"] = str(tmp_path / "never_generated")
+    student = {
+        "ioc_list": [key["attacker_ip"]],
+        "detection_rule": f'source_ip == "{key["attacker_ip"]}"'
+    }
+
+    result = evaluate_soc.score_soc(student, key)
+
+    assert result["detection_rule_result"] is None
+    assert "Detection rule does not clearly target attacker behavior." not in result["soc_feedback"]
+
+
+@pytest.mark.parametrize("detection_rule", [
+    {"field": "source_ip", "equals": "185.199.110.7"},
+    ["source_ip", "185.199.110.7"]
+])
+def test_structured_rules_are_scored_by_the_ioc_scan(detection_rule):
+    evaluate_soc = _evaluate_soc()
+    with open(os.path.join(EVALUATION, "answer_key.json")) as f:
+        key = json.load(f)
+    student = {"ioc_list": [key["attacker_ip"]], "detection_rule": detection_rule}
+
+    result = evaluate_soc.score_soc(student, key)
+
+    assert result["detection_rule_result"] is None
+    assert result["soc_score"] >= 20
@@ -0,0 +1,74 @@
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GENERATOR = os.path.join(ROOT, "scenarios", "scenario_03", "generator", "generate_data.py")
+
+spec = importlib.util.spec_from_file_location("scenario_03_generate_data", GENERATOR)
+generate_data = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(generate_data)
+
+REGIONS = ["us-east-1", "us-west-2", "ap-southeast-1", "eu-central-1", "sa-east-1", "ca-central-1"]
+STATUSES = ["200", "200", "200", "403", "404", "500"]
+
+
+# -----------------------------
+# Reference: the per-user loops the helpers replaced
+# -----------------------------
+def loop_error_rate(df):
+    return df.groupby("user")["status"].apply(lambda x: (x != "200").mean()).values
+
+
+def loop_region_entropy(df):
+    return df.groupby("user")["region"].apply(
+        lambda x: x.value_counts(normalize=True).mul(np.log2(x.value_counts(normalize=True))).sum() * -1
+    ).values
+
+
+def random_frame(seed):
+    rng = np.random.default_rng(seed)
+    n_users = int(rng.integers(1, 40))
+    users = [f"user_{i}" for i in range(n_users)]
+    regions = REGIONS[:int(rng.integers(1, len(REGIONS) + 1))]
+
+    rows = int(rng.integers(1, 400))
+    # Every user appears at least once; the first half of them exactly once
+    user = np.concatenate([users, rng.choice(users[n_users // 2:], size=rows)])
+    region = rng.choice(np.array(regions, dtype=object), size=len(user))
+    region[rng.random(len(user)) < 0.15] = np.nan
+
+    return pd.DataFrame({
+        "user": user,
+        "region": region,
+        "status": rng.choice(STATUSES, size=len(user))
+    }).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_helpers_match_per_user_loops(seed):
+    df = random_frame(seed)
+    grouped = df.groupby("user")
+
+    error_rate = generate_data._error_rate(df["status"], df["user"]).values
+    entropy = generate_data._region_entropy(grouped.ngroup().to_numpy(), grouped.ngroups, df["region"])
+
+    np.testing.assert_array_equal(error_rate, loop_error_rate(df))
+    np.testing.assert_array_equal(entropy, loop_region_entropy(df))
+
+
+def test_user_with_only_missing_regions_has_zero_entropy():
+    df = pd.DataFrame({
+        "user": ["a", "a", "b", "c"],
+        "region": [np.nan, np.nan, "us-east-1", "us-west-2"],
+        "status": ["200", "500", "200", "200"]
+    })
+    grouped = df.groupby("user")
+
+    entropy = generate_data._region_entropy(grouped.ngroup().to_numpy(), grouped.ngroups, df["region"])
+
+    np.testing.assert_array_equal(entropy, loop_region_entropy(df))
+    np.testing.assert_array_equal(entropy, [0.0, 0.0, 0.0])
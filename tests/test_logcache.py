@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+import pytest
+
+from cyberml.logcache import LogCache
+from cyberml.logio import log_path, write_log
+
+
+def _auth(users):
+    return pd.DataFrame({
+        "timestamp": [f"2026-02-02T10:0{i}:00.000000Z" for i in range(len(users))],
+        "user": users
+    })
+
+
+def _age(path, seconds):
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+def _checkout(tmp_path):
+    log_dir = tmp_path / "repo" / "scenarios" / "scenario_09" / "logs"
+    os.makedirs(log_dir)
+    return str(log_dir)
+
+
+def _cache(tmp_path):
+    return LogCache(cache_dir=str(tmp_path / "cache"), remote_root=None, repo_root=str(tmp_path / "repo"),
+                    offline=True, shared_dir=None)
+
+
+def test_regenerated_csv_wins_over_stale_parquet(tmp_path):
+    log_dir = _checkout(tmp_path)
+    write_log(_auth(["old"]), log_path(log_dir, "auth", "parquet"))
+    _age(log_path(log_dir, "auth", "parquet"), 60)
+    write_log(_auth(["new", "new"]), log_path(log_dir, "auth", "csv"))
+
+    assert _cache(tmp_path).load("scenario_09", "auth")["user"].tolist() == ["new", "new"]
+
+
+def test_unparsable_local_log_raises(tmp_path):
+    log_dir = _checkout(tmp_path)
+    bad = _auth(["new"])
+    bad["timestamp"] = ["not a timestamp"]
+    write_log(bad, log_path(log_dir, "auth", "csv"))
+
+    with pytest.raises(ValueError) as error:
+        _cache(tmp_path).load("scenario_09", "auth")
+    assert not isinstance(error.value, FileNotFoundError)
+
+
+def test_missing_log_raises_file_not_found(tmp_path):
+    _checkout(tmp_path)
+
+    with pytest.raises(FileNotFoundError):
+        _cache(tmp_path).load("scenario_09", "auth")
+
@@ -0,0 +1,66 @@
+import os
+
+import pandas as pd
+import pytest
+
+from cyberml import logio
+from cyberml.logio import load_log, log_path, write_log
+
+
+def _auth(users):
+    return pd.DataFrame({
+        "timestamp": [f"2026-02-02T10:0{i}:00.000000Z" for i in range(len(users))],
+        "user": users
+    })
+
+
+def _age(path, seconds):
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+def test_regenerated_csv_wins_over_stale_parquet(tmp_path):
+    write_log(_auth(["old"]), log_path(tmp_path, "auth", "parquet"))
+    _age(log_path(tmp_path, "auth", "parquet"), 60)
+    write_log(_auth(["new", "new"]), log_path(tmp_path, "auth", "csv"))
+
+    assert load_log(tmp_path, "auth")["user"].tolist() == ["new", "new"]
+
+
+def test_newer_parquet_wins_over_csv(tmp_path):
+    write_log(_auth(["old"]), log_path(tmp_path, "auth", "csv"))
+    _age(log_path(tmp_path, "auth", "csv"), 60)
+    write_log(_auth(["new"]), log_path(tmp_path, "auth", "parquet"))
+
+    assert load_log(tmp_path, "auth")["user"].tolist() == ["new"]
+
+
+def test_unparsable_local_log_raises(tmp_path):
+    write_log(_auth(["old"]), log_path(tmp_path, "auth", "parquet"))
+    _age(log_path(tmp_path, "auth", "parquet"), 60)
+    bad = _auth(["new"])
+    bad["timestamp"] = ["not a timestamp"]
+    write_log(bad, log_path(tmp_path, "auth", "csv"))
+
+    with pytest.raises(ValueError):
+        load_log(tmp_path, "auth")
+
+
+def test_missing_pyarrow_falls_through_to_csv(tmp_path, monkeypatch):
+    write_log(_auth(["csv"]), log_path(tmp_path, "auth", "csv"))
+    _age(log_path(tmp_path, "auth", "csv"), 60)
+    write_log(_auth(["parquet"]), log_path(tmp_path, "auth", "parquet"))
+    read_log = logio.read_log
+
+    def without_pyarrow(path, columns=None):
+        if not path.endswith(".csv"):
+            raise ImportError("pyarrow")
+        return read_log(path, columns=columns)
+
+    monkeypatch.setattr(logio, "read_log", without_pyarrow)
+    assert load_log(tmp_path, "auth")["user"].tolist() == ["csv"]
+
+
+def test_missing_log_raises_file_not_found(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_log(tmp_path, "auth")
@@ -0,0 +1,28 @@
+import os
+
+import pandas as pd
+
+from cyberml.logio import log_path, write_log
+from cyberml.profiles import _history_log
+
+
+def _auth(users):
+    return pd.DataFrame({
+        "timestamp": [f"2026-02-02T10:0{i}:00.000000Z" for i in range(len(users))],
+        "user": users
+    })
+
+
+def _age(path, seconds):
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+def test_history_log_is_the_newest_copy(tmp_path):
+    log_dir = str(tmp_path / "scenario_01" / "logs")
+    os.makedirs(log_dir)
+    write_log(_auth(["old"]), log_path(log_dir, "historical_logins", "parquet"))
+    _age(log_path(log_dir, "historical_logins", "parquet"), 60)
+    write_log(_auth(["new"]), log_path(log_dir, "historical_logins", "csv"))
+
+    assert _history_log("scenario_01", str(tmp_path)) == ("historical_logins", log_path(log_dir, "historical_logins", "csv"))
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from cyberml.sessions import sessionize_frame
+
+
+def _events(rows):
+    df = pd.DataFrame(rows, columns=["timestamp", "user", "source_ip", "event_name"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    return df
+
+
+def test_missing_ip_does_not_merge_into_another_users_session():
+    df = _events([
+        ("2026-02-02T10:00:00Z", "alice", "10.0.1.5", "ConsoleLogin"),
+        ("2026-02-02T10:01:00Z", "bob", None, "CreateAccessKey"),
+        ("2026-02-02T10:02:00Z", "alice", "10.0.1.5", "AssumeRole"),
+    ])
+    sessions = sessionize_frame(df)
+
+    by_user = {user: group for user, group in sessions.groupby("user")}
+    assert by_user["alice"]["event_count"].tolist() == [2]
+    assert by_user["alice"]["sequence"].tolist() == ["ConsoleLogin -> AssumeRole"]
+    assert by_user["bob"]["event_count"].tolist() == [1]
+    assert by_user["bob"]["source_ip"].isna().all()
+
+
+def test_missing_user_keeps_its_ip_and_stays_separate():
+    df = _events([
+        ("2026-02-02T10:00:00Z", "alice", "10.0.1.5", "ConsoleLogin"),
+        ("2026-02-02T10:01:00Z", None, "10.0.1.9", "GetObject"),
+        ("2026-02-02T10:02:00Z", "bob", "10.0.1.9", "AssumeRole"),
+        ("2026-02-02T10:03:00Z", None, None, "ListBuckets"),
+    ])
+    sessions = sessionize_frame(df)
+
+    assert len(sessions) == 4
+    assert sessions["event_count"].tolist() == [1, 1, 1, 1]
+    anonymous = sessions[sessions["user"].isna()]
+    assert sorted(anonymous["source_ip"].fillna("-").tolist()) == ["-", "10.0.1.9"]
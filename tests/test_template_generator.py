@@ -0,0 +1,23 @@
+import importlib.util
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GENERATOR = os.path.join(ROOT, "scenarios", "_template", "generator", "generate_data.py")
+
+spec = importlib.util.spec_from_file_location("template_generate_data", GENERATOR)
+generate_data = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(generate_data)
+
+
+def _generate(out_dir, *options):
+    generate_data.main(["--seed", "3", "--rows", "20", "--out-dir", str(out_dir), *options])
+    with open(os.path.join(out_dir, "logs", "generated_logs.csv")) as f:
+        return f.read()
+
+
+def test_stream_and_in_memory_logs_are_identical(tmp_path):
+    in_memory = _generate(tmp_path / "memory")
+    streamed = _generate(tmp_path / "stream", "--stream", "--chunk-size", "7")
+
+    assert in_memory == streamed
+    assert "185.199.110." not in in_memory.splitlines()[-1]